@@ -1,4 +1,11 @@
+import hashlib
+import os
 import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
 
 OPCODE_MAP = {
     "LODD": 0b0000, "STOD": 0b0001, "ADDD": 0b0010, "SUBD": 0b0011,
@@ -12,85 +19,302 @@ FULL_OPCODE_MAP = {
     "RETN": 0xF800, "SWAP": 0xFA00, "INSP": 0xFC00, "DESP": 0xFE00
 }
 
-def assemble(source_code: str) -> tuple[list[int] | None, str | None]:
-    lines = source_code.strip().upper().splitlines()
-    labels = {}
-    variables = {}
-    instructions = []
-    
-    # 1. Primeira Passagem: Contar endereços e achar labels
-    code_address_counter = 0
-    for i, line in enumerate(lines):
-        line = line.split('/')[0].strip()
-        if not line: continue
-        
-        match = re.match(r'^([A-Z0-9_]+):\s*(.*)', line)
-        if match:
-            label, rest_of_line = match.groups()
-            labels[label] = code_address_counter
-            line = rest_of_line.strip()
-        
-        if not line: continue
-        
-        parts = line.split()
-        mnemonic = parts[0]
-        operand = parts[1] if len(parts) > 1 else None
-        
-        instructions.append({
-            "address": code_address_counter,
-            "mnemonic": mnemonic,
-            "operand": operand,
-            "line": i + 1
-        })
-        code_address_counter += 1
-
-    # CORREÇÃO: Variáveis começam imediatamente após o código
-    var_address_counter = code_address_counter 
-
-    # 2. Alocar variáveis
-    for instr in instructions:
-        mnemonic = instr["mnemonic"]
-        operand = instr["operand"]
-        
-        if mnemonic in ["LODD", "STOD", "ADDD", "SUBD"] and operand:
-            if operand not in labels and operand not in variables:
-                try:
-                    int(operand)
-                except ValueError:
-                    variables[operand] = var_address_counter
-                    var_address_counter += 1
-
-    # 3. Segunda Passagem: Gerar Bytecode
-    bytecode = [0] * code_address_counter
-    for instr in instructions:
-        address = instr["address"]
-        mnemonic = instr["mnemonic"]
-        operand = instr["operand"]
-        
-        machine_word = 0
-        if mnemonic in OPCODE_MAP:
-            opcode = OPCODE_MAP[mnemonic]
-            operand_val = 0
-            if operand:
-                if operand in labels:
-                    operand_val = labels[operand]
-                elif operand in variables:
-                    operand_val = variables[operand]
-                else:
-                    try:
-                        operand_val = int(operand)
-                    except ValueError:
-                        return None, f"Erro na linha {instr['line']}: '{operand}' não encontrado."
-            
-            machine_word = (opcode << 12) | (operand_val & 0xFFF)
-        
-        elif mnemonic in FULL_OPCODE_MAP:
-            machine_word = FULL_OPCODE_MAP[mnemonic]
-            if mnemonic in ["INSP", "DESP"] and operand:
-                machine_word |= (int(operand) & 0xFF)
+# Uma linha do fonte: [label:] [mnemônico/diretiva [operando ...]] [/ comentário].
+# Texto entre aspas (caminho do .include) pode conter '/'. Sem quantificadores
+# possessivos (Python 3.10): como nada depois é obrigatório, a primeira
+# tentativa (gulosa) sempre casa e não há retrocesso.
+LINE_RE = re.compile(r"^[ \t]*(?:([A-Za-z0-9_]+)[ \t]*:)?[ \t]*([^\s/]*)[ \t]*"
+                     r"(([^\s/\"]*)(?:\"[^\"\n]*\"|[^/\n\"])*)", re.MULTILINE)
+NUMBER_RE = re.compile(r"[-+]?(?:0[xX][0-9A-Fa-f]+|\d+)")
+
+MEMORY_SIZE = 4096
+# Erros listados por montagem (os demais são só contados)
+MAX_ERRORS = 50
+MAX_INCLUDE_DEPTH = 16
+
+# Como o operando entra na palavra
+KIND_ADDRESS = 0       # opcode de 4 bits + endereço de 12 bits
+KIND_FIXED = 1         # opcode de 16 bits, operando ignorado
+KIND_IMMEDIATE = 2     # INSP/DESP: opcode + 8 bits
+KIND_WORD = 3          # .word: 16 bits
+OPERAND_MASKS = {KIND_ADDRESS: 0x0FFF, KIND_IMMEDIATE: 0x00FF, KIND_WORD: 0xFFFF}
+INSTRUCTIONS = {mnemonic: (opcode << 12, KIND_ADDRESS) for mnemonic, opcode in OPCODE_MAP.items()}
+INSTRUCTIONS.update((mnemonic, (word, KIND_IMMEDIATE if mnemonic in ("INSP", "DESP") else KIND_FIXED))
+                    for mnemonic, word in FULL_OPCODE_MAP.items())
+# Operandos que viram variáveis quando não são labels nem números
+VARIABLE_OPCODES = {OPCODE_MAP[m] << 12 for m in ("LODD", "STOD", "ADDD", "SUBD")}
+
+@dataclass(frozen=True)
+class ProgramImage:
+    """Resultado da montagem: bytecode mais tabela de símbolos e mapa de linhas"""
+    bytecode: tuple[int, ...]
+    labels: dict[str, int] = field(default_factory=dict)
+    variables: dict[str, int] = field(default_factory=dict)
+    source_lines: tuple[int, ...] = ()     # endereço -> linha do fonte (1-based)
+    variables_start: int = 0
+    variables_end: int = 0                 # exclusivo
+
+    def line_for(self, address: int) -> int | None:
+        """Linha do fonte que gerou a palavra em address (None fora do código)"""
+        if 0 <= address < len(self.source_lines):
+            return self.source_lines[address]
+        return None
+
+    def address_of(self, symbol: str) -> int | None:
+        """Endereço de um label ou variável"""
+        symbol = symbol.upper()
+        if symbol in self.labels:
+            return self.labels[symbol]
+        return self.variables.get(symbol)
+
+    def to_bytes(self, byteorder: str = "little") -> bytes:
+        """Bytecode empacotado em palavras de 16 bits (formato de /load/binary)"""
+        image = array('H', self.bytecode)
+        if byteorder != sys.byteorder:
+            image.byteswap()
+        return image.tobytes()
+
+    def to_dict(self) -> dict:
+        return {
+            "labels": self.labels,
+            "variables": self.variables,
+            "sourceMap": {str(address): line for address, line in enumerate(self.source_lines)},
+            "codeEnd": len(self.bytecode),
+            "variablesStart": self.variables_start,
+            "variablesEnd": self.variables_end,
+        }
+
+def assemble(source_code, include_dir: str | None = None) -> tuple[list[int] | None, str | None]:
+    image, error = assemble_program(source_code, include_dir)
+    return (list(image.bytecode) if image is not None else None), error
+
+def _number(text: str) -> int | None:
+    if NUMBER_RE.fullmatch(text) is None:
+        return None
+    return int(text, 16) if "x" in text or "X" in text else int(text)
+
+def _where(line: int, file_name: str | None) -> str:
+    return f"linha {line}" if file_name is None else f"linha {line} de {file_name}"
+
+class _MemoryFull(Exception):
+    """O fonte passou do tamanho da memória: a montagem para na linha do erro"""
+
+class _Scanner:
+    """
+    Passagem única pelo fonte (e pelos .include): gera as palavras e o mapa
+    de linhas direto e guarda só os operandos simbólicos como pendências
+    (endereço, linha, arquivo, tipo, símbolo), resolvidas no fim.
+    """
+    def __init__(self, include_dir: str | None):
+        self.include_dir = include_dir
+        self.labels = {}
+        self.bytecode = []
+        self.source_lines = []
+        self.fixups = []
+        self.errors = []               # (endereço, mensagem): o endereço cresce com o fonte
+        self.including = []
+
+    def error(self, line: int, file_name: str | None, message: str):
+        self.errors.append((len(self.bytecode), f"Erro na {_where(line, file_name)}: {message}"))
+
+    def reserve(self, count: int, line: int, file_name: str | None):
+        """Confere, antes de gerar, se mais count palavras cabem na memória"""
+        if count > MEMORY_SIZE - len(self.bytecode):
+            self.error(line, file_name, f"o programa passa de {MEMORY_SIZE} palavras (tamanho da memória).")
+            raise _MemoryFull
+
+    def scan(self, source, file_name: str | None = None, map_line: int | None = None, base_dir: str | None = None):
+        """source: texto inteiro (str) ou um iterável de linhas (arquivo aberto)"""
+        if isinstance(source, str):
+            lines = LINE_RE.findall(source)
         else:
-            return None, f"Erro na linha {instr['line']}: Mnemônico '{mnemonic}' desconhecido."
+            lines = (LINE_RE.match(text).groups() for text in source)
+        labels = self.labels
+        bytecode = self.bytecode
+        emit = bytecode.append
+        source_lines = self.source_lines
+        mark = source_lines.append
+        fixup = self.fixups.append
+        for line, (label, op, args, operand) in enumerate(lines, start=1):
+            if label:
+                label = label.upper()
+                if label in labels or NUMBER_RE.fullmatch(label):
+                    self.error(line, file_name, f"Label '{label}' duplicado ou numérico.")
+                else:
+                    labels[label] = len(bytecode)
+            if not op:
+                continue
+            op = op.upper()
+            instruction = INSTRUCTIONS.get(op)
+            if instruction is not None:
+                if len(bytecode) >= MEMORY_SIZE:
+                    self.reserve(1, line, file_name)
+                word, kind = instruction
+                if operand and kind != KIND_FIXED:
+                    if operand.isdecimal():
+                        value = int(operand)
+                    else:
+                        value = _number(operand) if operand[0] in "0123456789+-" else None
+                    if value is not None:
+                        word |= value & OPERAND_MASKS[kind]
+                    elif kind == KIND_IMMEDIATE:
+                        self.error(line, file_name, f"{op} precisa de um número ('{operand}').")
+                    else:
+                        fixup((len(bytecode), line, file_name, kind, operand.upper()))
+                emit(word)
+                mark(map_line or line)
+            elif op == ".WORD":
+                self.data(args, line, file_name, map_line or line)
+            elif op == ".SPACE":
+                count = _number(args.strip())
+                if count is None or count < 0:
+                    self.error(line, file_name, f".space precisa de um número de palavras ('{args.strip()}').")
+                    continue
+                self.reserve(count, line, file_name)
+                bytecode.extend([0] * count)
+                source_lines.extend([map_line or line] * count)
+            elif op == ".INCLUDE":
+                self.include(args.strip().strip('"\''), line, file_name, map_line or line, base_dir)
+            else:
+                self.error(line, file_name, f"Mnemônico '{op}' desconhecido.")
+
+    def data(self, args: str, line: int, file_name: str | None, map_line: int):
+        """.word v1, v2, ...: números ou símbolos"""
+        values = [value.strip().upper() for value in args.split(",")]
+        if not all(values):
+            self.error(line, file_name, ".word precisa de valores separados por vírgula.")
+            return
+        self.reserve(len(values), line, file_name)
+        for value in values:
+            number = _number(value)
+            if number is None:
+                self.fixups.append((len(self.bytecode), line, file_name, KIND_WORD, value))
+                number = 0
+            self.bytecode.append(number & 0xFFFF)
+            self.source_lines.append(map_line)
+
+    def include(self, name: str, line: int, file_name: str | None, map_line: int, base_dir: str | None):
+        if self.include_dir is None:
+            self.error(line, file_name, ".include não é permitido aqui.")
+            return
+        path = os.path.abspath(os.path.join(base_dir or self.include_dir, name))
+        if path in self.including or len(self.including) >= MAX_INCLUDE_DEPTH:
+            self.error(line, file_name, f".include recursivo de '{name}'.")
+            return
+        try:
+            source_file = open(path, encoding="utf-8")
+        except OSError as e:
+            self.error(line, file_name, f"não foi possível incluir '{name}' ({e.strerror}).")
+            return
+        self.including.append(path)
+        try:
+            with source_file:
+                self.scan(source_file, os.path.basename(path), map_line, os.path.dirname(path))
+        finally:
+            self.including.pop()
+
+def assemble_program(source_code, include_dir: str | None = None) -> tuple[ProgramImage | None, str | None]:
+    """
+    Monta o fonte (str ou iterável de linhas) e devolve a imagem completa do
+    programa ou todas as mensagens de erro (uma por linha). '.include'
+    só é aceito com include_dir (diretório base dos arquivos incluídos).
+    """
+    scanner = _Scanner(include_dir)
+    try:
+        scanner.scan(source_code, base_dir=include_dir)
+    except _MemoryFull:
+        pass
+    labels = scanner.labels
+    bytecode = scanner.bytecode
+    errors = scanner.errors
+    code_end = len(bytecode)
+
+    # Variáveis começam imediatamente após o código (e dados), na ordem em que aparecem
+    variables = {}
+    var_address_counter = code_end
+    for address, _, _, kind, symbol in scanner.fixups:
+        if (kind == KIND_ADDRESS and bytecode[address] in VARIABLE_OPCODES
+                and symbol not in labels and symbol not in variables):
+            variables[symbol] = var_address_counter
+            var_address_counter += 1
+
+    # Pendências: labels primeiro, depois variáveis
+    for address, line, file_name, kind, symbol in scanner.fixups:
+        value = labels.get(symbol)
+        if value is None:
+            value = variables.get(symbol)
+        if value is None:
+            errors.append((address, f"Erro na {_where(line, file_name)}: '{symbol}' não encontrado."))
+            continue
+        bytecode[address] |= value & OPERAND_MASKS[kind]
+
+    if var_address_counter > MEMORY_SIZE:
+        errors.append((var_address_counter, f"Erro: o programa ocupa {var_address_counter} palavras "
+                                            f"(a memória tem {MEMORY_SIZE})."))
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        messages = [message for _, message in errors[:MAX_ERRORS]]
+        if len(errors) > MAX_ERRORS:
+            messages.append(f"... e mais {len(errors) - MAX_ERRORS} erros.")
+        return None, "\n".join(messages)
+
+    image = ProgramImage(
+        bytecode=tuple(bytecode),
+        labels=labels,
+        variables=variables,
+        source_lines=tuple(scanner.source_lines),
+        variables_start=code_end,
+        variables_end=var_address_counter,
+    )
+    return image, None
+
+class AssemblyCache:
+    """
+    Cache LRU de montagens indexado pelo hash (SHA-256) do código-fonte.
+    Guarda a imagem completa (bytecode, símbolos, mapa de linhas) ou o erro; fontes maiores que max_source_bytes não entram.
+    """
+    def __init__(self, max_entries: int = 512, max_source_bytes: int = 256 * 1024):
+        self.max_entries = max_entries
+        self.max_source_bytes = max_source_bytes
+        self.entries = OrderedDict()   # hash -> (ProgramImage | None, erro)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, source_code: str) -> tuple[ProgramImage | None, str | None]:
+        """Mesmo contrato de assemble_program(), montando só se preciso"""
+        encoded = source_code.encode("utf-8")
+        key = hashlib.sha256(encoded).digest()
+        with self._lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = assemble_program(source_code)
+        if len(encoded) <= self.max_source_bytes:
+            with self._lock:
+                self.entries[key] = result
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
 
-        bytecode[address] = machine_word
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / total if total else 0.0,
+            }
 
-    return bytecode, None
\ No newline at end of file
+assembly_cache = AssemblyCache()
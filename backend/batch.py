@@ -0,0 +1,139 @@
+"""
+Executor em lote, sem a API HTTP.
+
+Monta e executa vários programas .asm (arquivos ou diretórios), cada um
+até o halt ('FIM: JUMP FIM'), breakpoint ou limite de ciclos, em
+vários processos, e gera um relatório JSON ou CSV.
+
+    python -m backend.batch programas/ --max-cycles 1000000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from .assembler import assemble
+from .cpu import MIC1, ENGINES
+
+REPORT_REGISTERS = ("PC", "AC", "SP", "IR", "TIR", "MAR", "MBR")
+# Colunas do CSV com --counters (o JSON leva o resumo completo)
+COUNTER_COLUMNS = ["instructions", "cpi", "memoryReads", "memoryWrites", "cyclesPerSecond"]
+
+def find_programs(paths: list[str]) -> list[str]:
+    """Expande diretórios nos arquivos .asm que contêm (ordem alfabética)"""
+    programs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                programs += [os.path.join(root, name) for name in files if name.lower().endswith(".asm")]
+        else:
+            programs.append(path)
+    return sorted(programs)
+
+def run_program(path: str, max_cycles: int, engine: str = "interp", trace_dir: str | None = None,
+                counters: bool = False) -> dict:
+    """Monta e executa um programa; devolve uma linha do relatório"""
+    report = {"program": path, "status": None, "cycles": 0, "wallTimeMs": 0}
+    start = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8") as source_file:
+            bytecode, error = assemble(source_file, os.path.dirname(os.path.abspath(path)))
+    except OSError as e:
+        report.update(status="error", error=str(e))
+        return report
+
+    if error:
+        report.update(status="assemble_error", error=error)
+        return report
+
+    cpu = MIC1(engine=engine, trace_depth=0)
+    for address, word in enumerate(bytecode):
+        cpu.main_memory.direct_write(address, word)
+    if trace_dir:
+        trace_name = os.path.splitext(os.path.basename(path))[0] + ".trace"
+        report["trace"] = os.path.join(trace_dir, trace_name)
+        cpu.start_recording(report["trace"])
+    if counters:
+        cpu.enable_counters()
+    cpu.is_running = True
+    try:
+        cpu.run(max_cycles)
+        if cpu.halted:
+            report["status"] = "halted"
+        elif cpu.stop_flag:
+            report["status"] = "breakpoint"
+        else:
+            report["status"] = "limit"
+    except IndexError:
+        report.update(status="error", error="MPC fora da memória de controle.")
+    finally:
+        cpu.stop_recording()
+
+    report["wallTimeMs"] = round((time.perf_counter() - start) * 1000, 3)
+    report["cycles"] = cpu.cycle_count
+    report["registers"] = cpu.get_registers()
+    report["memoryCrc32"] = f"{zlib.crc32(cpu.main_memory.data.tobytes()):08x}"
+    if counters:
+        report["counters"] = cpu.get_counters()
+    return report
+
+def run_batch(programs: list[str], max_cycles: int, engine: str = "interp", workers: int | None = None,
+              trace_dir: str | None = None, counters: bool = False) -> list[dict]:
+    count = len(programs)
+    if workers == 1:
+        return [run_program(path, max_cycles, engine, trace_dir, counters) for path in programs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_program, programs, [max_cycles] * count, [engine] * count,
+                                 [trace_dir] * count, [counters] * count))
+
+def write_csv(reports: list[dict], output):
+    fields = ["program", "status", "cycles", "wallTimeMs", "memoryCrc32", *REPORT_REGISTERS]
+    if any("counters" in report for report in reports):
+        fields += COUNTER_COLUMNS
+    fields.append("error")
+    writer = csv.DictWriter(output, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for report in reports:
+        counters = report.get("counters") or {}
+        writer.writerow({**report, **report.get("registers", {}),
+                         **{column: counters.get(column) for column in COUNTER_COLUMNS}})
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Executa programas MIC-1 em lote.")
+    parser.add_argument("paths", nargs="+", help="arquivos .asm ou diretórios")
+    parser.add_argument("--max-cycles", type=int, default=1_000_000, help="limite de microciclos por programa")
+    parser.add_argument("--engine", choices=ENGINES, default="interp")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: número de núcleos)")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", "-o", help="arquivo do relatório (padrão: saída padrão)")
+    parser.add_argument("--trace-dir", help="grava o trace binário completo de cada programa neste diretório")
+    parser.add_argument("--counters", action="store_true", help="inclui os contadores de desempenho no relatório")
+    args = parser.parse_args(argv)
+
+    programs = find_programs(args.paths)
+    if not programs:
+        parser.error("nenhum arquivo .asm encontrado")
+
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+    reports = run_batch(programs, args.max_cycles, args.engine, args.workers, args.trace_dir, args.counters)
+
+    output = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_csv(reports, output)
+        else:
+            json.dump(reports, output, indent=2)
+            output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    failed = sum(report["status"] in ("error", "assemble_error") for report in reports)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Benchmarks do simulador e da API.
+
+Monta os programas de benchmarks/ (ou os indicados), executa cada um
+por um número fixo de microciclos via MIC1.step em cada motor e mede
+microciclos/s, alocações e pico de memória (tracemalloc, numa passada
+separada). Depois mede a latência de /load, /load/binary, /step e
+/status com várias sessões concorrentes contra o app FastAPI em
+processo (TestClient) e a vazão do montador num fonte sintético. O
+resultado é um JSON; --compare aponta regressões em relação a um
+resultado anterior. Para comparar microprogramas, rode com
+MIC1_CONTROL_STORE apontando para outra memória de controle (mal.py).
+
+    python -m backend.bench --output atual.json --compare base.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from .assembler import assemble_program
+from .cpu import MIC1, ENGINES
+from .batch import find_programs
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+API_ENDPOINTS = ("load", "load_binary", "step", "status")
+
+def load_programs(paths: list[str]) -> dict:
+    """nome -> (ProgramImage, fonte); erro de montagem interrompe o benchmark"""
+    programs = {}
+    for path in find_programs(paths):
+        with open(path, encoding="utf-8") as source_file:
+            source = source_file.read()
+        image, error = assemble_program(source, os.path.dirname(os.path.abspath(path)))
+        if error:
+            raise SystemExit(f"{path}: {error}")
+        programs[os.path.splitext(os.path.basename(path))[0]] = (image, source)
+    return programs
+
+def _run_steps(cpu: MIC1, cycles: int):
+    target = cpu.cycle_count + cycles
+    step = cpu.step
+    while cpu.cycle_count < target and cpu.is_running:
+        step()
+
+def bench_program(image, engine: str, cycles: int, trace_depth: int = 50, repeat: int = 3) -> dict:
+    """Melhor de 'repeat' execuções de 'cycles' microciclos, mais uma passada com tracemalloc"""
+    cpu = MIC1(engine=engine, trace_depth=trace_depth)
+    best = None
+    for _ in range(repeat):
+        cpu.load_program(image)
+        cpu.is_running = True
+        _run_steps(cpu, min(cycles, 1000))      # aquecimento
+        start_cycles = cpu.cycle_count
+        start = time.perf_counter()
+        _run_steps(cpu, cycles)
+        elapsed = time.perf_counter() - start
+        rate = (cpu.cycle_count - start_cycles) / elapsed if elapsed else 0
+        best = max(best or 0, rate)
+
+    cpu.load_program(image)
+    cpu.is_running = True
+    _run_steps(cpu, min(cycles, 1000))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    _run_steps(cpu, min(cycles, 100_000))
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+
+    return {
+        "cyclesPerSecond": int(best),
+        "cycles": cycles,
+        "netAllocatedBytes": sum(stat.size_diff for stat in stats),
+        "netAllocatedBlocks": sum(stat.count_diff for stat in stats),
+        "peakTracedBytes": peak,
+    }
+
+def bench_simulation(programs: dict, engines: list[str], cycles: int, repeat: int) -> list[dict]:
+    results = []
+    for name, (image, _) in programs.items():
+        for engine in engines:
+            result = bench_program(image, engine, cycles, repeat=repeat)
+            results.append({"program": name, "engine": engine, **result})
+            print(f"{name:>12} {engine:>6} {result['cyclesPerSecond']:>12,} ciclos/s", file=sys.stderr)
+    return results
+
+def synthetic_program(lines: int) -> str:
+    """Fonte gerado com 'lines' linhas: código com labels, variáveis, comentários e .word"""
+    mnemonics = ("LODD V{}", "STOD V{}", "ADDD V{}", "SUBD V{}", "JNZE L{}", "LOCO {}", "LODL 3", "PUSH", "POP")
+    source = []
+    for index in range(lines):
+        if index % 8 == 7:
+            source.append(f".word {index}, L{index // 64 * 8}")
+        elif index % 8 == 0:
+            source.append(f"L{index}: {mnemonics[index % 9].format(index % 32)}  / bloco {index}")
+        else:
+            source.append(mnemonics[index % 9].format(index % 32 if index % 9 < 4 else index // 8 * 8))
+    return "\n".join(source)
+
+def bench_assembler(lines: int, repeat: int) -> dict:
+    """Linhas/s de assemble_program (sem cache) num fonte sintético de 'lines' linhas"""
+    source = synthetic_program(lines)
+    best = None
+    for _ in range(max(repeat, 1) * 5):
+        start = time.perf_counter()
+        image, error = assemble_program(source)
+        elapsed = time.perf_counter() - start
+        if error:
+            raise SystemExit(f"fonte sintético: {error.splitlines()[0]}")
+        best = elapsed if best is None else min(best, elapsed)
+    result = {"lines": lines, "words": image.variables_end, "bestMs": round(best * 1000, 3),
+              "linesPerSecond": int(lines / best) if best else 0}
+    print(f"{'montador':>12} {result['linesPerSecond']:>12,} linhas/s", file=sys.stderr)
+    return result
+
+def _latency_summary(samples: list[float], wall: float) -> dict:
+    samples = sorted(samples)
+    def percentile(fraction):
+        return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 3)
+    return {
+        "requests": len(samples),
+        "meanMs": round(statistics.fmean(samples) * 1000, 3),
+        "p50Ms": percentile(0.50),
+        "p95Ms": percentile(0.95),
+        "p99Ms": percentile(0.99),
+        "requestsPerSecond": round(len(samples) / wall, 1) if wall else None,
+    }
+
+def bench_api(programs: dict, requests: int, concurrency: int) -> dict:
+    """Latência por endpoint com 'concurrency' sessões fazendo 'requests' chamadas cada"""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as e:       # TestClient precisa do httpx
+        return {"skipped": str(e)}
+    from .main import app
+
+    image, source = next(iter(programs.values()))
+    load_body = {"bytecode": list(image.bytecode), "source": source}
+    packed = image.to_bytes()
+    client = TestClient(app)
+
+    def call(endpoint: str, session: str):
+        headers = {"X-Session-Id": session}
+        if endpoint == "load":
+            response = client.post("/load", json=load_body, headers=headers)
+        elif endpoint == "load_binary":
+            response = client.post("/load/binary", content=packed,
+                                   headers={**headers, "Content-Type": "application/octet-stream"})
+        elif endpoint == "step":
+            response = client.post("/step", headers=headers)
+        else:
+            response = client.get("/status", headers=headers)
+        response.raise_for_status()
+
+    def worker(endpoint: str, index: int) -> list[float]:
+        session = f"bench-{endpoint}-{index}"
+        call("load", session)
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            call(endpoint, session)
+            samples.append(time.perf_counter() - start)
+        client.delete("/session", headers={"X-Session-Id": session})
+        return samples
+
+    results = {"concurrency": concurrency}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for endpoint in API_ENDPOINTS:
+            start = time.perf_counter()
+            batches = list(executor.map(worker, [endpoint] * concurrency, range(concurrency)))
+            wall = time.perf_counter() - start
+            results[endpoint] = _latency_summary([sample for batch in batches for sample in batch], wall)
+            print(f"{'/' + endpoint:>12} p95 {results[endpoint]['p95Ms']:>8} ms", file=sys.stderr)
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressões além da tolerância (fração) em ciclos/s e p95 de latência"""
+    regressions = []
+    previous = {(entry["program"], entry["engine"]): entry for entry in baseline.get("simulation", [])}
+    for entry in current.get("simulation", []):
+        old = previous.get((entry["program"], entry["engine"]))
+        if old and entry["cyclesPerSecond"] < old["cyclesPerSecond"] * (1 - tolerance):
+            regressions.append(f"{entry['program']}/{entry['engine']}: {old['cyclesPerSecond']:,} -> "
+                               f"{entry['cyclesPerSecond']:,} ciclos/s")
+    new, old = current.get("assembler"), baseline.get("assembler")
+    if new and old and new["linesPerSecond"] < old["linesPerSecond"] * (1 - tolerance):
+        regressions.append(f"montador: {old['linesPerSecond']:,} -> {new['linesPerSecond']:,} linhas/s")
+    for endpoint in API_ENDPOINTS:
+        new = current.get("api", {}).get(endpoint)
+        old = baseline.get("api", {}).get(endpoint)
+        if new and old and new["p95Ms"] > old["p95Ms"] * (1 + tolerance):
+            regressions.append(f"/{endpoint}: p95 {old['p95Ms']} -> {new['p95Ms']} ms")
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do simulador MIC-1 e da API.")
+    parser.add_argument("paths", nargs="*", default=[BENCH_DIR], help="arquivos .asm ou diretórios (padrão: benchmarks/)")
+    parser.add_argument("--cycles", type=int, default=200_000, help="microciclos por programa e motor")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições (vale a melhor)")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="motores separados por vírgula")
+    parser.add_argument("--assembler-lines", type=int, default=3500, help="linhas do fonte sintético do montador (0 pula)")
+    parser.add_argument("--api-requests", type=int, default=200, help="requisições por sessão e endpoint (0 pula a API)")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessões concorrentes na API")
+    parser.add_argument("--output", "-o", help="arquivo JSON de resultado (padrão: saída padrão)")
+    parser.add_argument("--compare", help="resultado anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="regressão tolerada (fração)")
+    args = parser.parse_args(argv)
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"motor desconhecido: {', '.join(unknown)}")
+    programs = load_programs(args.paths)
+    if not programs:
+        parser.error("nenhum arquivo .asm encontrado")
+
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "cycles": args.cycles,
+            "controlStore": os.environ.get("MIC1_CONTROL_STORE") or "padrão",
+        },
+        "simulation": bench_simulation(programs, engines, args.cycles, args.repeat),
+    }
+    if args.assembler_lines > 0:
+        result["assembler"] = bench_assembler(args.assembler_lines, args.repeat)
+    if args.api_requests > 0:
+        result["api"] = bench_api(programs, args.api_requests, args.concurrency)
+
+    text = json.dumps(result, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text)
+    else:
+        sys.stdout.write(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(result, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
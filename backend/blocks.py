@@ -0,0 +1,256 @@
+"""
+Cache de tradução de blocos básicos (motor 'block').
+
+Uma sequência de macroinstruções em linha reta, do PC até o próximo
+JUMP/JNZE (ou até uma instrução sem atalho no modo ISA), é traduzida
+numa única função Python com as palavras, endereços e custos como
+constantes, e guardada pelo endereço inicial. O efeito arquitetural e
+a contagem de ciclos são os mesmos de executar as instruções uma a uma
+pelo modo ISA (isa.execute_instruction).
+
+Código automodificável: toda escrita na memória passa por
+Memory.mark_dirty (STOD, PUSH, microcódigo, /load, execução reversa),
+que avança Memory.version. Na entrada de um bloco, se a versão mudou
+desde a última entrada, os endereços escritos (changed_since) são
+conferidos contra os blocos que os cobrem; um bloco cuja palavra mudou
+é descartado e retraduzido. As palavras que mudaram passam a ser
+voláteis e ficam fora de blocos (executadas pelo modo ISA), para um
+laço que reescreve o próprio código não ser retraduzido a cada volta.
+Uma escrita do próprio bloco num trecho dele que ainda vai ser
+executado encerra o bloco logo após a escrita (estaticamente para
+STOD, com um teste para PUSH).
+
+Com breakpoints, contadores, trace binário ou execução reversa
+ligados, o motor volta a executar instrução por instrução; também
+quando o bloco poderia passar do limite de ciclos de MIC1.run.
+"""
+from array import array
+from .components import RegisterFile, to_int16
+from .isa import REG_PC, REG_AC, REG_SP, REG_IR, REG_A, MPC, execute_instruction, mnemonic_of, opcode_key
+
+MAR, MBR = RegisterFile.MAR, RegisterFile.MBR
+
+# Maior número de instruções por bloco
+MAX_BLOCK_LENGTH = 64
+
+# Corpo de cada instrução com atalho: {w} palavra, {addr} operando de 12 bits.
+# Cada um aplica o mesmo efeito do atalho correspondente em isa.py. A
+# truncagem para 16 bits vai inline (a expressão de to_int16), sem chamada.
+TEMPLATES = {
+    "LODD": [f"regs[{MAR}] = {{w}}", f"regs[{MBR}] = regs[{REG_AC}] = data[{{addr}}]"],
+    "STOD": [f"regs[{MAR}] = {{w}}", f"regs[{MBR}] = v = regs[{REG_AC}]",
+             "data[{addr}] = v", "mark_dirty({addr})"],
+    "ADDD": [f"regs[{MAR}] = {{w}}", f"regs[{MBR}] = v = data[{{addr}}]",
+             f"regs[{REG_AC}] = ((regs[{REG_AC}] + v + 0x8000) & 0xFFFF) - 0x8000"],
+    "SUBD": [f"regs[{MAR}] = {{w}}", "v = ~data[{addr}]", f"regs[{MBR}] = regs[{REG_A}] = v",
+             f"v = ((((regs[{REG_AC}] + 0x8001) & 0xFFFF) - 0x8000) + v + 0x8000) & 0xFFFF",
+             f"regs[{REG_AC}] = v - 0x8000"],
+    "JUMP": [f"regs[{REG_PC}] = {{addr}}"],
+    "LOCO": [f"regs[{REG_AC}] = {{addr}}"],
+    "LODL": [f"regs[{REG_A}] = regs[{MAR}] = a = ((regs[{REG_SP}] + {{w}} + 0x8000) & 0xFFFF) - 0x8000",
+             f"regs[{MBR}] = regs[{REG_AC}] = data[a & 0x0FFF]"],
+    "ADDL": [f"regs[{REG_A}] = regs[{MAR}] = a = ((regs[{REG_SP}] + {{w}} + 0x8000) & 0xFFFF) - 0x8000",
+             f"regs[{MBR}] = v = data[a & 0x0FFF]",
+             f"regs[{REG_AC}] = ((regs[{REG_AC}] + v + 0x8000) & 0xFFFF) - 0x8000"],
+    "JNZE": [f"if regs[{REG_AC}] != 0: regs[{REG_PC}] = {{addr}}"],
+    "PUSH": [f"regs[{REG_SP}] = regs[{MAR}] = a = ((regs[{REG_SP}] + 0x7FFF) & 0xFFFF) - 0x8000",
+             f"regs[{MBR}] = v = regs[{REG_AC}]", "a &= 0x0FFF", "data[a] = v", "mark_dirty(a)"],
+    "POP": [f"regs[{MAR}] = a = regs[{REG_SP}]",
+            f"regs[{REG_SP}] = ((a + 0x8001) & 0xFFFF) - 0x8000",
+            f"regs[{MBR}] = regs[{REG_AC}] = data[a & 0x0FFF]"],
+}
+
+# Instruções que não sobrescrevem MAR/MBR (ficam com os valores da busca)
+KEEPS_MAR = {"JUMP", "LOCO", "JNZE"}
+# Latch de endereço da memória após cada instrução (o último RD/WR, como
+# em isa.py); só o da última do bloco é gravado. STOD/PUSH já o definem
+# junto com o WR pendente.
+LATCH = {
+    "LODD": "{addr}", "ADDD": "{addr}", "SUBD": "{addr}",
+    "JUMP": "{pc}", "LOCO": "{pc}", "JNZE": "{pc}",
+    "LODL": "a & 0x0FFF", "ADDL": "a & 0x0FFF", "POP": "a & 0x0FFF",
+}
+# Fim de bloco: desvios
+ENDS_BLOCK = {"JUMP", "JNZE"}
+
+class Block:
+    __slots__ = ("start", "end", "words", "max_cycles", "run", "source")
+
+    def __init__(self, start: int, words: array, max_cycles: int, run, source: str):
+        self.start = start
+        self.end = start + len(words)
+        self.words = words
+        self.max_cycles = max_cycles     # custo com todos os desvios no pior caso
+        self.run = run
+        self.source = source
+
+def generate_block(start: int, words: list[int], costs: list[tuple[int, int]]) -> str:
+    """Código da função que executa as instruções words (a partir de start)"""
+    end = start + len(words)
+    lines = [f"def block_{start:04d}(cpu, regs, mem, data, mark_dirty):", "    cycles = 0"]
+    for offset, word in enumerate(words):
+        pc = start + offset
+        mnemonic = mnemonic_of(word)
+        lines.append(f"    # {pc}: {mnemonic} {word & 0x0FFF}")
+
+        # Custo decidido pelo AC antes da instrução (como em execute_instruction)
+        cost_zero, cost_nonzero = costs[offset]
+        if cost_zero == cost_nonzero:
+            lines.append(f"    cycles += {cost_zero}")
+        else:
+            lines.append(f"    cycles += {cost_nonzero} if regs[{REG_AC}] else {cost_zero}")
+
+        # Busca: PC + 1, IR (e MAR/MBR quando o atalho não os sobrescreve)
+        lines.append(f"    regs[{REG_PC}] = {to_int16(pc + 1)}; regs[{REG_IR}] = {word}")
+        if mnemonic in KEEPS_MAR:
+            lines.append(f"    regs[{MAR}] = {pc}; regs[{MBR}] = {word}")
+        for template in TEMPLATES[mnemonic]:
+            lines.append("    " + template.format(w=word, addr=word & 0x0FFF))
+
+        last = offset == len(words) - 1
+        if mnemonic == "STOD" or mnemonic == "PUSH":
+            target = "a" if mnemonic == "PUSH" else str(word & 0x0FFF)
+            # O segundo WR fica pendente; dentro do bloco a próxima busca o descartaria
+            pending = f"mem.address_latch = {target}; mem.write_enable = True"
+            if last:
+                lines.append(f"    {pending}")
+            elif mnemonic == "PUSH":
+                # Escrita no restante do próprio bloco: para aqui
+                lines.append(f"    if {pc} < a < {end}:")
+                lines.append(f"        {pending}")
+                lines.append("        cpu.cycle_count += cycles")
+                lines.append("        return")
+        elif last and mnemonic in LATCH:
+            lines.append("    mem.address_latch = " + LATCH[mnemonic].format(addr=word & 0x0FFF, pc=pc & 0x0FFF))
+    lines.append("    cpu.cycle_count += cycles")
+    return "\n".join(lines)
+
+class BlockCache:
+    def __init__(self, isa_table: tuple):
+        self.isa_table = isa_table
+        self.blocks = {}
+        self.covering = {}         # endereço -> inícios dos blocos que o contêm
+        self.volatile = set()      # endereços já reescritos depois de traduzidos
+        self.translations = 0
+        # Memory.version e Memory.dirty conferidos na última entrada (None: nada visto)
+        self.memory_version = None
+        self.memory_dirty = None
+
+    def clear(self):
+        self.blocks.clear()
+        self.covering.clear()
+        self.volatile.clear()
+        self.memory_version = None
+        self.memory_dirty = None
+
+    def sync(self, memory):
+        """Descarta os blocos cujo código foi escrito desde a última conferência"""
+        version = self.memory_version
+        dirty = memory.dirty
+        if version is not None and dirty is self.memory_dirty:
+            # Memory.changed_since inline: quase sempre são uma ou duas escritas de dados
+            covering = self.covering
+            for address in reversed(dirty):
+                if dirty[address] <= version:
+                    break
+                if address in covering:
+                    data = memory.data
+                    for start in list(covering[address]):
+                        block = self.blocks[start]
+                        if data[address] != block.words[address - start]:
+                            self.invalidate(block, data)
+        elif self.blocks:
+            # Memory.clear troca o registro de escritas: nada traduzido vale mais
+            self.clear()
+        self.memory_version = memory.version
+        self.memory_dirty = dirty
+
+    def invalidate(self, block: Block, data):
+        """Descarta um bloco cujo código mudou; as palavras alteradas viram voláteis"""
+        del self.blocks[block.start]
+        covering = self.covering
+        for address in range(block.start, block.end):
+            starts = covering[address]
+            starts.discard(block.start)
+            if not starts:
+                del covering[address]
+        current = data[block.start:block.end]
+        self.volatile.update(block.start + offset
+                             for offset, (old, new) in enumerate(zip(block.words, current)) if old != new)
+
+    def translate(self, data, start: int) -> Block | None:
+        """Traduz o bloco que começa em start (None se a primeira instrução não tem atalho)"""
+        words, costs = [], []
+        pc = start
+        while pc < len(data) and len(words) < MAX_BLOCK_LENGTH:
+            # Código que o programa reescreve vai pelo modo ISA, fora de blocos
+            if pc in self.volatile:
+                break
+            word = data[pc]
+            entry = self.isa_table[opcode_key(word)]
+            if entry is None:
+                break
+            # 'FIM: JUMP FIM' fica sozinho para o halt ser visto antes dele
+            if word == (0x6000 | pc) and words:
+                break
+            words.append(word)
+            costs.append(entry[1])
+            mnemonic = mnemonic_of(word)
+            if mnemonic in ENDS_BLOCK:
+                break
+            pc += 1
+        # STOD num trecho adiante do próprio bloco: o código muda, encerra logo após a escrita
+        for offset, word in enumerate(words):
+            if mnemonic_of(word) == "STOD" and start + offset < (word & 0x0FFF) < start + len(words):
+                del words[offset + 1:], costs[offset + 1:]
+                break
+        if not words:
+            return None
+
+        source = generate_block(start, words, costs)
+        namespace = {}
+        exec(compile(source, f"<mic1-block-{start}>", "exec"), namespace)
+        self.translations += 1
+        block = Block(start, array('h', words), sum(max(cost) for cost in costs),
+                      namespace[f"block_{start:04d}"], source)
+        self.blocks[start] = block
+        for address in range(start, block.end):
+            self.covering.setdefault(address, set()).add(start)
+        return block
+
+    def stats(self) -> dict:
+        return {"blocks": len(self.blocks), "translations": self.translations}
+
+def execute_block(cpu, cycle_limit: int | None = None):
+    """
+    Executa o bloco básico em PC (ou uma instrução, quando não há bloco
+    ou quando o bloco poderia passar de cycle_limit)
+    """
+    regs = cpu.register_file.data
+    if (regs[MPC] != 0 or cpu.recorder is not None or cpu.time_travel is not None
+            or cpu.counters is not None or cpu.breakpoints.active):
+        execute_instruction(cpu)
+        return
+
+    pc = regs[REG_PC]
+    if not 0 <= pc < cpu.main_memory.size:
+        execute_instruction(cpu)
+        return
+
+    mem = cpu.main_memory
+    # Subciclo 1 do ciclo 0: completa o WR pendente antes de conferir o código
+    mem.access(cpu.mbr)
+    data = mem.data
+    cache = cpu.block_cache
+    if mem.version != cache.memory_version:
+        cache.sync(mem)
+    block = cache.blocks.get(pc)
+    if block is None:
+        block = cache.translate(data, pc)
+        if block is None:
+            execute_instruction(cpu)
+            return
+    if cycle_limit is not None and cpu.cycle_count + block.max_cycles > cycle_limit:
+        execute_instruction(cpu)
+        return
+    block.run(cpu, regs, mem, data, mem.mark_dirty)
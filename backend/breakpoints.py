@@ -0,0 +1,203 @@
+"""
+Breakpoints e watchpoints.
+
+Os testes por ciclo são mínimos: com tudo vazio o laço só olha
+'active'. Breakpoints de PC e condições sobre registradores são
+avaliados apenas na fronteira de instrução (MPC == 0); watchpoints são
+disparados pela própria Memory.access quando há RD/WR de fato;
+breakpoints de microendereço usam um bitmap de 512 posições.
+"""
+import operator
+from .components import RegisterFile
+
+REGISTER_INDEX = {
+    "PC": 0, "AC": 1, "SP": 2, "IR": 3, "TIR": 4,
+    "A": 10, "B": 11, "C": 12, "D": 13, "E": 14, "F": 15,
+    "MAR": RegisterFile.MAR, "MBR": RegisterFile.MBR,
+}
+
+OPERATORS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt,
+    "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+def _int_list(spec: dict, key: str, limit: int) -> list[int]:
+    values = spec.get(key)
+    if not isinstance(values, list) or not all(type(value) is int and 0 <= value < limit for value in values):
+        raise ValueError(f"Breakpoints inválidos: '{key}'.")
+    return values
+
+def check_spec(spec, control_store_size: int = 512) -> dict:
+    """Confere um to_dict() vindo de fora (estado serializado); ValueError se malformado"""
+    if not isinstance(spec, dict):
+        raise ValueError("Breakpoints inválidos.")
+    conditions = spec.get("conditions")
+    if not isinstance(conditions, list):
+        raise ValueError("Breakpoints inválidos: 'conditions'.")
+    for condition in conditions:
+        if (not isinstance(condition, dict) or type(condition.get("id")) is not int
+                or condition.get("register") not in REGISTER_INDEX or condition.get("op") not in OPERATORS
+                or type(condition.get("value")) is not int):
+            raise ValueError("Breakpoints inválidos: condição malformada.")
+    return {
+        "pc": _int_list(spec, "pc", 0x1000),
+        "mpc": _int_list(spec, "mpc", control_store_size),
+        "watchRead": _int_list(spec, "watchRead", 0x1000),
+        "watchWrite": _int_list(spec, "watchWrite", 0x1000),
+        "conditions": conditions,
+    }
+
+class Breakpoints:
+    def __init__(self, memory, control_store_size: int = 512):
+        self.memory = memory
+        self.pc = set()
+        self.mpc_map = bytearray(control_store_size)
+        self.mpc = set()
+        self.watch_read = set()
+        self.watch_write = set()
+        self.conditions = {}      # id -> (registrador, operador, valor)
+        self._next_condition = 1
+        self.hit = None           # acesso de memória que disparou um watchpoint
+        self._refresh()
+
+    # --- Configuração ---
+
+    def clear(self):
+        self.pc.clear()
+        self.mpc.clear()
+        self.mpc_map[:] = bytes(len(self.mpc_map))
+        self.watch_read.clear()
+        self.watch_write.clear()
+        self.conditions.clear()
+        self.hit = None
+        self._refresh()
+
+    def set_pc(self, address: int):
+        """Substitui todos os breakpoints de PC por address (negativo remove)"""
+        self.pc.clear()
+        if address >= 0:
+            self.pc.add(address & 0x0FFF)
+        self._refresh()
+
+    def add_pc(self, address: int):
+        self.pc.add(address & 0x0FFF)
+        self._refresh()
+
+    def remove_pc(self, address: int):
+        self.pc.discard(address & 0x0FFF)
+        self._refresh()
+
+    def add_mpc(self, address: int):
+        if not 0 <= address < len(self.mpc_map):
+            raise ValueError(f"Microendereço fora da memória de controle: {address}")
+        self.mpc.add(address)
+        self.mpc_map[address] = 1
+        self._refresh()
+
+    def remove_mpc(self, address: int):
+        if address in self.mpc:
+            self.mpc.discard(address)
+            self.mpc_map[address] = 0
+        self._refresh()
+
+    def add_watch(self, address: int, read: bool = True, write: bool = True):
+        if read:
+            self.watch_read.add(address & 0x0FFF)
+        if write:
+            self.watch_write.add(address & 0x0FFF)
+        self._refresh()
+
+    def remove_watch(self, address: int):
+        self.watch_read.discard(address & 0x0FFF)
+        self.watch_write.discard(address & 0x0FFF)
+        self._refresh()
+
+    def add_condition(self, register: str, op: str, value: int) -> int:
+        """Para quando 'registrador op valor' for verdadeiro numa fronteira de instrução"""
+        register = register.upper()
+        if register not in REGISTER_INDEX:
+            raise ValueError(f"Registrador desconhecido: {register}")
+        if op not in OPERATORS:
+            raise ValueError(f"Operador desconhecido: {op}")
+        condition_id = self._next_condition
+        self._next_condition += 1
+        self.conditions[condition_id] = (register, op, value)
+        self._refresh()
+        return condition_id
+
+    def remove_condition(self, condition_id: int) -> bool:
+        found = self.conditions.pop(condition_id, None) is not None
+        self._refresh()
+        return found
+
+    def load(self, spec: dict):
+        """
+        Substitui tudo pelo conteúdo de um to_dict() (mantém os ids das
+        condições); se spec estiver malformado, nada muda (ValueError)
+        """
+        spec = check_spec(spec, len(self.mpc_map))
+        self.clear()
+        self.pc.update(spec["pc"])
+        for address in spec["mpc"]:
+            self.mpc.add(address)
+            self.mpc_map[address] = 1
+        self.watch_read.update(spec["watchRead"])
+        self.watch_write.update(spec["watchWrite"])
+        for condition in spec["conditions"]:
+            self.conditions[condition["id"]] = (condition["register"], condition["op"], condition["value"])
+        self._next_condition = max(self.conditions, default=0) + 1
+        self._refresh()
+
+    def attach(self):
+        """Volta a receber os acessos da memória (após uso de outro objeto)"""
+        self._refresh()
+
+    def _refresh(self):
+        self.mpc_active = bool(self.mpc)
+        self.watch_active = bool(self.watch_read or self.watch_write)
+        self._compiled_conditions = [
+            (register, REGISTER_INDEX[register], OPERATORS[op], value)
+            for register, op, value in self.conditions.values()
+        ]
+        self.active = bool(self.pc or self.mpc_active or self.watch_active or self.conditions)
+        self.memory.watch = self if self.watch_active else None
+
+    @property
+    def needs_microcycles(self) -> bool:
+        """Watchpoints e breakpoints de MPC precisam ver cada microciclo"""
+        return self.mpc_active or self.watch_active
+
+    # --- Verificação ---
+
+    def memory_access(self, address: int, write: bool):
+        """Chamado por Memory.access em cada RD/WR efetivo"""
+        if address in (self.watch_write if write else self.watch_read):
+            self.hit = {"type": "write" if write else "read", "address": address}
+
+    def check(self, regs, next_mpc: int) -> dict | None:
+        """Motivo da parada após o ciclo (ou None)"""
+        if self.hit is not None:
+            reason, self.hit = self.hit, None
+            return reason
+        if self.mpc_active and self.mpc_map[next_mpc]:
+            return {"type": "mpc", "address": next_mpc}
+        if next_mpc == 0:
+            pc = regs[0]
+            if pc in self.pc and pc != 0:
+                return {"type": "pc", "address": pc}
+            for register, index, compare, value in self._compiled_conditions:
+                if compare(regs[index], value):
+                    return {"type": "condition", "register": register, "value": regs[index]}
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "pc": sorted(self.pc),
+            "mpc": sorted(self.mpc),
+            "watchRead": sorted(self.watch_read),
+            "watchWrite": sorted(self.watch_write),
+            "conditions": [
+                {"id": condition_id, "register": register, "op": op, "value": value}
+                for condition_id, (register, op, value) in self.conditions.items()
+            ],
+        }
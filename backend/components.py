@@ -1,15 +1,40 @@
-import ctypes
+import sys
+from array import array
+
+def to_int16(value: int) -> int:
+    """Trunca um inteiro para 16 bits com sinal (mesmo resultado de ctypes.c_int16)"""
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+class RegisterFile:
+    """
+    Banco de registradores compacto: um único array('h') com os 16
+    registradores de uso geral seguidos de MAR, MBR e MPC.
+    """
+    MAR = 16
+    MBR = 17
+    MPC = 18
+
+    def __init__(self, size: int = 19):
+        self.size = size
+        self.data = array('h', bytes(2 * size))
+        self._zeros = array('h', bytes(2 * size))
+
+    def clear(self):
+        self.data[:] = self._zeros
 
 class Register:
-    def __init__(self, name: str, initial_value: int = 0):
+    def __init__(self, name: str, initial_value: int = 0, storage: array | None = None, index: int = 0):
         self.name = name
-        self.value = ctypes.c_int16(initial_value)
+        # Sem storage externo o registrador ocupa sua própria célula
+        self.storage = storage if storage is not None else array('h', [0])
+        self.index = index
+        self.write(initial_value)
 
     def write(self, data: int):
-        self.value.value = data
+        self.storage[self.index] = to_int16(data)
 
     def read(self) -> int:
-        return self.value.value
+        return self.storage[self.index]
 
 class Amux:
     def decide_output(self, control_signal: int, latch_a: int, mbr: int) -> int:
@@ -40,13 +65,13 @@ class ALU:
             result = ~val_a
         
         # Converte para 16 bits signed
-        res_c = ctypes.c_int16(result)
+        res = to_int16(result)
         
         # Flags baseadas no resultado truncado
-        z_flag = (res_c.value == 0)
-        n_flag = (res_c.value < 0)
+        z_flag = (res == 0)
+        n_flag = (res < 0)
         
-        return res_c.value, n_flag, z_flag
+        return res, n_flag, z_flag
 
 class Shifter:
     NO_SHIFT = 0b00
@@ -54,8 +79,8 @@ class Shifter:
     LEFT_SHIFT = 0b10
 
     def execute(self, op: int, data: int) -> int:
-        # Trata como unsigned 16 bits para shifts lógicos se necessário, 
-        val = ctypes.c_int16(data).value
+        # Trata como signed 16 bits (shift à direita aritmético)
+        val = to_int16(data)
         
         result = val
         if op == self.RIGHT_SHIFT:
@@ -63,24 +88,50 @@ class Shifter:
         elif op == self.LEFT_SHIFT:
             result = val << 1
             
-        return ctypes.c_int16(result).value
+        return to_int16(result)
 
 class Memory:
     def __init__(self, size=4096):
         self.size = size
-        self.data = [ctypes.c_int16(0) for _ in range(size)]
+        # Buffer único de palavras de 16 bits; zerado em bloco no clear()
+        self.data = array('h', bytes(2 * size))
+        self.view = memoryview(self.data)
+        self._zeros = bytes(2 * size)
+
+        # Endereços escritos -> versão da escrita (ordenado pela versão)
+        self.version = 0
+        self.dirty = {}
         
         # Simulação de latches de memória
         self.read_enable = False
         self.write_enable = False
         self.address_latch = 0
 
+        # Breakpoints com watchpoints ativos (avisado a cada RD/WR efetivo)
+        self.watch = None
+
     def clear(self):
-        for i in range(self.size):
-            self.data[i].value = 0
+        self.view.cast('B')[:] = self._zeros
+        self.version += 1
+        self.dirty = {}
         self.read_enable = False
         self.write_enable = False
 
+    def mark_dirty(self, address: int):
+        """Registra a escrita em address (move o endereço para o fim do dict)"""
+        self.version += 1
+        self.dirty.pop(address, None)
+        self.dirty[address] = self.version
+
+    def changed_since(self, version: int) -> list[int]:
+        """Endereços escritos depois de version, do mais recente para o mais antigo"""
+        changed = []
+        for address in reversed(self.dirty):
+            if self.dirty[address] <= version:
+                break
+            changed.append(address)
+        return changed
+
     def enable_read(self, address: int):
         self.address_latch = address & 0x0FFF
         self.read_enable = True
@@ -95,34 +146,65 @@ class Memory:
         Retorna True se houve acesso.
         """
         if self.read_enable:
-            val = self.data[self.address_latch].value
+            val = self.data[self.address_latch]
             mbr_register.write(val)
             self.read_enable = False
+            if self.watch is not None:
+                self.watch.memory_access(self.address_latch, False)
             return True
         
         if self.write_enable:
             val = mbr_register.read()
-            self.data[self.address_latch].value = val
+            self.data[self.address_latch] = val
+            self.mark_dirty(self.address_latch)
             self.write_enable = False
+            if self.watch is not None:
+                self.watch.memory_access(self.address_latch, True)
             return True
             
         return False
 
+    def load_image(self, image, byteorder: str = "little") -> int:
+        """
+        Copia uma imagem de palavras de 16 bits (bytes) para o início da
+        memória numa única operação de buffer; devolve quantas palavras.
+        """
+        if byteorder not in ("little", "big"):
+            raise ValueError(f"Ordem de bytes desconhecida: {byteorder}")
+        words, odd = divmod(len(image), 2)
+        if odd or words > self.size:
+            raise ValueError(f"A imagem deve ter um número par de bytes e no máximo {self.size} palavras.")
+        if byteorder == sys.byteorder:
+            self.view.cast('B')[:len(image)] = image
+        else:
+            swapped = array('h')
+            swapped.frombytes(image)
+            swapped.byteswap()
+            self.data[:words] = swapped
+        # Todo o bloco fica registrado como uma única escrita
+        self.version += 1
+        if self.dirty:
+            for address in range(words):
+                self.dirty.pop(address, None)
+        self.dirty.update(dict.fromkeys(range(words), self.version))
+        return words
+
     # Métodos diretos para carga inicial (Load Program)
     def direct_write(self, address: int, value: int):
         masked_addr = address & 0x0FFF
         if 0 <= masked_addr < self.size:
-            self.data[masked_addr].value = value
+            self.data[masked_addr] = to_int16(value)
+            self.mark_dirty(masked_addr)
+
+    def get_cell(self, addr: int) -> dict:
+        val = self.data[addr]
+        return {
+            "address": addr,
+            "hex": f"{val & 0xFFFF:04X}",
+            "decimal": val,
+            "binary": f"{val & 0xFFFF:016b}"
+        }
 
     def get_memory_view(self, start_addr: int, count: int) -> list[dict]:
-        view = []
         end_addr = min(start_addr + count, self.size)
-        for addr in range(start_addr, end_addr):
-            val = self.data[addr].value
-            view.append({
-                "address": addr,
-                "hex": f"{val & 0xFFFF:04X}",
-                "decimal": val,
-                "binary": f"{val & 0xFFFF:016b}"
-            })
-        return view
\ No newline at end of file
+        return [self.get_cell(addr) for addr in range(start_addr, end_addr)]
@@ -0,0 +1,127 @@
+"""
+Contadores de desempenho da microarquitetura.
+
+Por ciclo só se incrementa o histograma de MPCs (e, quando o
+microendereço seguinte não é MPC + 1, o contador de desvios daquele
+MPC); por instrução, os contadores do opcode buscado. Leituras e
+escritas na memória e desvios tomados/não tomados são derivados do
+histograma e da tabela de decodificação na hora do resumo.
+"""
+from array import array
+from .isa import mnemonic_of
+
+def _zeros(size: int) -> array:
+    return array('Q', bytes(8 * size))
+
+class PerfCounters:
+    def __init__(self, control_store_size: int = 512):
+        self.size = control_store_size
+        self.clear()
+
+    def clear(self):
+        self.mpc_hits = _zeros(self.size)       # execuções de cada microendereço
+        self.mpc_jumps = _zeros(self.size)      # vezes em que o próximo MPC != MPC + 1
+        self.opcode_counts = _zeros(256)        # instruções por byte alto da palavra
+        self.opcode_cycles = _zeros(256)        # microciclos gastos por byte alto
+        self.current_key = None
+        self.fetch_cycle = 0
+        self.host_seconds = 0.0
+        self.host_cycles = 0
+
+    def instruction(self, key: int, cycle: int):
+        """Nova busca (MPC 0) no ciclo 'cycle': fecha a conta da instrução anterior"""
+        if self.current_key is not None:
+            self.opcode_cycles[self.current_key] += cycle - self.fetch_cycle
+        self.current_key = key
+        self.fetch_cycle = cycle
+        self.opcode_counts[key] += 1
+
+    def add_path(self, mpcs: tuple, jumps: tuple):
+        """Caminho inteiro de uma instrução executada pelo modo ISA"""
+        hits = self.mpc_hits
+        for mpc in mpcs:
+            hits[mpc] += 1
+        taken = self.mpc_jumps
+        for mpc in jumps:
+            taken[mpc] += 1
+
+    def snapshot(self) -> tuple:
+        """Cópia dos contadores por ciclo para a execução reversa (o tempo de host não volta)"""
+        return (array('Q', self.mpc_hits), array('Q', self.mpc_jumps), array('Q', self.opcode_counts),
+                array('Q', self.opcode_cycles), self.current_key, self.fetch_cycle)
+
+    def restore(self, snapshot: tuple):
+        mpc_hits, mpc_jumps, opcode_counts, opcode_cycles, self.current_key, self.fetch_cycle = snapshot
+        self.mpc_hits[:] = mpc_hits
+        self.mpc_jumps[:] = mpc_jumps
+        self.opcode_counts[:] = opcode_counts
+        self.opcode_cycles[:] = opcode_cycles
+
+    def unexecute(self, mpc: int, next_mpc: int, current_key, fetch_cycle: int, cycle: int):
+        """
+        Desfaz o ciclo 'cycle' (MPC mpc, seguido de next_mpc); current_key e
+        fetch_cycle são os valores de antes dele
+        """
+        self.mpc_hits[mpc] -= 1
+        if next_mpc != mpc + 1:
+            self.mpc_jumps[mpc] -= 1
+        if mpc == 0:
+            self.opcode_counts[self.current_key] -= 1
+            if current_key is not None:
+                self.opcode_cycles[current_key] -= cycle - fetch_cycle
+            self.current_key = current_key
+            self.fetch_cycle = fetch_cycle
+
+    def add_host_time(self, cycles: int, seconds: float):
+        self.host_cycles += cycles
+        self.host_seconds += seconds
+
+    def summary(self, decoded_store, cycle_count: int, histogram: bool = True) -> dict:
+        hits, jumps = self.mpc_hits, self.mpc_jumps
+        reads = writes = taken = not_taken = unconditional = 0
+        for mpc, count in enumerate(hits):
+            if not count:
+                continue
+            _, cond, _, _, _, _, rd, wr, *_ = decoded_store[mpc]
+            if rd: reads += count
+            if wr: writes += count
+            if cond == 3:
+                unconditional += count
+            elif cond:
+                taken += jumps[mpc]
+                not_taken += count - jumps[mpc]
+
+        # Instrução em andamento entra com os ciclos feitos até agora
+        opcode_cycles = array('Q', self.opcode_cycles)
+        if self.current_key is not None:
+            opcode_cycles[self.current_key] += cycle_count - self.fetch_cycle
+
+        opcodes = {}
+        for key, count in enumerate(self.opcode_counts):
+            if count:
+                name = mnemonic_of(key << 8) or f"?{key:02X}"
+                entry = opcodes.setdefault(name, {"count": 0, "cycles": 0})
+                entry["count"] += count
+                entry["cycles"] += opcode_cycles[key]
+        for entry in opcodes.values():
+            entry["cpi"] = round(entry["cycles"] / entry["count"], 3)
+
+        cycles = sum(hits)
+        instructions = sum(self.opcode_counts)
+        result = {
+            "cycles": cycles,
+            "instructions": instructions,
+            "cpi": round(cycles / instructions, 3) if instructions else None,
+            "memoryReads": reads,
+            "memoryWrites": writes,
+            "branches": {"taken": taken, "notTaken": not_taken, "unconditional": unconditional},
+            "opcodes": opcodes,
+            "hostSeconds": round(self.host_seconds, 6),
+            "cyclesPerSecond": int(self.host_cycles / self.host_seconds) if self.host_seconds else None,
+        }
+        if histogram:
+            result["mpcHistogram"] = [
+                {"mpc": mpc, "count": count, "jumps": jumps[mpc]}
+                for mpc, count in enumerate(hits) if count
+            ]
+        return result
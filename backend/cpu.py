@@ -1,7 +1,22 @@
+import json
 import time
-import ctypes
-from .components import Register, ALU, Shifter, Memory, Amux
-from .microcode import CONTROL_STORE
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from .components import Register, RegisterFile, ALU, Shifter, Memory, Amux
+from .assembler import ProgramImage
+from .microcode import CONTROL_STORE, build_decode_table
+from .jit import compile_control_store
+from .mal import disassemble, control_store_from_env
+from .isa import build_path_table, build_cost_table, build_dispatch_table, execute_instruction, opcode_key
+from .blocks import BlockCache, execute_block
+from .timetravel import TimeTravel
+from .breakpoints import Breakpoints, check_spec
+from .counters import PerfCounters
+from .trace import (MicroTrace, TraceRecorder, NO_REGISTER, TRACE_MEM_READ, TRACE_MEM_WRITE,
+                    TRACE_MBR_LOAD, TRACE_N, TRACE_Z)
 
 # --- MAPA DE TRADUÇÃO (Micro-Assembly) ---
 MICRO_MNEMONICS = {
@@ -93,16 +108,59 @@ MICRO_MNEMONICS = {
     72: "sp:=a; goto 0;"
 }
 
+# Motores de execução: caminho de dados interpretado, micro-JIT,
+# modo ISA (uma macroinstrução inteira por step) ou blocos básicos
+# traduzidos (um bloco de macroinstruções por step)
+ENGINES = ("interp", "jit", "isa", "block")
+
+# Cabeçalho do estado serializado: magic, versão, MIR, flags, latch de
+# endereço, cycle_count, tamanho da seção de breakpoints (seguido de
+# registradores, breakpoints em JSON e memória, nessa ordem)
+STATE_HEADER = struct.Struct("<4sBIBHQI")
+STATE_MAGIC = b"MIC1"
+STATE_VERSION = 2
+
+def state_head_size(state: bytes, registers: int) -> int:
+    """Bytes antes da memória num estado de export_state()"""
+    return STATE_HEADER.size + 2 * registers + STATE_HEADER.unpack_from(state)[-1]
+
+def _le_bytes(data: array) -> bytes:
+    """Conteúdo de um array('h') em little-endian"""
+    if sys.byteorder == "big":
+        data = array('h', data)
+        data.byteswap()
+    return data.tobytes()
+
+# Janelas de memória exibidas pelo frontend (início, quantidade)
+MEMORY_VIEW_WINDOWS = ((0, 128), (4064, 32))
+
+# Quantos snapshots de estado guardar para respostas incrementais
+DELTA_SNAPSHOTS = 64
+
 class MIC1:
-    def __init__(self):
-        self.control_store = CONTROL_STORE
+    def __init__(self, engine: str = "interp", trace_depth: int = 50):
+        self.trace = MicroTrace(trace_depth)
+        self.recorder = None
+        self.time_travel = None
+        self.counters = None
+        self.compiled_store = None
+        self.isa_table = None
+        self.block_cache = None
+        # Serializa quem executa ou altera a máquina a partir de outras threads (API)
+        self.lock = threading.Lock()
+        # MIC1_CONTROL_STORE troca o microprograma padrão (ver mal.py)
+        self.load_control_store(*(control_store_from_env() or (CONTROL_STORE,)))
+        self.set_engine(engine)
         self.main_memory = Memory()
+        self.breakpoints = Breakpoints(self.main_memory, len(self.control_store))
         self.alu = ALU()
         self.shifter = Shifter()
         self.amux = Amux()
 
-        # Registradores
-        self.registers = [Register(f"R{i}") for i in range(16)]
+        # Registradores (todos compartilham o mesmo buffer array('h'))
+        self.register_file = RegisterFile()
+        regs = self.register_file.data
+        self.registers = [Register(f"R{i}", storage=regs, index=i) for i in range(16)]
         
         # Aliases
         self.pc = self.registers[0]; self.pc.name = "PC"
@@ -118,107 +176,286 @@ class MIC1:
         for i, name in enumerate("ABCDEF", 10):
             self.registers[i].name = name
 
-        self.mar = Register("MAR")
-        self.mbr = Register("MBR")
-        self.mpc = Register("MPC")
+        self.mar = Register("MAR", storage=regs, index=RegisterFile.MAR)
+        self.mbr = Register("MBR", storage=regs, index=RegisterFile.MBR)
+        self.mpc = Register("MPC", storage=regs, index=RegisterFile.MPC)
         self.mir = 0
 
         self.latch_a = 0
         self.latch_b = 0
+
+        # Imagem da memória logo após o último load_program (base dos snapshots)
+        self.program_image = bytes(2 * self.main_memory.size)
+        # Símbolos e mapa de linhas do programa carregado (quando veio do montador)
+        self.program = None
         
         self.reset()
 
     def reset(self):
-        for i in [0, 1, 3, 4] + list(range(10, 16)):
-            self.registers[i].write(0)
+        # Zera em bloco todos os registradores (incluindo MAR, MBR e MPC)
+        self.register_file.clear()
+        self.program = None
         
         self.sp.write(4096)
-        self.zero.write(0)
         self.plus1.write(1)
         self.minus1.write(-1)
         self.amask.write(0x0FFF)
         self.smask.write(0x00FF)
-
-        self.mar.write(0)
-        self.mbr.write(0)
-        self.mpc.write(0)
         self.mir = 0
         
         self.main_memory.clear()
         
         self.is_running = False
         self.stop_flag = False
+        self.halted = False
         self.cycle_count = 0
         self.execution_start_time = 0
-        self.micro_history = []
-        self.breakpoint_pc = -1
+        self.trace.clear()
+        if self.time_travel is not None:
+            self.time_travel.clear()
+        if self.counters is not None:
+            self.counters.clear()
+        if self.block_cache is not None:
+            self.block_cache.clear()
+        self.breakpoints.clear()
+        self.break_reason = None
         
         self.n_flag = False
         self.z_flag = False
 
-    def _get_field(self, shift, mask):
-        return (self.mir >> shift) & mask
+        # Snapshots para get_delta (seq -> estado resumido); reset invalida todos
+        self.state_seq = getattr(self, "state_seq", 0)
+        self.delta_snapshots = OrderedDict()
+
+    def load_control_store(self, control_store, decoded_store=None):
+        """Troca a memória de controle e refaz a tabela de decodificação (ou usa a já pronta)"""
+        self.control_store = control_store
+        self.decoded_store = decoded_store or build_decode_table(control_store)
+        self.compiled_store = None
+        self.isa_table = None
+        self.block_cache = None
+        if getattr(self, "engine", None) == "jit":
+            self.compiled_store = compile_control_store(control_store)
+        elif getattr(self, "engine", None) in ("isa", "block"):
+            self.isa_table = self._build_isa_table()
+            if self.engine == "block":
+                self.block_cache = BlockCache(self.isa_table)
 
-    def step(self):
+    def set_engine(self, engine: str):
+        """Seleciona o motor: 'interp' (interpretado), 'jit' (compilado), 'isa' (por instrução) ou 'block' (por bloco)"""
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconhecido: {engine}")
+        self.engine = engine
+        if engine == "jit":
+            if self.compiled_store is None:
+                self.compiled_store = compile_control_store(self.control_store)
+            self._execute = self._execute_compiled
+        else:
+            if engine in ("isa", "block") and self.isa_table is None:
+                self.isa_table = self._build_isa_table()
+            if engine == "block" and self.block_cache is None:
+                self.block_cache = BlockCache(self.isa_table)
+            self._execute = self._execute_interpreted
+
+    def _build_isa_table(self) -> tuple:
+        paths = build_path_table(self.control_store)
+        return build_dispatch_table(build_cost_table(self.control_store, paths), paths)
+
+    def step(self, cycle_limit: int | None = None):
+        """Um microciclo, instrução ou bloco (conforme o motor); o bloco não passa de cycle_limit"""
         if not self.is_running or self.stop_flag:
             return
 
+        if self.engine == "isa":
+            execute_instruction(self)
+        elif self.engine == "block":
+            execute_block(self, cycle_limit)
+        else:
+            self.step_micro()
+
+    def run(self, max_cycles: int, time_limit: float | None = None) -> int:
+        """
+        Executa em laço apertado até max_cycles microciclos, o tempo limite
+        (segundos), um halt, breakpoint ou pausa. Retorna os ciclos executados.
+        """
+        start_cycles = self.cycle_count
+        target = start_cycles + max_cycles
+        started = time.perf_counter()
+        deadline = started + time_limit if time_limit else None
+        regs = self.register_file.data
+        step = self.step
+        iterations = 0
+        while self.is_running and not self.stop_flag and self.cycle_count < target:
+            step(target)
+            if regs[RegisterFile.MPC] == 0 and self.is_halted():
+                self.is_running = False
+                self.halted = True
+                break
+            iterations += 1
+            if deadline is not None and (iterations & 0x3FF) == 0 and time.perf_counter() > deadline:
+                break
+        if self.counters is not None:
+            self.counters.add_host_time(self.cycle_count - start_cycles, time.perf_counter() - started)
+        return self.cycle_count - start_cycles
+
+    def is_halted(self) -> bool:
+        """Programa parado no laço 'FIM: JUMP FIM' (instrução em PC salta para si mesma)"""
+        pc = self.register_file.data[0] & 0x0FFF
+        return self.main_memory.data[pc] == (0x6000 | pc)
+
+    def step_micro(self):
+        """Executa um único microciclo"""
+        regs = self.register_file.data
+        if self.time_travel is not None:
+            self.time_travel.record(self)
+
         # 1. Busca MIR
-        current_mpc = self.mpc.read()
+        current_mpc = regs[RegisterFile.MPC]
         self.mir = self.control_store[current_mpc]
         
-        # 2. Histórico formatado (Usa o dicionário ou o decodificador genérico)
-        decoded_str = MICRO_MNEMONICS.get(current_mpc, self.decode_generic_microinstruction())
-        
-        # Formata com o número da linha: "0: mar:=pc; rd;"
-        self.micro_history.insert(0, f"{current_mpc}: {decoded_str}")
-        if len(self.micro_history) > 50: self.micro_history.pop()
+        # 2. Histórico (só MPC e MIR; o texto é montado sob demanda)
+        trace = self.trace
+        if trace.enabled:
+            trace.record(current_mpc, self.mir)
+
+        recorder = self.recorder
+        if recorder is not None:
+            mem = self.main_memory
+            mem_flags = TRACE_MEM_READ if mem.read_enable else TRACE_MEM_WRITE if mem.write_enable else 0
+            mem_address = mem.address_latch
 
         # --- Subciclo 1: Memoria ---
         self.main_memory.access(self.mbr)
+        if recorder is not None:
+            mbr_in = regs[RegisterFile.MBR]
+
+        # --- Subciclos 2 a 4: caminho de dados (motor selecionado) ---
+        next_mpc_val = self._execute(regs, current_mpc)
+        if recorder is not None:
+            self._record_cycle(recorder, current_mpc, mbr_in, mem_flags, mem_address)
+
+        counters = self.counters
+        if counters is not None:
+            counters.mpc_hits[current_mpc] += 1
+            if next_mpc_val != current_mpc + 1:
+                counters.mpc_jumps[current_mpc] += 1
+            if current_mpc == 0:
+                # PC ainda não foi incrementado no microendereço 0
+                counters.instruction(opcode_key(self.main_memory.data[regs[0] & 0x0FFF]), self.cycle_count)
+            
+        regs[RegisterFile.MPC] = next_mpc_val
+        self.cycle_count += 1
+
+        # Breakpoints/watchpoints (só com algum definido)
+        breakpoints = self.breakpoints
+        if breakpoints.active:
+            reason = breakpoints.check(regs, next_mpc_val)
+            if reason is not None:
+                self.break_reason = reason
+                self.is_running = False
+                self.stop_flag = True
+
+    @property
+    def breakpoint_pc(self) -> int:
+        """Compatibilidade: menor breakpoint de PC definido (ou -1)"""
+        return min(self.breakpoints.pc) if self.breakpoints.pc else -1
+
+    @breakpoint_pc.setter
+    def breakpoint_pc(self, address: int):
+        """Compatibilidade: substitui os breakpoints de PC por um único (-1 remove)"""
+        self.breakpoints.set_pc(address)
+
+    def _record_cycle(self, recorder, mpc: int, mbr_in: int, mem_flags: int, mem_address: int):
+        """Grava o microciclo recém-executado no trace binário"""
+        (amux_sig, _, alu_sig, sh_sig, mbr_load, _, _, _, enc, c_addr, _, _, _) = self.decoded_store[mpc]
+        amux_out = mbr_in if amux_sig else self.latch_a
+        alu_out = self.alu.execute(alu_sig, amux_out, self.latch_b)[0]
+        c_bus = self.shifter.execute(sh_sig, alu_out)
+
+        flags = mem_flags
+        if mbr_load: flags |= TRACE_MBR_LOAD
+        if self.n_flag: flags |= TRACE_N
+        if self.z_flag: flags |= TRACE_Z
+        # Em RD o valor é o que chegou no MBR; em WR, o que foi gravado (também o MBR)
+        mem_value = mbr_in if mem_flags else 0
+        recorder.record(self.cycle_count, mpc, self.mir, c_bus,
+                        c_addr if enc else NO_REGISTER, mem_address if mem_flags else 0, mem_value, flags)
+
+    def enable_time_travel(self, window: int = 10_000, checkpoint_interval: int = 10_000, max_checkpoints: int = 100):
+        """Liga a execução reversa (modo ISA passa a executar pelo microcódigo)"""
+        self.time_travel = TimeTravel(window, checkpoint_interval, max_checkpoints)
+
+    def disable_time_travel(self):
+        self.time_travel = None
+
+    def enable_counters(self):
+        """Liga os contadores de desempenho (zerados)"""
+        self.counters = PerfCounters(len(self.control_store))
+        if self.time_travel is not None:
+            # Voltar para antes daqui zera os contadores; para depois, parte deste ponto
+            self.time_travel.checkpoint(self)
+
+    def disable_counters(self):
+        self.counters = None
+
+    def get_counters(self, histogram: bool = True) -> dict | None:
+        if self.counters is None:
+            return None
+        return self.counters.summary(self.decoded_store, self.cycle_count, histogram)
+
+    def step_back(self, count: int = 1) -> int:
+        """Volta count microciclos; retorna quantos ciclos realmente voltou"""
+        if self.time_travel is None:
+            return 0
+        stepped = self.time_travel.step_back(self, count)
+        # As respostas incrementais anteriores deixam de valer
+        self.delta_snapshots.clear()
+        return stepped
+
+    def start_recording(self, path: str):
+        """Passa a gravar todo microciclo em path (modo ISA cai para o microcódigo)"""
+        self.stop_recording()
+        self.recorder = TraceRecorder(path)
+
+    def stop_recording(self) -> int:
+        """Fecha o arquivo de trace; retorna quantos registros foram gravados"""
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return 0
+        recorder.close()
+        return recorder.count
 
+    def _execute_interpreted(self, regs, current_mpc: int) -> int:
+        """Subciclos 2 a 4 pela decodificação genérica dos campos do MIR"""
         # --- Subciclo 2: Decodificação e Latches ---
-        addr_a = self._get_field(8, 0xF)
-        addr_b = self._get_field(12, 0xF)
-        self.latch_a = self.registers[addr_a].read()
-        self.latch_b = self.registers[addr_b].read()
+        (amux_sig, cond, alu_sig, sh_sig, mbr_load, mar_load,
+         rd_sig, wr_sig, enc, c_addr, addr_b, addr_a, jump_addr) = self.decoded_store[current_mpc]
+        self.latch_a = regs[addr_a]
+        self.latch_b = regs[addr_b]
 
         # --- Subciclo 3: ALU e Shifter ---
-        amux_sig = self._get_field(31, 0x1)
-        alu_sig = self._get_field(27, 0x3)
-        sh_sig = self._get_field(25, 0x3)
-        mar_load = self._get_field(23, 0x1)
-
-        amux_out = self.amux.decide_output(amux_sig, self.latch_a, self.mbr.read())
+        amux_out = self.amux.decide_output(amux_sig, self.latch_a, regs[RegisterFile.MBR])
         
         if mar_load == 1:
-            self.mar.write(self.latch_b)
+            regs[RegisterFile.MAR] = self.latch_b
 
         alu_out, self.n_flag, self.z_flag = self.alu.execute(alu_sig, amux_out, self.latch_b)
         c_bus = self.shifter.execute(sh_sig, alu_out)
 
         # --- Subciclo 4: Writeback e Prox Endereço ---
-        enc = self._get_field(20, 0x1)
-        c_addr = self._get_field(16, 0xF)
-        wr_sig = self._get_field(21, 0x1)
-        rd_sig = self._get_field(22, 0x1)
-        mbr_load = self._get_field(24, 0x1)
-
+        # c_bus já sai do shifter truncado em 16 bits
         if enc == 1:
-            self.registers[c_addr].write(c_bus)
+            regs[c_addr] = c_bus
         
         if mbr_load == 1:
-            self.mbr.write(c_bus)
+            regs[RegisterFile.MBR] = c_bus
 
         if rd_sig == 1:
-            self.main_memory.enable_read(self.mar.read())
+            self.main_memory.enable_read(regs[RegisterFile.MAR])
         if wr_sig == 1:
-            self.main_memory.enable_write(self.mar.read())
+            self.main_memory.enable_write(regs[RegisterFile.MAR])
 
-        cond = self._get_field(29, 0x3)
-        jump_addr = self._get_field(0, 0xFF)
-        
-        next_mpc_val = self.mpc.read() + 1
+        next_mpc_val = current_mpc + 1
         
         take_jump = False
         if cond == 1 and self.n_flag: take_jump = True    # N
@@ -227,55 +464,201 @@ class MIC1:
 
         if take_jump:
             next_mpc_val = jump_addr
-            
-        self.mpc.write(next_mpc_val)
-        self.cycle_count += 1
 
-        # Breakpoint Check
-        if self.pc.read() == self.breakpoint_pc and self.pc.read() != 0 and self.mpc.read() == 0:
-            self.is_running = False
-            self.stop_flag = True
-
-    def decode_generic_microinstruction(self) -> str:
-        """Fallback para quando não houver mnemônico definido"""
-        bus_a = self.registers[self._get_field(8, 0xF)].name
-        bus_b = self.registers[self._get_field(12, 0xF)].name
-        bus_c = self.registers[self._get_field(16, 0xF)].name
-        alu_op_code = self._get_field(27, 0x3)
-        amux = self._get_field(31, 0x1)
-        enc = self._get_field(20, 0x1)
-        mem = ""
-        if self._get_field(22, 0x1): mem = "RD"
-        elif self._get_field(21, 0x1): mem = "WR"
-        
-        alu_map = {0: "ADD", 1: "AND", 2: "PASS_A", 3: "INV_A"}
-        op = alu_map[alu_op_code]
-        
-        input_a = "MBR" if amux else bus_a
-        action = f"{op}({input_a}, {bus_b})"
-        if enc: action += f" -> {bus_c}"
-        if mem: action += f" [{mem}]"
-            
-        return action
+        return next_mpc_val
 
-    def get_state(self) -> dict:
+    def _execute_compiled(self, regs, current_mpc: int) -> int:
+        """Subciclos 2 a 4 pela função especializada do micro-JIT"""
+        return self.compiled_store[current_mpc](self, regs, self.main_memory)
+
+    @property
+    def micro_history(self) -> list[str]:
+        """Histórico formatado, do mais recente para o mais antigo: "0: mar:=pc; rd;" """
+        return self.format_trace(self.trace.entries())
+
+    def format_trace(self, entries: list[tuple[int, int]]) -> list[str]:
+        return [f"{mpc}: {self.describe_microinstruction(mpc, mir)}" for mpc, mir in entries]
+
+    def set_trace_depth(self, depth: int):
+        """Capacidade do histórico de microinstruções; 0 desliga o trace"""
+        self.trace.set_depth(depth)
+
+    def describe_microinstruction(self, mpc: int, mir: int) -> str:
+        # Usa o dicionário (se a entrada é a do microprograma padrão) ou o disassembler MAL
+        if mpc in MICRO_MNEMONICS and mir == CONTROL_STORE[mpc]:
+            return MICRO_MNEMONICS[mpc]
+        return disassemble(mir)
+
+    def load_program(self, program: list[int] | ProgramImage | bytes, byteorder: str = "little"):
+        """
+        Reseta a máquina e grava o programa a partir do endereço 0. Bytes são
+        uma imagem de palavras de 16 bits na ordem byteorder, copiada em bloco.
+        """
+        if isinstance(program, (bytes, bytearray, memoryview)):
+            if len(program) % 2 or len(program) > 2 * self.main_memory.size:
+                raise ValueError(f"A imagem deve ter um número par de bytes e no máximo "
+                                 f"{self.main_memory.size} palavras.")
+            self.reset()
+            self.main_memory.load_image(program, byteorder)
+        else:
+            self.reset()
+            bytecode = program
+            if isinstance(program, ProgramImage):
+                self.program = program
+                bytecode = program.bytecode
+            if len(bytecode) <= self.main_memory.size:
+                image = array('H', [word & 0xFFFF for word in bytecode])
+                self.main_memory.load_image(image.tobytes(), sys.byteorder)
+            else:
+                # Maior que a memória: direct_write dá a volta nos endereços
+                for address, word in enumerate(bytecode):
+                    self.main_memory.direct_write(address, word)
+        self.program_image = _le_bytes(self.main_memory.data)
+
+    def current_instruction_address(self) -> int:
+        """Endereço da macroinstrução em execução (ou a próxima, se MPC == 0)"""
+        regs = self.register_file.data
+        # Até o microendereço 1 o PC ainda não foi incrementado
+        if regs[RegisterFile.MPC] <= 1:
+            return regs[0] & 0x0FFF
+        return (regs[0] - 1) & 0x0FFF
+
+    def current_source_line(self) -> int | None:
+        if self.program is None:
+            return None
+        return self.program.line_for(self.current_instruction_address())
+
+    def set_breakpoint_label(self, label: str) -> int:
+        """Breakpoint no endereço de um label do programa carregado"""
+        address = self.program.address_of(label) if self.program is not None else None
+        if address is None:
+            raise KeyError(label)
+        self.breakpoint_pc = address
+        return address
+
+    def export_state(self) -> bytes:
+        """Serializa o estado da máquina num buffer binário compacto"""
+        mem = self.main_memory
+        flags = (self.n_flag | self.z_flag << 1 | mem.read_enable << 2
+                 | mem.write_enable << 3 | self.halted << 4)
+        breakpoints = json.dumps(self.breakpoints.to_dict(), separators=(",", ":")).encode()
+        header = STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, self.mir, flags,
+                                   mem.address_latch, self.cycle_count, len(breakpoints))
+        return header + _le_bytes(self.register_file.data) + breakpoints + _le_bytes(mem.data)
+
+    def import_state(self, blob: bytes):
+        """
+        Restaura um estado gerado por export_state, inclusive breakpoints,
+        watchpoints e condições (não altera o motor selecionado). O blob é
+        conferido por inteiro antes de mexer na máquina: se for inválido
+        (ValueError), a máquina fica como estava.
+        """
+        if len(blob) < STATE_HEADER.size:
+            raise ValueError("Estado serializado inválido (truncado).")
+        magic, version, mir, flags, address_latch, cycle_count, breakpoint_bytes = STATE_HEADER.unpack_from(blob)
+        if magic != STATE_MAGIC:
+            raise ValueError("Estado serializado inválido.")
+        if version != STATE_VERSION:
+            raise ValueError(f"Versão de estado serializado não suportada: {version}.")
+        regs_end = STATE_HEADER.size + 2 * self.register_file.size
+        memory_start = regs_end + breakpoint_bytes
+        if len(blob) != memory_start + 2 * self.main_memory.size:
+            raise ValueError("Estado serializado inválido (tamanho errado).")
+        if address_latch >= self.main_memory.size:
+            raise ValueError("Estado serializado inválido (latch de endereço).")
+        try:
+            breakpoints = check_spec(json.loads(blob[regs_end:memory_start]), len(self.control_store))
+        except ValueError:      # inclui JSON e UTF-8 inválidos
+            raise ValueError("Estado serializado inválido (breakpoints).")
+        regs = array('h')
+        regs.frombytes(blob[STATE_HEADER.size:regs_end])
+        memory = array('h')
+        memory.frombytes(blob[memory_start:])
+        if sys.byteorder == "big":
+            regs.byteswap()
+            memory.byteswap()
+
+        program = self.program
+        self.reset()
+        self.program = program
+        self.register_file.data[:] = regs
+        self.main_memory.data[:] = memory
+        self.mir = mir
+        self.n_flag = bool(flags & 1)
+        self.z_flag = bool(flags & 2)
+        self.main_memory.read_enable = bool(flags & 4)
+        self.main_memory.write_enable = bool(flags & 8)
+        self.halted = bool(flags & 16)
+        self.main_memory.address_latch = address_latch
+        self.cycle_count = cycle_count
+        self.breakpoints.load(breakpoints)
+
+    def get_registers(self) -> dict:
+        return {
+            "PC": self.pc.read(), "AC": self.ac.read(), "SP": self.sp.read(),
+            "IR": self.ir.read(), "TIR": self.tir.read(), 
+            "MAR": self.mar.read(), "MBR": self.mbr.read()
+        }
+
+    def _get_simulation(self) -> dict:
         exec_time = (time.time() - self.execution_start_time) if self.execution_start_time > 0 else 0
-        
-        view_program = self.main_memory.get_memory_view(0, 128)
-        view_stack = self.main_memory.get_memory_view(4064, 32)
+        return {
+            "isRunning": self.is_running, "isStopped": self.stop_flag, "isHalted": self.halted,
+            "mpc": self.mpc.read(), "cycleCount": self.cycle_count,
+            "executionTimeMs": int(exec_time * 1000),
+            "sourceLine": self.current_source_line(),
+            "breakReason": self.break_reason if self.stop_flag else None,
+        }
+
+    def get_state(self) -> dict:
+        memory_view = []
+        for start, count in MEMORY_VIEW_WINDOWS:
+            memory_view += self.main_memory.get_memory_view(start, count)
 
         return {
-            "registers": {
-                "PC": self.pc.read(), "AC": self.ac.read(), "SP": self.sp.read(),
-                "IR": self.ir.read(), "TIR": self.tir.read(), 
-                "MAR": self.mar.read(), "MBR": self.mbr.read()
-            },
+            "registers": self.get_registers(),
             "flags": {"N": self.n_flag, "Z": self.z_flag},
-            "simulation": {
-                "isRunning": self.is_running, "isStopped": self.stop_flag,
-                "mpc": self.mpc.read(), "cycleCount": self.cycle_count,
-                "executionTimeMs": int(exec_time * 1000),
-            },
+            "simulation": self._get_simulation(),
             "microHistory": self.micro_history,
-            "memoryView": view_program + view_stack 
+            "memoryView": memory_view
+        }
+
+    def _record_snapshot(self, registers: dict) -> int:
+        self.state_seq += 1
+        self.delta_snapshots[self.state_seq] = (registers, self.main_memory.version, self.trace.total)
+        if len(self.delta_snapshots) > DELTA_SNAPSHOTS:
+            self.delta_snapshots.popitem(last=False)
+        return self.state_seq
+
+    def get_delta(self, since: int) -> dict:
+        """
+        Estado incremental desde o seq devolvido numa resposta anterior:
+        só registradores alterados, células escritas (nas janelas exibidas)
+        e entradas novas do histórico. Seq desconhecido ou anterior ao
+        último reset devolve o estado completo ("full": True).
+        """
+        registers = self.get_registers()
+        snapshot = self.delta_snapshots.get(since)
+        if snapshot is None:
+            seq = self._record_snapshot(registers)
+            return {"seq": seq, "full": True, "state": self.get_state()}
+
+        old_registers, mem_version, old_history = snapshot
+        changed_cells = []
+        for addr in self.main_memory.changed_since(mem_version):
+            for start, count in MEMORY_VIEW_WINDOWS:
+                if start <= addr < start + count:
+                    changed_cells.append(self.main_memory.get_cell(addr))
+                    break
+
+        new_entries = self.trace.total - old_history
+        seq = self._record_snapshot(registers)
+        return {
+            "seq": seq,
+            "full": False,
+            "registers": {name: val for name, val in registers.items() if old_registers[name] != val},
+            "flags": {"N": self.n_flag, "Z": self.z_flag},
+            "simulation": self._get_simulation(),
+            "microHistory": self.format_trace(self.trace.entries(new_entries)),
+            "memoryView": changed_cells
         }
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Modo ISA: executa uma macroinstrução inteira por despacho.
+
+A palavra em PC é decodificada direto pelo opcode (OPCODE_MAP /
+FULL_OPCODE_MAP) e o efeito arquitetural (PC, AC, SP, memória, IR,
+MAR, MBR, latches da memória) é aplicado de uma vez. O número de microciclos somado a
+cycle_count vem de uma tabela de custos obtida rastreando o
+microprograma carregado, então cycleCount bate com o modo microcodificado.
+
+Só as instruções que o microprograma realmente implementa têm atalho;
+as demais (JPOS, JZER, STOL, CALL, ...) caem no microcódigo, ciclo a
+ciclo, até o MPC voltar a 0, assim como tudo enquanto um trace binário
+estiver sendo gravado ou a execução reversa estiver ligada.
+
+Os atalhos não reproduzem o estado intermediário do microcódigo: TIR
+(deslocamentos da decodificação), latches A/B da ALU, flags N/Z e MIR
+ficam com os valores da última instrução executada pelo microcódigo.
+O latch de endereço da memória e os sinais RD/WR pendentes batem com
+o microcódigo em toda fronteira de instrução.
+"""
+from .assembler import OPCODE_MAP, FULL_OPCODE_MAP
+from .components import RegisterFile, to_int16
+
+REG_PC, REG_AC, REG_SP, REG_IR, REG_A = 0, 1, 2, 3, 10
+MAR, MBR, MPC = RegisterFile.MAR, RegisterFile.MBR, RegisterFile.MPC
+
+# --- Atalhos por instrução: (regs, mem, w), w = palavra já buscada ---
+
+def _lodd(regs, mem, w):
+    regs[MAR] = w
+    mem.address_latch = addr = w & 0x0FFF
+    regs[MBR] = regs[REG_AC] = mem.data[addr]
+
+def _stod(regs, mem, w):
+    regs[MAR] = w
+    regs[MBR] = regs[REG_AC]
+    mem.data[w & 0x0FFF] = regs[REG_AC]
+    mem.mark_dirty(w & 0x0FFF)
+    # O segundo WR fica pendente para o início da próxima instrução
+    mem.address_latch = w & 0x0FFF
+    mem.write_enable = True
+
+def _addd(regs, mem, w):
+    regs[MAR] = w
+    mem.address_latch = addr = w & 0x0FFF
+    regs[MBR] = val = mem.data[addr]
+    regs[REG_AC] = to_int16(regs[REG_AC] + val)
+
+def _subd(regs, mem, w):
+    # AC = AC + 1 + INV(MBR), como no microcódigo
+    regs[MAR] = w
+    mem.address_latch = addr = w & 0x0FFF
+    inv = ~mem.data[addr]
+    regs[MBR] = regs[REG_A] = inv
+    regs[REG_AC] = to_int16(to_int16(regs[REG_AC] + 1) + inv)
+
+def _jump(regs, mem, w):
+    regs[REG_PC] = w & 0x0FFF
+
+def _loco(regs, mem, w):
+    regs[REG_AC] = w & 0x0FFF
+
+def _lodl(regs, mem, w):
+    regs[REG_A] = regs[MAR] = addr = to_int16(regs[REG_SP] + w)
+    mem.address_latch = addr = addr & 0x0FFF
+    regs[MBR] = regs[REG_AC] = mem.data[addr]
+
+def _addl(regs, mem, w):
+    regs[REG_A] = regs[MAR] = addr = to_int16(regs[REG_SP] + w)
+    mem.address_latch = addr = addr & 0x0FFF
+    regs[MBR] = val = mem.data[addr]
+    regs[REG_AC] = to_int16(regs[REG_AC] + val)
+
+def _jnze(regs, mem, w):
+    if regs[REG_AC] != 0:
+        regs[REG_PC] = w & 0x0FFF
+
+def _push(regs, mem, w):
+    regs[REG_SP] = regs[MAR] = sp = to_int16(regs[REG_SP] - 1)
+    regs[MBR] = regs[REG_AC]
+    mem.data[sp & 0x0FFF] = regs[REG_AC]
+    mem.mark_dirty(sp & 0x0FFF)
+    mem.address_latch = sp & 0x0FFF
+    mem.write_enable = True
+
+def _pop(regs, mem, w):
+    regs[MAR] = sp = regs[REG_SP]
+    regs[REG_SP] = to_int16(sp + 1)
+    mem.address_latch = sp = sp & 0x0FFF
+    regs[MBR] = regs[REG_AC] = mem.data[sp]
+
+HANDLERS = {
+    "LODD": _lodd, "STOD": _stod, "ADDD": _addd, "SUBD": _subd,
+    "JUMP": _jump, "LOCO": _loco, "LODL": _lodl, "ADDL": _addl,
+    "JNZE": _jnze, "PUSH": _push, "POP": _pop,
+}
+
+def opcode_word(mnemonic: str) -> int:
+    """Palavra de 16 bits (operando 0) que codifica o mnemônico"""
+    if mnemonic in OPCODE_MAP:
+        return OPCODE_MAP[mnemonic] << 12
+    return FULL_OPCODE_MAP[mnemonic]
+
+def opcode_key(word: int) -> int:
+    """Índice de despacho: byte alto da palavra (0..255)"""
+    return (word >> 8) & 0xFF
+
+def mnemonic_of(word: int) -> str | None:
+    """Mnemônico da palavra, ou None se não for uma instrução da ISA"""
+    return _MNEMONIC_BY_KEY[opcode_key(word)]
+
+def _build_mnemonic_table():
+    table = [None] * 256
+    for mnemonic, opcode in OPCODE_MAP.items():
+        for low in range(16):
+            table[(opcode << 4) | low] = mnemonic
+    for mnemonic, word in FULL_OPCODE_MAP.items():
+        table[opcode_key(word)] = mnemonic
+    return tuple(table)
+
+_MNEMONIC_BY_KEY = _build_mnemonic_table()
+
+def trace_path(control_store, word: int, ac: int = 0, limit: int = 1024) -> tuple | None:
+    """
+    Caminho de uma instrução (palavra em 0) no microprograma, rodando-o
+    numa máquina de rascunho do MPC 0 até voltar a 0: (microendereços
+    executados, microendereços cujo sucessor não foi MPC + 1).
+    Retorna None se não voltar dentro do limite.
+    """
+    from .cpu import MIC1
+    scratch = MIC1(trace_depth=0)
+    scratch.load_control_store(control_store)
+    scratch.main_memory.direct_write(0, word)
+    scratch.ac.write(ac)
+    scratch.is_running = True
+    mpcs, jumps = [], []
+    try:
+        while len(mpcs) < limit:
+            mpc = scratch.mpc.read()
+            scratch.step()
+            mpcs.append(mpc)
+            next_mpc = scratch.mpc.read()
+            if next_mpc != mpc + 1:
+                jumps.append(mpc)
+            if next_mpc == 0:
+                return tuple(mpcs), tuple(jumps)
+    except IndexError:
+        pass
+    return None
+
+def trace_cycles(control_store, word: int, ac: int = 0, limit: int = 1024) -> int | None:
+    """Microciclos de uma instrução (None se não voltar ao MPC 0 dentro do limite)"""
+    path = trace_path(control_store, word, ac, limit)
+    return len(path[0]) if path is not None else None
+
+def build_path_table(control_store) -> dict[str, tuple]:
+    """
+    Caminho no microprograma de cada instrução com atalho:
+    mnemônico -> (caminho com AC == 0, caminho com AC != 0)
+    """
+    paths = {}
+    for mnemonic in HANDLERS:
+        word = opcode_word(mnemonic)
+        path_zero = trace_path(control_store, word, 0)
+        path_nonzero = trace_path(control_store, word, 1)
+        if path_zero is not None and path_nonzero is not None:
+            paths[mnemonic] = (path_zero, path_nonzero)
+    return paths
+
+def build_cost_table(control_store, paths: dict | None = None) -> dict[str, tuple[int, int]]:
+    """
+    Custo em microciclos de cada instrução com atalho:
+    mnemônico -> (ciclos com AC == 0, ciclos com AC != 0)
+    """
+    if paths is None:
+        paths = build_path_table(control_store)
+    return {mnemonic: (len(zero[0]), len(nonzero[0])) for mnemonic, (zero, nonzero) in paths.items()}
+
+def build_dispatch_table(costs: dict[str, tuple[int, int]], paths: dict | None = None) -> tuple:
+    """Tabela de 256 entradas (byte alto) -> (atalho, custos, caminhos) ou None"""
+    table = []
+    for key in range(256):
+        mnemonic = _MNEMONIC_BY_KEY[key]
+        if mnemonic in HANDLERS and mnemonic in costs:
+            table.append((HANDLERS[mnemonic], costs[mnemonic], paths.get(mnemonic) if paths else None))
+        else:
+            table.append(None)
+    return tuple(table)
+
+def execute_instruction(cpu):
+    """Executa uma macroinstrução completa (ou termina a que estiver em andamento)"""
+    regs = cpu.register_file.data
+
+    # No meio de uma instrução: completa pelo microcódigo
+    if regs[MPC] != 0:
+        while regs[MPC] != 0 and cpu.is_running and not cpu.stop_flag:
+            cpu.step_micro()
+        return
+
+    mem = cpu.main_memory
+    key = opcode_key(mem.data[regs[REG_PC] & 0x0FFF])
+    entry = cpu.isa_table[key]
+    if (entry is None or cpu.recorder is not None or cpu.time_travel is not None
+            or cpu.breakpoints.needs_microcycles):
+        # Sem atalho (ou gravando trace / execução reversa / watchpoints):
+        # segue o microprograma ciclo a ciclo
+        cpu.step_micro()
+        while regs[MPC] != 0 and cpu.is_running and not cpu.stop_flag:
+            cpu.step_micro()
+        return
+
+    # Subciclo 1 do ciclo 0: completa o WR pendente da instrução anterior
+    mem.access(cpu.mbr)
+
+    # Busca (microendereços 0-2): MAR = PC; PC = PC + 1; IR = MBR. O RD
+    # da busca deixa o latch em PC (JUMP, LOCO e JNZE não o trocam)
+    pc = regs[REG_PC]
+    mem.address_latch = address = pc & 0x0FFF
+    word = mem.data[address]
+    regs[MAR] = pc
+    regs[REG_PC] = to_int16(pc + 1)
+    regs[MBR] = regs[REG_IR] = word
+
+    handler, costs, paths = entry
+    nonzero = regs[REG_AC] != 0
+    counters = cpu.counters
+    if counters is not None:
+        counters.instruction(key, cpu.cycle_count)
+        counters.add_path(*paths[nonzero])
+    cost = costs[nonzero]
+    handler(regs, mem, word)
+    cpu.cycle_count += cost
+
+    # Breakpoints de PC e condições (fronteira de instrução, MPC == 0)
+    breakpoints = cpu.breakpoints
+    if breakpoints.active:
+        reason = breakpoints.check(regs, 0)
+        if reason is not None:
+            cpu.break_reason = reason
+            cpu.is_running = False
+            cpu.stop_flag = True
@@ -0,0 +1,73 @@
+"""
+Micro-JIT: compila cada endereço da memória de controle em uma função
+Python especializada (sem desvios mortos), indexada pelo MPC.
+
+Cada função recebe (cpu, regs, mem), executa os subciclos 2-4 da
+microinstrução (latches, AMUX, ALU, shifter, writeback, MAR/MBR, RD/WR)
+e devolve o próximo MPC. O subciclo 1 (acesso à memória), o histórico e
+o contador de ciclos continuam em MIC1.step, igual ao modo interpretado.
+"""
+from .components import RegisterFile
+from .microcode import decode_inst, ALU_ADD, ALU_AND, ALU_PASS_A, ALU_INV_A, SHIFT_LEFT, SHIFT_RIGHT, COND_N, COND_Z, COND_ALWAYS
+
+_MAR = RegisterFile.MAR
+_MBR = RegisterFile.MBR
+
+def generate_source(address: int, word: int) -> str:
+    """Gera o código-fonte da função especializada para um endereço"""
+    (amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, addr) = decode_inst(word)
+    lines = [f"def micro_{address:03d}(cpu, regs, mem):"]
+
+    # Subciclo 2: latches (lidos antes de qualquer escrita)
+    lines.append(f"    a = regs[{a}]; b = regs[{b}]")
+    lines.append("    cpu.latch_a = a; cpu.latch_b = b")
+    src_a = f"regs[{_MBR}]" if amux else "a"
+
+    # Subciclo 3: MAR, ALU e shifter
+    if mar:
+        lines.append(f"    regs[{_MAR}] = b")
+    if alu == ALU_ADD:
+        # to_int16 inline: o código gerado não paga a chamada
+        lines.append(f"    r = (({src_a} + b + 0x8000) & 0xFFFF) - 0x8000")
+    elif alu == ALU_AND:
+        lines.append(f"    r = {src_a} & b")
+    elif alu == ALU_PASS_A:
+        lines.append(f"    r = {src_a}")
+    elif alu == ALU_INV_A:
+        lines.append(f"    r = ~{src_a}")
+    lines.append("    cpu.n_flag = r < 0; cpu.z_flag = r == 0")
+
+    result = "r"
+    if sh == SHIFT_LEFT:
+        lines.append("    c = ((r << 1) + 0x8000 & 0xFFFF) - 0x8000")
+        result = "c"
+    elif sh == SHIFT_RIGHT:
+        lines.append("    c = r >> 1")
+        result = "c"
+
+    # Subciclo 4: writeback, latches de memória e próximo endereço
+    if enc:
+        lines.append(f"    regs[{c}] = {result}")
+    if mbr:
+        lines.append(f"    regs[{_MBR}] = {result}")
+    if rd:
+        lines.append(f"    mem.address_latch = regs[{_MAR}] & 0x0FFF; mem.read_enable = True")
+    if wr:
+        lines.append(f"    mem.address_latch = regs[{_MAR}] & 0x0FFF; mem.write_enable = True")
+
+    if cond == COND_ALWAYS:
+        lines.append(f"    return {addr}")
+    elif cond == COND_N:
+        lines.append(f"    return {addr} if r < 0 else {address + 1}")
+    elif cond == COND_Z:
+        lines.append(f"    return {addr} if r == 0 else {address + 1}")
+    else:
+        lines.append(f"    return {address + 1}")
+    return "\n".join(lines)
+
+def compile_control_store(control_store) -> tuple:
+    """Compila a memória de controle inteira em uma tabela de funções indexada pelo MPC"""
+    source = "\n\n".join(generate_source(address, word) for address, word in enumerate(control_store))
+    namespace = {}
+    exec(compile(source, "<mic1-jit>", "exec"), namespace)
+    return tuple(namespace[f"micro_{address:03d}"] for address in range(len(control_store)))
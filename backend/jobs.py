@@ -0,0 +1,121 @@
+"""
+Execução de simulações longas em processos separados.
+
+O estado da máquina vai e volta como o buffer de MIC1.export_state(),
+então o event loop do uvicorn só faz submit/poll/cancel.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from .cpu import MIC1
+
+# Ciclos entre verificações do pedido de cancelamento
+CANCEL_CHECK_CYCLES = 100_000
+
+def run_job(job_id: str, state: bytes, engine: str, max_cycles: int, cancelled) -> dict:
+    """Executado no processo filho: roda até halt/breakpoint/limite ou cancelamento"""
+    cpu = MIC1(engine=engine, trace_depth=0)
+    cpu.import_state(state)
+    cpu.is_running = True
+    cpu.stop_flag = False
+
+    start = time.perf_counter()
+    executed = 0
+    reason = "limit"
+    try:
+        while cpu.is_running and not cpu.stop_flag and executed < max_cycles:
+            executed += cpu.run(min(CANCEL_CHECK_CYCLES, max_cycles - executed))
+            if cancelled.get(job_id):
+                reason = "cancelled"
+                break
+        else:
+            if cpu.halted:
+                reason = "halted"
+            elif cpu.stop_flag:
+                reason = "breakpoint"
+    except IndexError:
+        reason = "error"
+    elapsed = time.perf_counter() - start
+
+    cpu.is_running = False
+    return {
+        "reason": reason,
+        "cycles": executed,
+        "elapsedMs": int(elapsed * 1000),
+        "cyclesPerSecond": int(executed / elapsed) if elapsed > 0 else 0,
+        "state": cpu.export_state(),
+    }
+
+class JobManager:
+    """Fila de simulações num ProcessPoolExecutor (um processo por núcleo por padrão)"""
+    def __init__(self, max_workers: int | None = None, max_finished: int = 256):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.jobs = {}      # job_id -> {"future", "submitted", "engine"}
+        self._executor = None
+        self._manager = None
+        self._cancelled = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self._cancelled = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, state: bytes, engine: str = "interp", max_cycles: int = 10_000_000) -> str:
+        with self._lock:
+            self._ensure_started()
+            self._forget_finished()
+            job_id = uuid.uuid4().hex
+            future = self._executor.submit(run_job, job_id, state, engine, max_cycles, self._cancelled)
+            self.jobs[job_id] = {"future": future, "submitted": time.time(), "engine": engine}
+            return job_id
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["future"].done()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+            self._cancelled.pop(job_id, None)
+
+    def status(self, job_id: str) -> dict | None:
+        """Situação do job; 'result' (com o estado final) só quando terminado"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        future = job["future"]
+        info = {"id": job_id, "engine": job["engine"], "submitted": job["submitted"]}
+        if future.cancelled():
+            info["status"] = "cancelled"
+        elif not future.done():
+            info["status"] = "running" if future.running() else "pending"
+        elif future.exception() is not None:
+            info["status"] = "failed"
+            info["error"] = str(future.exception())
+        else:
+            info["status"] = "done"
+            info["result"] = future.result()
+        return info
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        # Pendente: sai da fila; em execução: o filho vê a marca no próximo lote
+        if not job["future"].cancel():
+            self._cancelled[job_id] = True
+        return True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+
+def manager_from_env() -> JobManager:
+    """Gerenciador configurado por MIC1_JOB_WORKERS (padrão: número de núcleos)"""
+    workers = os.environ.get("MIC1_JOB_WORKERS")
+    return JobManager(max_workers=int(workers) if workers else None)
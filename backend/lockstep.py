@@ -0,0 +1,280 @@
+"""
+Execução vetorizada de várias instâncias do mesmo programa.
+
+BatchMachine guarda N máquinas MIC-1 em arrays NumPy (registradores
+N x 16, memória N x 4096, MAR/MBR/MPC/flags/latches N) e avança todas
+um microciclo por step. As pistas são agrupadas pelo MPC: cada
+microinstrução distinta presente no ciclo é aplicada de uma vez, com
+operações vetorizadas, a todas as pistas que estão nela. Como as
+pistas rodam o mesmo programa, quase sempre há poucos grupos e o custo
+por ciclo cresce pouco com N.
+
+A semântica é a de MIC1.step_micro (motor interpretado): acesso à
+memória no início do ciclo, RD antes de WR, halt em 'FIM: JUMP FIM'.
+Uma pista cujo MPC sai da memória de controle para com status
+"error" em vez de levantar IndexError. Breakpoints, trace e execução
+reversa não existem aqui.
+
+Requer NumPy (dependência opcional):
+
+    python -m backend.lockstep programa.asm entradas.json --watch SOMA
+"""
+import argparse
+import json
+import os
+import sys
+from .assembler import assemble_program, ProgramImage
+from .components import to_int16
+from .mal import control_store_from_env
+from .microcode import CONTROL_STORE, build_decode_table
+
+try:
+    import numpy as np
+except ImportError:     # opcional: só este módulo precisa
+    np = None
+
+REGISTER_NAMES = ("PC", "AC", "SP", "IR", "TIR", "0", "+1", "-1", "AMASK", "SMASK", "A", "B", "C", "D", "E", "F")
+REPORT_REGISTERS = ("PC", "AC", "SP", "IR", "TIR", "MAR", "MBR")
+
+# Status por pista
+RUNNING, HALTED, ERROR = 0, 1, 2
+STATUS_NAMES = ("running", "halted", "error")
+
+class BatchMachine:
+    def __init__(self, program, lanes: int, control_store=None, memory_size: int = 4096):
+        if np is None:
+            raise RuntimeError("BatchMachine requer NumPy (pip install numpy).")
+        if lanes < 1:
+            raise ValueError("É preciso pelo menos uma pista.")
+        if control_store is None:
+            # Mesmo microprograma padrão de MIC1 (MIC1_CONTROL_STORE, ver mal.py)
+            control_store = (control_store_from_env() or (CONTROL_STORE,))[0]
+        self.lanes = lanes
+        self.memory_size = memory_size
+        self.control_store = control_store
+        self.decoded_store = build_decode_table(control_store)
+        if isinstance(program, ProgramImage):
+            self.program = program
+            program = program.bytecode
+        else:
+            self.program = None
+        self.bytecode = np.array([to_int16(word) for word in program], dtype=np.int16)
+        self.reset()
+
+    def reset(self):
+        """Todas as pistas no estado de MIC1.reset() com o programa carregado"""
+        n = self.lanes
+        self.regs = np.zeros((n, 16), dtype=np.int16)
+        self.regs[:, 2] = 4096
+        self.regs[:, 6] = 1
+        self.regs[:, 7] = -1
+        self.regs[:, 8] = 0x0FFF
+        self.regs[:, 9] = 0x00FF
+        self.mar = np.zeros(n, dtype=np.int16)
+        self.mbr = np.zeros(n, dtype=np.int16)
+        self.mpc = np.zeros(n, dtype=np.int32)
+        self.n_flag = np.zeros(n, dtype=bool)
+        self.z_flag = np.zeros(n, dtype=bool)
+        self.read_enable = np.zeros(n, dtype=bool)
+        self.write_enable = np.zeros(n, dtype=bool)
+        self.address_latch = np.zeros(n, dtype=np.int32)
+        self.memory = np.zeros((n, self.memory_size), dtype=np.int16)
+        self.memory[:, :len(self.bytecode)] = self.bytecode
+        self.status = np.zeros(n, dtype=np.int8)
+        self.cycles = np.zeros(n, dtype=np.int64)
+        self.cycle_count = 0
+
+    # --- Entradas ---
+
+    def resolve(self, target) -> int:
+        """Endereço de um label/variável do programa (ou o próprio inteiro)"""
+        if isinstance(target, int):
+            return target & 0x0FFF
+        address = self.program.address_of(target) if self.program is not None else None
+        if address is None:
+            raise KeyError(target)
+        return address
+
+    def set_memory(self, target, values, lane: int | None = None):
+        """
+        Grava valores a partir de target (endereço ou símbolo): um valor
+        escalar, uma lista (mesma para todas as pistas) ou uma matriz
+        N x k (uma linha por pista). Com lane, só naquela pista.
+        """
+        address = self.resolve(target)
+        data = np.asarray(values, dtype=np.int64)
+        data = to_int16(data).astype(np.int16)
+        if data.ndim == 0:
+            data = data.reshape(1)
+        if address + data.shape[-1] > self.memory_size:
+            raise ValueError(f"{data.shape[-1]} valores a partir de {address} passam do fim da memória ({self.memory_size} palavras).")
+        rows = slice(None) if lane is None else lane
+        self.memory[rows, address:address + data.shape[-1]] = data
+
+    def set_register(self, name: str, values, lane: int | None = None):
+        index = REGISTER_NAMES.index(name.upper())
+        rows = slice(None) if lane is None else lane
+        self.regs[rows, index] = np.asarray(values, dtype=np.int64).astype(np.int16)
+
+    # --- Execução ---
+
+    def step(self) -> int:
+        """Um microciclo em todas as pistas ativas; devolve quantas estavam ativas"""
+        active = np.flatnonzero(self.status == RUNNING)
+        if active.size == 0:
+            return 0
+
+        # Subciclo 1: memória (RD tem prioridade; WR fica pendente se os dois estiverem ligados)
+        reading = active[self.read_enable[active]]
+        writing = active[self.write_enable[active] & ~self.read_enable[active]]
+        if reading.size:
+            self.mbr[reading] = self.memory[reading, self.address_latch[reading]]
+            self.read_enable[reading] = False
+        if writing.size:
+            self.memory[writing, self.address_latch[writing]] = self.mbr[writing]
+            self.write_enable[writing] = False
+
+        # Subciclos 2 a 4: uma microinstrução por grupo de pistas com o mesmo MPC
+        mpcs = self.mpc[active]
+        order = np.argsort(mpcs, kind="stable")
+        groups, starts = np.unique(mpcs[order], return_index=True)
+        ends = list(starts[1:]) + [order.size]
+        store_size = len(self.decoded_store)
+        for mpc, start, end in zip(groups.tolist(), starts.tolist(), ends):
+            lanes = active[order[start:end]]
+            if mpc >= store_size:
+                self.status[lanes] = ERROR
+                continue
+            self._execute_group(lanes, mpc)
+            self.cycles[lanes] += 1
+
+        self.cycle_count += 1
+
+        # Halt: fronteira de instrução com a instrução em PC saltando para si mesma
+        at_fetch = active[(self.mpc[active] == 0) & (self.status[active] == RUNNING)]
+        if at_fetch.size:
+            pc = self.regs[at_fetch, 0].astype(np.int32) & 0x0FFF
+            halted = self.memory[at_fetch, pc] == (0x6000 | pc)
+            self.status[at_fetch[halted]] = HALTED
+        return active.size
+
+    def _execute_group(self, lanes, mpc: int):
+        (amux_sig, cond, alu_sig, sh_sig, mbr_load, mar_load,
+         rd_sig, wr_sig, enc, c_addr, addr_b, addr_a, jump_addr) = self.decoded_store[mpc]
+        regs = self.regs
+        latch_b = regs[lanes, addr_b]
+        amux_out = self.mbr[lanes] if amux_sig else regs[lanes, addr_a]
+
+        if mar_load:
+            self.mar[lanes] = latch_b
+
+        # Aritmética int16 do NumPy já trunca em 16 bits
+        if alu_sig == 0:
+            alu_out = amux_out + latch_b
+        elif alu_sig == 1:
+            alu_out = amux_out & latch_b
+        elif alu_sig == 2:
+            alu_out = amux_out
+        else:
+            alu_out = ~amux_out
+        n_flag = alu_out < 0
+        z_flag = alu_out == 0
+        self.n_flag[lanes] = n_flag
+        self.z_flag[lanes] = z_flag
+
+        if sh_sig == 1:
+            c_bus = alu_out >> 1
+        elif sh_sig == 2:
+            c_bus = alu_out << 1
+        else:
+            c_bus = alu_out
+
+        if enc:
+            regs[lanes, c_addr] = c_bus
+        if mbr_load:
+            self.mbr[lanes] = c_bus
+        if rd_sig or wr_sig:
+            self.address_latch[lanes] = self.mar[lanes].astype(np.int32) & 0x0FFF
+            if rd_sig:
+                self.read_enable[lanes] = True
+            if wr_sig:
+                self.write_enable[lanes] = True
+
+        if cond == 0:
+            self.mpc[lanes] = mpc + 1
+        elif cond == 3:
+            self.mpc[lanes] = jump_addr
+        else:
+            self.mpc[lanes] = np.where(n_flag if cond == 1 else z_flag, jump_addr, mpc + 1)
+
+    def run(self, max_cycles: int) -> int:
+        """Roda até todas as pistas pararem ou max_cycles microciclos; devolve os ciclos dados"""
+        executed = 0
+        while executed < max_cycles and self.step():
+            executed += 1
+        return executed
+
+    # --- Resultados ---
+
+    def get_registers(self, lane: int) -> dict:
+        values = dict(zip(REGISTER_NAMES, self.regs[lane].tolist()))
+        values["MAR"] = int(self.mar[lane])
+        values["MBR"] = int(self.mbr[lane])
+        return {name: values[name] for name in REPORT_REGISTERS}
+
+    def report(self, watch: list | None = None) -> list[dict]:
+        """Uma linha por pista: status, ciclos, registradores e células observadas"""
+        rows = []
+        for lane in range(self.lanes):
+            row = {
+                "lane": lane,
+                "status": STATUS_NAMES[self.status[lane]] if self.status[lane] != RUNNING else "limit",
+                "cycles": int(self.cycles[lane]),
+                "registers": self.get_registers(lane),
+            }
+            if watch:
+                row["memory"] = {str(target): int(self.memory[lane, self.resolve(target)]) for target in watch}
+            rows.append(row)
+        return rows
+
+def _parse_target(text: str):
+    return int(text) if text.lstrip("-").isdigit() else text
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Executa um programa MIC-1 contra vários conjuntos de entrada em lockstep.")
+    parser.add_argument("program", help="arquivo .asm")
+    parser.add_argument("inputs", help="JSON: lista de objetos {símbolo ou endereço: valor ou lista de valores}, um por pista")
+    parser.add_argument("--max-cycles", type=int, default=1_000_000)
+    parser.add_argument("--watch", action="append", default=[], help="símbolo ou endereço a incluir no relatório")
+    args = parser.parse_args(argv)
+
+    with open(args.program, encoding="utf-8") as source_file:
+        image, error = assemble_program(source_file, os.path.dirname(os.path.abspath(args.program)))
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    with open(args.inputs, encoding="utf-8") as inputs_file:
+        datasets = json.load(inputs_file)
+    if not isinstance(datasets, list) or not datasets:
+        parser.error("o arquivo de entradas deve conter uma lista não vazia")
+
+    machine = BatchMachine(image, len(datasets))
+    try:
+        for lane, dataset in enumerate(datasets):
+            for target, values in dataset.items():
+                machine.set_memory(_parse_target(target), values, lane)
+        watch = [_parse_target(target) for target in args.watch]
+        for target in watch:
+            machine.resolve(target)
+    except KeyError as e:
+        parser.error(f"símbolo não encontrado: {e.args[0]}")
+    except ValueError as e:
+        parser.error(str(e))
+
+    machine.run(args.max_cycles)
+    json.dump(machine.report(watch), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,16 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header, Query, Request
 from pydantic import BaseModel
-from .cpu import MIC1
-from .assembler import assemble
+from .cpu import MIC1, ENGINES
+from .assembler import assembly_cache
+from .sessions import DEFAULT_SESSION, pool_from_env
+from .jobs import manager_from_env
+from .snapshot import SnapshotStore
 import asyncio
+import base64
+import contextlib
 import time
 from fastapi.staticfiles import StaticFiles     
-from fastapi.responses import FileResponse      
+from fastapi.responses import FileResponse, Response
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -25,7 +30,57 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
-simulator = MIC1()
+# Um simulador por sessão (header X-Session-Id ou ?session=...)
+pool = pool_from_env()
+
+def session_id(x_session_id: str | None = Header(default=None), session: str | None = Query(default=None)) -> str:
+    return x_session_id or session or DEFAULT_SESSION
+
+def get_simulator(session: str = Depends(session_id)) -> MIC1:
+    return pool.get(session)
+
+# Quanto um pedido espera pelo lock do simulador antes de desistir com 409 (s)
+LOCK_TIMEOUT = 0.5
+
+@contextlib.contextmanager
+def simulator_lock(simulator: MIC1, stop: bool = False):
+    """
+    Toma o lock do simulador: nenhum ciclo executa (nem em /run numa thread)
+    enquanto o pedido altera a máquina. Execuções pausadas largam o lock
+    entre lotes; uma execução na velocidade máxima só ao terminar, e aí o
+    pedido recebe 409. stop=True pausa antes (reset, load, restore).
+    """
+    if stop:
+        simulator.is_running = False
+    if not simulator.lock.acquire(timeout=LOCK_TIMEOUT):
+        raise HTTPException(status_code=409, detail="Simulação em andamento (use /pause).")
+    try:
+        yield simulator
+    finally:
+        simulator.lock.release()
+
+def locked_simulator(simulator: MIC1 = Depends(get_simulator)):
+    with simulator_lock(simulator):
+        yield simulator
+
+def stopped_simulator(simulator: MIC1 = Depends(get_simulator)):
+    with simulator_lock(simulator, stop=True):
+        yield simulator
+
+def run_locked(simulator: MIC1, max_cycles: int, time_limit: float | None = None) -> int:
+    """simulator.run com o lock tomado (chamado via asyncio.to_thread)"""
+    with simulator.lock:
+        return simulator.run(max_cycles, time_limit)
+
+# Simulações longas em processos separados (/jobs)
+jobs = manager_from_env()
+
+# Snapshots compartilhados entre sessões (permite "forkar" um estado)
+snapshots = SnapshotStore()
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    jobs.shutdown()
 
 # --- Modelos de Dados para a API ---
 class AssemblyPayload(BaseModel):
@@ -33,45 +88,253 @@ class AssemblyPayload(BaseModel):
 
 class BytecodePayload(BaseModel):
     bytecode: list[int]
+    source: str | None = None           # opcional: associa símbolos e mapa de linhas
+
+class BreakpointPayload(BaseModel):
+    value: int | None = None            # PC (-1 desativa)
+    label: str | None = None            # ou um label do programa carregado
+
+class BreakpointSpecPayload(BaseModel):
+    kind: str                           # "pc", "mpc", "watch" ou "condition"
+    address: int | None = None          # pc/mpc/watch
+    label: str | None = None            # pc: label do programa carregado
+    read: bool = True                   # watch: para em leituras
+    write: bool = True                  # watch: para em escritas
+    reg: str | None = None              # condition: registrador, ex. "AC"
+    op: str = "=="                      # condition: ==, !=, <, <=, >, >=
+    value: int = 0                      # condition: valor comparado
 
 class ControlPayload(BaseModel):
     value: int
 
+class RunPayload(BaseModel):
+    value: int = 0                      # atraso entre lotes (ms)
+    batch: int = 1000                   # ciclos por lote antes de ceder o event loop
+    time_slice_ms: float | None = None  # ou: fatia de tempo por lote
+    max_cycles: int = 10_000_000        # limite de segurança
+    max_speed: bool = False             # roda até halt/breakpoint numa thread
+
+class EnginePayload(BaseModel):
+    engine: str
+
+class TracePayload(BaseModel):
+    depth: int                          # 0 desliga o histórico
+
+class TimeTravelPayload(BaseModel):
+    enabled: bool = True
+    window: int = 10_000                # ciclos com desfazer direto
+    checkpoint_interval: int = 10_000
+    max_checkpoints: int = 100
+
+class CountersPayload(BaseModel):
+    enabled: bool = True                # ligar zera os contadores
+
+class SnapshotPayload(BaseModel):
+    label: str | None = None
+
+class JobPayload(BaseModel):
+    max_cycles: int = 10_000_000
+    engine: str | None = None           # padrão: motor da sessão
+
+# Formatos de resposta de /assemble: strings de bits, imagem em base64 ou bytes crus
+ASSEMBLE_FORMATS = ("bits", "packed", "binary")
+BYTE_ORDERS = ("little", "big")
+
+def _check_byteorder(byteorder: str):
+    if byteorder not in BYTE_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Ordem de bytes desconhecida: {byteorder}")
+
 @app.post("/assemble", summary="Montar Código Assembly")
-def assemble_code(payload: AssemblyPayload):
-    bytecode, error = assemble(payload.source)
+def assemble_code(payload: AssemblyPayload, output: str = Query(default="bits", alias="format"),
+                  byteorder: str = "little"):
+    if output not in ASSEMBLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato desconhecido: {output}")
+    _check_byteorder(byteorder)
+    image, error = assembly_cache.lookup(payload.source)
     if error:
         raise HTTPException(status_code=400, detail=error)
+
+    # Imagem empacotada (palavras de 16 bits), a mesma aceita por /load/binary
+    if output == "binary":
+        return Response(content=image.to_bytes(byteorder), media_type="application/octet-stream")
+    if output == "packed":
+        packed = base64.b64encode(image.to_bytes(byteorder)).decode("ascii")
+        return {"image": packed, "byteorder": byteorder, "words": len(image.bytecode), "program": image.to_dict()}
+
+    binary_bytecode = [f"{val & 0xFFFF:016b}" for val in image.bytecode]
     
-    binary_bytecode = [f"{val & 0xFFFF:016b}" for val in bytecode]
-    
-    return {"bytecode": binary_bytecode}
+    return {"bytecode": binary_bytecode, "program": image.to_dict()}
+
+@app.get("/assemble/cache", summary="Estatísticas do Cache de Montagem")
+def assembly_cache_stats():
+    return assembly_cache.stats()
 
 @app.post("/load", summary="Carregar Bytecode na Memória")
-def load_memory(payload: BytecodePayload):
-    simulator.reset()
-    for i, instruction in enumerate(payload.bytecode):
-        simulator.main_memory.direct_write(i, instruction)
+def load_memory(payload: BytecodePayload, simulator: MIC1 = Depends(stopped_simulator)):
+    program = payload.bytecode
+    if payload.source is not None:
+        image, _ = assembly_cache.lookup(payload.source)
+        # Só usa os símbolos se o bytecode enviado é o mesmo do fonte
+        if image is not None and list(image.bytecode) == payload.bytecode:
+            program = image
+    simulator.load_program(program)
     return {"message": f"{len(payload.bytecode)} palavras carregadas na memória.", "state": simulator.get_state()}
 
+@app.post("/load/binary", summary="Carregar Imagem Binária na Memória")
+async def load_binary(request: Request, byteorder: str = "little", simulator: MIC1 = Depends(get_simulator)):
+    """Corpo application/octet-stream: palavras de 16 bits a partir do endereço 0"""
+    _check_byteorder(byteorder)
+    content_type = request.headers.get("content-type", "application/octet-stream")
+    if not content_type.startswith("application/octet-stream"):
+        raise HTTPException(status_code=415, detail="Envie a imagem como application/octet-stream.")
+    image = await request.body()
+
+    def load() -> dict:
+        with simulator_lock(simulator, stop=True):
+            simulator.load_program(image, byteorder)
+            return simulator.get_state()
+
+    try:
+        state = await asyncio.to_thread(load)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"{len(image) // 2} palavras carregadas na memória.", "state": state}
+
 @app.get("/status", summary="Obter Estado Atual")
-def get_status():
+def get_status(simulator: MIC1 = Depends(get_simulator)):
     return simulator.get_state()
 
 @app.post("/run", summary="Iniciar Simulação")
-async def run_simulation(control: ControlPayload):
+async def run_simulation(control: RunPayload, simulator: MIC1 = Depends(get_simulator)):
     simulator.is_running = True
     simulator.stop_flag = False
     if simulator.cycle_count == 0:
         simulator.execution_start_time = time.time()
-    delay = control.value / 1000.0
-    while simulator.is_running:
-        simulator.step()
-        await asyncio.sleep(delay)
-    return {"message": "Simulação pausada ou parada.", "state": simulator.get_state()}
+
+    start = time.perf_counter()
+    executed = 0
+    try:
+        if control.max_speed:
+            # Laço apertado fora do event loop; /pause continua funcionando
+            executed = await asyncio.to_thread(run_locked, simulator, control.max_cycles)
+        else:
+            delay = control.value / 1000.0
+            time_slice = control.time_slice_ms / 1000.0 if control.time_slice_ms else None
+            batch = control.max_cycles if time_slice else max(1, control.batch)
+            while simulator.is_running and executed < control.max_cycles:
+                executed += await asyncio.to_thread(run_locked, simulator,
+                                                    min(batch, control.max_cycles - executed), time_slice)
+                await asyncio.sleep(delay)
+    except IndexError:
+        simulator.is_running = False
+        raise HTTPException(status_code=400, detail="MPC fora da memória de controle.")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "message": "Simulação pausada ou parada.",
+        "cycles": executed,
+        "cyclesPerSecond": int(executed / elapsed) if elapsed > 0 else 0,
+        "halted": simulator.halted,
+        "state": simulator.get_state(),
+    }
+
+# Faixas aceitas em /ws/run
+MAX_STREAM_FPS = 120
+MIN_CYCLES_PER_SECOND = 0.001      # o frontend manda 1000 / (ms por ciclo)
+MAX_CYCLES_PER_SECOND = 1e9
+
+def _stream_number(message: dict, key: str, default, low: float, high: float):
+    """Campo numérico da mensagem de /ws/run (ValueError se inválido)"""
+    value = message.get(key, default)
+    if value is None and default is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise ValueError(f"'{key}' deve ser um número entre {low:g} e {high:g}.")
+    return float(value)
+
+@app.websocket("/ws/run")
+async def run_stream(websocket: WebSocket, session: str = Depends(session_id)):
+    """
+    Executa no servidor e envia quadros de estado incrementais (get_delta)
+    limitados a 'fps' por segundo, independente da taxa de ciclos.
+    Mensagens do cliente: {"action": "run", "fps": 30, "cyclesPerSecond": N|null}
+    e {"action": "pause"}. Sem cyclesPerSecond roda na velocidade máxima.
+    """
+    await websocket.accept()
+    simulator = pool.get(session)
+    seq = 0
+    runner = None
+
+    async def stream(fps: float, cycles_per_second: float | None):
+        nonlocal seq
+        frame = 1.0 / max(fps, 1)
+        if cycles_per_second:
+            interval = max(frame, 1.0 / cycles_per_second)
+            budget = max(1, int(cycles_per_second * interval))
+        try:
+            try:
+                while simulator.is_running:
+                    start = time.perf_counter()
+                    if cycles_per_second:
+                        # Fora do event loop e limitado ao intervalo: um motor lento
+                        # entrega menos ciclos no quadro em vez de travar o servidor
+                        await asyncio.to_thread(run_locked, simulator, budget, interval)
+                    else:
+                        await asyncio.to_thread(run_locked, simulator, 10_000_000, frame)
+                    delta = simulator.get_delta(seq)
+                    seq = delta["seq"]
+                    await websocket.send_json(delta)
+                    if cycles_per_second:
+                        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+                    else:
+                        await asyncio.sleep(0)
+            except IndexError:
+                simulator.is_running = False
+                await websocket.send_json({"error": "MPC fora da memória de controle."})
+            delta = simulator.get_delta(seq)
+            seq = delta["seq"]
+            await websocket.send_json(delta)
+        finally:
+            # Qualquer saída (erro, cancelamento, socket fechado) deixa a sessão parada
+            simulator.is_running = False
+
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"error": "Mensagem não é JSON válido."})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"error": "Mensagem deve ser um objeto JSON."})
+                continue
+            action = message.get("action")
+            if action == "run" and (runner is None or runner.done()):
+                try:
+                    fps = _stream_number(message, "fps", 30, 1, MAX_STREAM_FPS)
+                    cycles_per_second = _stream_number(message, "cyclesPerSecond", None, MIN_CYCLES_PER_SECOND,
+                                                       MAX_CYCLES_PER_SECOND)
+                except ValueError as e:
+                    await websocket.send_json({"error": str(e)})
+                    continue
+                simulator.is_running = True
+                simulator.stop_flag = False
+                if simulator.cycle_count == 0:
+                    simulator.execution_start_time = time.time()
+                runner = asyncio.create_task(stream(fps, cycles_per_second))
+            elif action == "pause":
+                simulator.is_running = False
+    except WebSocketDisconnect:
+        simulator.is_running = False
+        if runner is not None:
+            runner.cancel()
+
+@app.get("/delta", summary="Obter Estado Incremental")
+def get_delta(since: int = 0, simulator: MIC1 = Depends(get_simulator)):
+    return simulator.get_delta(since)
 
 @app.post("/step", summary="Executar Um Ciclo")
-def execute_step():
+def execute_step(since: int | None = None, simulator: MIC1 = Depends(locked_simulator)):
     # Se o frontend pediu para andar, forçamos o estado de execução
     simulator.is_running = True
     
@@ -79,26 +342,227 @@ def execute_step():
     simulator.stop_flag = False 
     
     simulator.step()
-    return simulator.get_state()
-        
-    simulator.step()
+    if since is not None:
+        return simulator.get_delta(since)
     return simulator.get_state()
 
+@app.post("/step_back", summary="Voltar Ciclos")
+def step_back(control: ControlPayload, simulator: MIC1 = Depends(locked_simulator)):
+    if simulator.time_travel is None:
+        raise HTTPException(status_code=409, detail="Execução reversa desligada (use /time_travel).")
+    stepped = simulator.step_back(max(0, control.value))
+    return {"message": f"{stepped} ciclos desfeitos.", "steppedBack": stepped, "state": simulator.get_state()}
+
+@app.post("/time_travel", summary="Configurar Execução Reversa")
+def set_time_travel(payload: TimeTravelPayload, simulator: MIC1 = Depends(locked_simulator)):
+    if payload.enabled:
+        if payload.window < 1 or payload.checkpoint_interval < 1 or payload.max_checkpoints < 1:
+            raise HTTPException(status_code=400, detail="Parâmetros de execução reversa inválidos.")
+        simulator.enable_time_travel(payload.window, payload.checkpoint_interval, payload.max_checkpoints)
+        return {"message": "Execução reversa ligada."}
+    simulator.disable_time_travel()
+    return {"message": "Execução reversa desligada."}
+
+@app.post("/counters", summary="Ligar/Desligar Contadores de Desempenho")
+def set_counters(payload: CountersPayload, simulator: MIC1 = Depends(locked_simulator)):
+    if payload.enabled:
+        simulator.enable_counters()
+        return {"message": "Contadores de desempenho ligados."}
+    simulator.disable_counters()
+    return {"message": "Contadores de desempenho desligados."}
+
+@app.get("/counters", summary="Contadores de Desempenho")
+def get_counters(histogram: bool = True, simulator: MIC1 = Depends(get_simulator)):
+    counters = simulator.get_counters(histogram)
+    if counters is None:
+        raise HTTPException(status_code=409, detail="Contadores desligados (use POST /counters).")
+    return counters
+
 @app.post("/pause", summary="Pausar Simulação")
-def pause_simulation():
+def pause_simulation(simulator: MIC1 = Depends(get_simulator)):
     simulator.is_running = False
     return {"message": "Simulação pausada.", "state": simulator.get_state()}
 
 @app.post("/reset", summary="Resetar Simulador")
-def reset_simulation():
+def reset_simulation(simulator: MIC1 = Depends(stopped_simulator)):
     simulator.reset()
     return {"message": "Simulador resetado.", "state": simulator.get_state()}
 
 @app.post("/set_breakpoint", summary="Definir Breakpoint")
-def set_breakpoint(control: ControlPayload):
+def set_breakpoint(control: BreakpointPayload, simulator: MIC1 = Depends(locked_simulator)):
+    if control.label is not None:
+        try:
+            address = simulator.set_breakpoint_label(control.label)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Label '{control.label}' não encontrado.")
+        return {"message": f"Breakpoint set at {control.label.upper()} (PC={address})."}
+    if control.value is None:
+        raise HTTPException(status_code=400, detail="Informe 'value' ou 'label'.")
     simulator.breakpoint_pc = control.value
     return {"message": f"Breakpoint set at PC={control.value}."}
 
+@app.get("/breakpoints", summary="Listar Breakpoints e Watchpoints")
+def list_breakpoints(simulator: MIC1 = Depends(get_simulator)):
+    return simulator.breakpoints.to_dict()
+
+@app.post("/breakpoints", summary="Adicionar Breakpoint, Watchpoint ou Condição")
+def add_breakpoint(spec: BreakpointSpecPayload, simulator: MIC1 = Depends(locked_simulator)):
+    breakpoints = simulator.breakpoints
+    result = {}
+    try:
+        if spec.kind == "condition":
+            if spec.reg is None:
+                raise HTTPException(status_code=400, detail="Informe 'reg'.")
+            result["id"] = breakpoints.add_condition(spec.reg, spec.op, spec.value)
+        else:
+            address = spec.address
+            if spec.kind == "pc" and spec.label is not None:
+                address = simulator.program.address_of(spec.label) if simulator.program is not None else None
+                if address is None:
+                    raise HTTPException(status_code=404, detail=f"Label '{spec.label}' não encontrado.")
+            if address is None:
+                raise HTTPException(status_code=400, detail="Informe 'address'.")
+            if spec.kind == "pc":
+                breakpoints.add_pc(address)
+            elif spec.kind == "mpc":
+                breakpoints.add_mpc(address)
+            elif spec.kind == "watch":
+                breakpoints.add_watch(address, spec.read, spec.write)
+            else:
+                raise HTTPException(status_code=400, detail=f"Tipo desconhecido: {spec.kind}")
+            result["address"] = address
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**result, "breakpoints": breakpoints.to_dict()}
+
+@app.delete("/breakpoints/{kind}/{key}", summary="Remover Breakpoint, Watchpoint ou Condição")
+def remove_breakpoint(kind: str, key: int, simulator: MIC1 = Depends(locked_simulator)):
+    breakpoints = simulator.breakpoints
+    if kind == "pc":
+        breakpoints.remove_pc(key)
+    elif kind == "mpc":
+        breakpoints.remove_mpc(key)
+    elif kind == "watch":
+        breakpoints.remove_watch(key)
+    elif kind == "condition":
+        if not breakpoints.remove_condition(key):
+            raise HTTPException(status_code=404, detail="Condição não encontrada.")
+    else:
+        raise HTTPException(status_code=400, detail=f"Tipo desconhecido: {kind}")
+    return {"breakpoints": breakpoints.to_dict()}
+
+@app.delete("/breakpoints", summary="Remover Todos os Breakpoints")
+def clear_breakpoints(simulator: MIC1 = Depends(locked_simulator)):
+    simulator.breakpoints.clear()
+    return {"message": "Breakpoints removidos."}
+
+@app.post("/set_engine", summary="Selecionar Motor de Execução")
+def set_engine(payload: EnginePayload, simulator: MIC1 = Depends(locked_simulator)):
+    try:
+        simulator.set_engine(payload.engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Motor '{payload.engine}' selecionado."}
+
+@app.post("/set_trace", summary="Configurar Histórico de Microinstruções")
+def set_trace(payload: TracePayload, simulator: MIC1 = Depends(locked_simulator)):
+    if payload.depth < 0:
+        raise HTTPException(status_code=400, detail="Profundidade inválida.")
+    simulator.set_trace_depth(payload.depth)
+    return {"message": f"Histórico com {payload.depth} entradas."}
+
+@app.get("/trace", summary="Exportar Histórico de Microinstruções")
+def export_trace(limit: int | None = None, simulator: MIC1 = Depends(get_simulator)):
+    entries = simulator.trace.entries(limit)
+    return {
+        "total": simulator.trace.total,
+        "entries": [
+            {"mpc": mpc, "mir": mir, "text": simulator.describe_microinstruction(mpc, mir)}
+            for mpc, mir in entries
+        ],
+    }
+
+@app.post("/snapshots", summary="Salvar Snapshot do Estado")
+def save_snapshot(payload: SnapshotPayload | None = None, simulator: MIC1 = Depends(locked_simulator)):
+    return snapshots.save(simulator, payload.label if payload else None)
+
+@app.get("/snapshots", summary="Listar Snapshots")
+def list_snapshots():
+    return snapshots.list()
+
+@app.get("/snapshots/{snapshot_id}", summary="Baixar Estado Completo do Snapshot")
+def download_snapshot(snapshot_id: str, simulator: MIC1 = Depends(get_simulator)):
+    state = snapshots.full_state(snapshot_id, simulator)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Snapshot não encontrado.")
+    return Response(content=state, media_type="application/octet-stream")
+
+@app.post("/snapshots/{snapshot_id}/restore", summary="Restaurar Snapshot na Sessão")
+def restore_snapshot(snapshot_id: str, simulator: MIC1 = Depends(stopped_simulator)):
+    try:
+        found = snapshots.restore(snapshot_id, simulator)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail="Snapshot não encontrado.")
+    return {"message": "Snapshot restaurado.", "state": simulator.get_state()}
+
+@app.delete("/snapshots/{snapshot_id}", summary="Apagar Snapshot")
+def delete_snapshot(snapshot_id: str):
+    if not snapshots.delete(snapshot_id):
+        raise HTTPException(status_code=404, detail="Snapshot não encontrado.")
+    return {"message": "Snapshot apagado."}
+
+@app.post("/jobs", summary="Enviar Simulação para Processo Separado")
+def submit_job(payload: JobPayload, simulator: MIC1 = Depends(locked_simulator)):
+    engine = payload.engine or simulator.engine
+    if engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Motor desconhecido: {engine}")
+    job_id = jobs.submit(simulator.export_state(), engine, payload.max_cycles)
+    return {"id": job_id, "status": "pending"}
+
+def _job_or_404(job_id: str) -> dict:
+    info = jobs.status(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return info
+
+@app.get("/jobs/{job_id}", summary="Consultar Job")
+def poll_job(job_id: str):
+    info = _job_or_404(job_id)
+    if "result" in info:
+        result = dict(info["result"])
+        del result["state"]
+        info["result"] = result
+    return info
+
+@app.post("/jobs/{job_id}/apply", summary="Carregar Estado Final do Job na Sessão")
+def apply_job(job_id: str, simulator: MIC1 = Depends(stopped_simulator)):
+    info = _job_or_404(job_id)
+    if info["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job ainda não terminou ({info['status']}).")
+    try:
+        simulator.import_state(info["result"]["state"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Estado do job carregado.", "state": simulator.get_state()}
+
+@app.delete("/jobs/{job_id}", summary="Cancelar Job")
+def cancel_job(job_id: str):
+    _job_or_404(job_id)
+    jobs.cancel(job_id)
+    return {"message": "Cancelamento solicitado."}
+
+@app.get("/sessions", summary="Estatísticas do Pool de Sessões")
+def get_sessions():
+    return pool.stats()
+
+@app.delete("/session", summary="Encerrar Sessão")
+def close_session(session: str = Depends(session_id)):
+    if not pool.drop(session):
+        raise HTTPException(status_code=404, detail="Sessão não encontrada.")
+    return {"message": f"Sessão '{session}' encerrada."}
+
 app.mount("/static", StaticFiles(directory="frontend"), name="static")
 
 # Diz ao servidor para entregar o index.html quando acessar a raiz "/"
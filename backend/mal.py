@@ -0,0 +1,367 @@
+"""
+Microassembler MAL (linguagem de microprogramação do Tanenbaum).
+
+Cada linha é uma microinstrução com enunciados separados por ';':
+
+    0: mar:=pc; rd;
+    pc:=pc + 1; rd;                   # endereço seguinte ao da linha anterior
+    busca: ir:=mbr; if n then goto 28;
+
+Prefixos 'N:' fixam o microendereço e 'nome:' definem labels para os
+goto. Enunciados: 'reg:=expr' (barramento C), 'mbr:=expr', 'alu:=expr'
+(só para N/Z), 'mar:=reg' (barramento B), 'rd', 'wr', 'goto N',
+'if n then goto N' e 'if z then goto N'. Expressões: 'b + a',
+'band(b, a)', 'inv(a)', 'a', opcionalmente dentro de lshift()/rshift();
+'mbr' como operando liga o AMUX. '#' inicia comentário.
+
+O disassembler usa as mesmas tabelas (ALU_FORMS, SHIFT_FORMS,
+COND_FORMS) da montagem, e assemble(disassemble(w)) == canonical(w):
+só os campos sem efeito (C sem ENC, ADDR sem COND, A com AMUX, B sem
+uso, SH = 3) são zerados.
+
+Arquivo binário da memória de controle (.mcs): cabeçalho CS_HEADER
+(magic, versão, entradas, CRC32) seguido de uma CS_ENTRY por entrada:
+a palavra e os 13 campos já decodificados, na ordem de decode_inst.
+MIC1 carrega na inicialização a memória de controle indicada em
+MIC1_CONTROL_STORE (.mcs, .mal ou layout .json):
+
+    python -m backend.mal asm rapido.mal -o rapido.mcs
+    MIC1_CONTROL_STORE=rapido.mcs python -m backend.bench
+"""
+import argparse
+import os
+import re
+import struct
+import sys
+import zlib
+from .microcode import (CONTROL_STORE, decode_inst, make_inst, build_decode_table,
+                        ALU_ADD, ALU_AND, ALU_PASS_A, ALU_INV_A, SHIFT_NO, SHIFT_RIGHT, SHIFT_LEFT,
+                        COND_NO, COND_N, COND_Z, COND_ALWAYS)
+
+CONTROL_STORE_SIZE = 512
+
+# Nomes dos registradores como aparecem no MAL (índice = endereço no barramento)
+REGISTER_NAMES = ("pc", "ac", "sp", "ir", "tir", "0", "1", "(-1)",
+                  "amask", "smask", "a", "b", "c", "d", "e", "f")
+OPERANDS = {name: index for index, name in enumerate(REGISTER_NAMES)}
+OPERANDS.update({"-1": 7, "+1": 6})
+# Operando do lado A vindo do MBR (AMUX = 1)
+MBR = -1
+
+# Gramática: {b} e {a} são as entradas da ALU, {} o operando do shifter/desvio
+ALU_FORMS = {
+    ALU_ADD: "{b} + {a}",
+    ALU_AND: "band({b}, {a})",
+    ALU_PASS_A: "{a}",
+    ALU_INV_A: "inv({a})",
+}
+SHIFT_FORMS = {
+    SHIFT_RIGHT: "rshift({})",
+    SHIFT_LEFT: "lshift({})",
+    SHIFT_NO: "{}",
+}
+COND_FORMS = {
+    COND_N: "if n then goto {}",
+    COND_Z: "if z then goto {}",
+    COND_ALWAYS: "goto {}",
+}
+
+# Binário da memória de controle
+CS_MAGIC = b"MIC1CS"
+CS_VERSION = 1
+CS_HEADER = struct.Struct("<6sBHI")
+CS_ENTRY = struct.Struct("<I13B")
+
+class MalError(ValueError):
+    pass
+
+# --- Padrões gerados das formas (comparados sem espaços) ---
+
+_OPERAND = r"\(-1\)|[-+]?1|[a-z]+|\d+"
+
+def _form_pattern(form: str, groups: dict):
+    regex = re.escape(form.replace(" ", ""))
+    for name, group in groups.items():
+        regex = regex.replace(re.escape("{" + name + "}"), group)
+    return re.compile(regex)
+
+_ALU_PATTERNS = [(alu, _form_pattern(form, {"a": f"(?P<a>{_OPERAND})", "b": f"(?P<b>{_OPERAND})"}))
+                 for alu, form in ALU_FORMS.items()]
+_SHIFT_PATTERNS = [(sh, _form_pattern(form, {"": "(?P<e>.+)"}))
+                   for sh, form in SHIFT_FORMS.items() if sh != SHIFT_NO]
+_COND_PATTERNS = [(cond, _form_pattern(form, {"": r"(?P<t>\w+)"})) for cond, form in COND_FORMS.items()]
+_ASSIGNMENT = re.compile(r"(?P<dest>[^:]+):=(?P<expr>.+)")
+_PREFIX = re.compile(r"\s*([a-z_]\w*|\d+)\s*:(?!=)")
+
+# --- Disassembler ---
+
+def canonical(word: int) -> int:
+    """A palavra com os campos sem efeito zerados (forma que assemble produz)"""
+    amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, addr = decode_inst(word)
+    if not enc:
+        c = 0
+    if cond == COND_NO:
+        addr = 0
+    if amux:
+        a = 0
+    if alu in (ALU_PASS_A, ALU_INV_A) and not mar:
+        b = 0
+    if sh not in SHIFT_FORMS:
+        sh = SHIFT_NO
+    return make_inst(addr, a, b, c, enc, wr, rd, mar, mbr, sh, alu, cond, amux)
+
+def disassemble(word: int) -> str:
+    """Texto MAL de uma palavra do MIR ("mar:=pc; rd;")"""
+    amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, addr = decode_inst(word)
+    expression = SHIFT_FORMS.get(sh, "{}").format(
+        ALU_FORMS[alu].format(a="mbr" if amux else REGISTER_NAMES[a], b=REGISTER_NAMES[b]))
+    statements = []
+    if mar:
+        statements.append(f"mar:={REGISTER_NAMES[b]}")
+    if enc:
+        statements.append(f"{REGISTER_NAMES[c]}:={expression}")
+    if mbr:
+        statements.append(f"mbr:={expression}")
+    # ALU sem destino: escrita quando testada ou quando difere do padrão (ADD de pc/barramento B)
+    unused = not enc and not mbr
+    default_alu = alu == ALU_ADD and not amux and a == 0 and sh == SHIFT_NO and (mar or b == 0)
+    if unused and (cond in (COND_N, COND_Z) or not default_alu or not (mar or rd or wr or cond)):
+        statements.append(f"alu:={expression}")
+    if rd:
+        statements.append("rd")
+    if wr:
+        statements.append("wr")
+    if cond != COND_NO:
+        statements.append(COND_FORMS[cond].format(addr))
+    return "; ".join(statements) + ";"
+
+def disassemble_store(store) -> str:
+    """Fonte MAL de uma memória de controle inteira (entradas vazias omitidas)"""
+    lines = [f"# {len(store)} entradas"]
+    lines += [f"{mpc}: {disassemble(word)}" for mpc, word in enumerate(store) if word]
+    return "\n".join(lines) + "\n"
+
+# --- Assembler ---
+
+def _operand(text: str) -> int:
+    if text == "mbr":
+        return MBR
+    if text not in OPERANDS:
+        raise MalError(f"registrador '{text}' desconhecido")
+    return OPERANDS[text]
+
+def parse_expression(text: str) -> tuple:
+    """(sh, alu, b, a) de uma expressão; b/a são índices de registrador, MBR ou None"""
+    text = text.replace(" ", "")
+    sh = SHIFT_NO
+    for shift, pattern in _SHIFT_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            sh, text = shift, match.group("e")
+            break
+    for alu, pattern in _ALU_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            groups = match.groupdict()
+            b = _operand(groups["b"]) if "b" in groups else None
+            return sh, alu, b, _operand(groups["a"])
+    raise MalError(f"expressão '{text}' inválida")
+
+def _encode(statements: list[str], labels: dict) -> int:
+    c = enc = mbr = rd = wr = cond = addr = 0
+    expression = None
+    mar_source = None
+    for statement in statements:
+        text = statement.replace(" ", "")
+        if text in ("rd", "wr"):
+            rd, wr = (1, wr) if text == "rd" else (rd, 1)
+            continue
+        for condition, pattern in _COND_PATTERNS:
+            match = pattern.fullmatch(text)
+            if match:
+                if cond:
+                    raise MalError("mais de um desvio na mesma microinstrução")
+                cond, addr = condition, _target(match.group("t"), labels)
+                break
+        else:
+            match = _ASSIGNMENT.fullmatch(text)
+            if not match:
+                raise MalError(f"enunciado '{statement}' inválido")
+            dest, source = match.group("dest"), match.group("expr")
+            if dest == "mar":
+                mar_source = _operand(source)
+                if mar_source == MBR:
+                    raise MalError("mar só recebe um registrador (barramento B)")
+                continue
+            parsed = parse_expression(source)
+            if expression is not None and parsed != expression:
+                raise MalError("expressões diferentes na mesma microinstrução")
+            expression = parsed
+            if dest == "mbr":
+                mbr = 1
+            elif dest != "alu":
+                if enc:
+                    raise MalError("dois destinos no barramento C")
+                enc, c = 1, _operand(dest)
+                if c == MBR:
+                    raise MalError(f"destino '{dest}' inválido")
+
+    sh, alu, b, a = expression if expression is not None else (SHIFT_NO, ALU_ADD, None, 0)
+    commutative = alu in (ALU_ADD, ALU_AND)
+    # MBR só entra pelo lado A (AMUX); ADD e AND podem trocar os operandos
+    if b == MBR:
+        if a == MBR or not commutative:
+            raise MalError("mbr só pode ser um dos operandos")
+        a, b = b, a
+    if mar_source is not None:
+        if b is None or b == mar_source:
+            b = mar_source
+        elif commutative and a == mar_source:
+            a, b = b, a
+        else:
+            raise MalError("mar precisa do mesmo registrador do barramento B da ALU")
+    amux = int(a == MBR)
+    return make_inst(addr, 0 if amux else a, b or 0, c, enc, wr, rd, int(mar_source is not None),
+                     mbr, sh, alu, cond, amux)
+
+def _target(text: str, labels: dict) -> int:
+    address = int(text) if text.isdigit() else labels.get(text)
+    if address is None:
+        raise MalError(f"label '{text}' não encontrado")
+    if not 0 <= address <= 0xFF:
+        raise MalError(f"destino {address} fora do campo ADDR (0-255)")
+    return address
+
+def assemble_line(text: str, labels: dict | None = None) -> int:
+    """Palavra do MIR de uma linha MAL sem prefixos ("mar:=pc; rd;")"""
+    statements = [part.strip() for part in text.lower().split(";") if part.strip()]
+    return _encode(statements, labels or {})
+
+def assemble(source: str, size: int = CONTROL_STORE_SIZE) -> tuple[list[int] | None, str | None]:
+    """Monta uma fonte MAL numa memória de controle de 'size' entradas"""
+    lines = []
+    labels = {}
+    address = 0
+    # Passo 1: endereços e labels
+    for line_number, raw in enumerate(source.splitlines(), start=1):
+        text = raw.split("#", 1)[0].lower()
+        while True:
+            match = _PREFIX.match(text)
+            if not match:
+                break
+            prefix = match.group(1)
+            if prefix.isdigit():
+                address = int(prefix)
+            elif prefix in labels:
+                return None, f"Erro na linha {line_number}: label '{prefix}' duplicado."
+            else:
+                labels[prefix] = address
+            text = text[match.end():]
+        statements = [part.strip() for part in text.split(";") if part.strip()]
+        if statements:
+            lines.append((line_number, address, statements))
+            address += 1
+
+    # Passo 2: codificação
+    store = [0] * size
+    defined = {}
+    for line_number, address, statements in lines:
+        if address >= size:
+            return None, f"Erro na linha {line_number}: microendereço {address} fora da memória de controle."
+        if address in defined:
+            return None, f"Erro na linha {line_number}: microendereço {address} já definido na linha {defined[address]}."
+        defined[address] = line_number
+        try:
+            store[address] = _encode(statements, labels)
+        except MalError as e:
+            return None, f"Erro na linha {line_number}: {e}."
+    return store, None
+
+# --- Arquivo binário ---
+
+def write_control_store(path: str, store, decoded=None):
+    """Grava a memória de controle com a decodificação pronta"""
+    decoded = decoded or build_decode_table(store)
+    payload = b"".join(CS_ENTRY.pack(word, *fields) for word, fields in zip(store, decoded))
+    with open(path, "wb") as output:
+        output.write(CS_HEADER.pack(CS_MAGIC, CS_VERSION, len(store), zlib.crc32(payload)))
+        output.write(payload)
+
+def read_control_store(path: str) -> tuple[list[int], tuple]:
+    """(palavras, tabela decodificada) de um arquivo .mcs, sem redecodificar"""
+    with open(path, "rb") as input_file:
+        data = input_file.read()
+    if len(data) < CS_HEADER.size:
+        raise ValueError(f"{path}: arquivo de memória de controle truncado")
+    magic, version, entries, checksum = CS_HEADER.unpack_from(data)
+    payload = data[CS_HEADER.size:]
+    if magic != CS_MAGIC or version != CS_VERSION:
+        raise ValueError(f"{path}: não é uma memória de controle MIC-1 (versão {CS_VERSION})")
+    if len(payload) != entries * CS_ENTRY.size or zlib.crc32(payload) != checksum:
+        raise ValueError(f"{path}: memória de controle corrompida")
+    store, decoded = [], []
+    for entry in CS_ENTRY.iter_unpack(payload):
+        store.append(entry[0])
+        decoded.append(entry[1:])
+    return store, tuple(decoded)
+
+def load_control_store_file(path: str) -> tuple[list[int], tuple | None]:
+    """Memória de controle de um .mal, layout .json ou binário (.mcs)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".mal":
+        with open(path, encoding="utf-8") as source_file:
+            store, error = assemble(source_file.read())
+        if error:
+            raise ValueError(f"{path}: {error}")
+        return store, None
+    if extension == ".json":
+        from .microanalysis import load_layout
+        return load_layout(path), None
+    return read_control_store(path)
+
+_env_store = {}
+
+def control_store_from_env() -> tuple[list[int], tuple | None] | None:
+    """Memória de controle de MIC1_CONTROL_STORE (lida uma vez por caminho) ou None"""
+    path = os.environ.get("MIC1_CONTROL_STORE")
+    if not path:
+        return None
+    if path not in _env_store:
+        _env_store[path] = load_control_store_file(path)
+    return _env_store[path]
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Microassembler/disassembler MAL do MIC-1.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    asm = commands.add_parser("asm", help="monta uma fonte MAL")
+    asm.add_argument("source", help="arquivo .mal")
+    asm.add_argument("--output", "-o", required=True, help="arquivo .mcs (binário) ou .json (layout)")
+    dis = commands.add_parser("disasm", help="gera a fonte MAL de uma memória de controle")
+    dis.add_argument("store", nargs="?", help=".mcs/.json/.mal (padrão: CONTROL_STORE de microcode.py)")
+    dis.add_argument("--output", "-o", help="arquivo .mal (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    if args.command == "asm":
+        try:
+            store, _ = load_control_store_file(args.source)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        if args.output.endswith(".json"):
+            from .microanalysis import save_layout
+            save_layout(store, args.output)
+        else:
+            write_control_store(args.output, store)
+        return 0
+
+    store = load_control_store_file(args.store)[0] if args.store else CONTROL_STORE
+    text = disassemble_store(store)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+Análise estática e otimização do microprograma.
+
+Monta o grafo de controle das 512 entradas da memória de controle e
+relata: entradas alcançáveis a partir do MPC 0, entradas definidas
+inalcançáveis, desvios para entradas vazias ou para fora da memória,
+o pior caminho (em microciclos) do MPC 0 de volta ao 0 e o caminho de
+cada opcode. Também confere o fonte de microcode.py (entradas
+atribuídas mais de uma vez) e MICRO_MNEMONICS contra a memória.
+
+O otimizador gera um novo layout de mesmo tamanho, carregável com
+MIC1.load_control_store, com duas passadas:
+
+- encadeamento de desvios: quem desvia para um 'goto X' sem efeito
+  algum passa a desviar direto para X;
+- estados de espera redundantes: no simulador a memória responde no
+  ciclo seguinte ao RD/WR, então uma microinstrução que só repete o
+  RD (ou WR) de todos os seus predecessores, sem outro efeito, é
+  retirada do caminho (os predecessores desviam para o sucessor dela),
+  exceto quando o sucessor é o MPC 0.
+
+As entradas retiradas continuam na memória (inalcançáveis).
+
+    python -m backend.microanalysis --optimize --emit otimizado.json
+"""
+import argparse
+import ast
+import json
+import sys
+from .microcode import CONTROL_STORE, decode_inst, make_inst, COND_NO, COND_ALWAYS
+from .assembler import OPCODE_MAP, FULL_OPCODE_MAP
+from .isa import opcode_word, trace_path
+from .mal import disassemble_store, write_control_store, load_control_store_file
+
+# Valores de AC usados para os caminhos por opcode (zero, positivo, negativo)
+PATH_AC_VALUES = (0, 1, -1)
+
+def successors(address: int, word: int) -> list[int]:
+    """Próximos microendereços possíveis (len(store) = sai da memória)"""
+    cond, jump = decode_inst(word)[1], word & 0xFF
+    if cond == COND_NO:
+        return [address + 1]
+    if cond == COND_ALWAYS:
+        return [jump]
+    return [address + 1, jump] if jump != address + 1 else [jump]
+
+def build_cfg(store) -> list[list[int]]:
+    return [successors(address, word) for address, word in enumerate(store)]
+
+def reachable(store, cfg=None) -> set[int]:
+    cfg = cfg or build_cfg(store)
+    seen = {0}
+    pending = [0]
+    while pending:
+        address = pending.pop()
+        for target in cfg[address]:
+            if target < len(store) and target not in seen:
+                seen.add(target)
+                pending.append(target)
+    return seen
+
+def predecessors(store, cfg=None, within: set[int] | None = None) -> dict[int, list[int]]:
+    cfg = cfg or build_cfg(store)
+    preds = {}
+    for address, targets in enumerate(cfg):
+        if within is not None and address not in within:
+            continue
+        for target in targets:
+            preds.setdefault(target, []).append(address)
+    return preds
+
+def worst_case_path(store, cfg=None) -> dict:
+    """
+    Caminho mais longo do MPC 0 até voltar ao 0. Caminhos que saem da
+    memória de controle não contam; um laço que não passa pelo 0 torna
+    o pior caso ilimitado.
+    """
+    cfg = cfg or build_cfg(store)
+    size = len(store)
+    best = {}          # endereço -> (ciclos até voltar ao 0, próximo) ou None
+    on_stack = set()
+    loops = []
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * size))
+
+    def longest(address):
+        if address in best:
+            return best[address]
+        if address in on_stack:
+            loops.append(address)
+            return None
+        on_stack.add(address)
+        result = None
+        for target in cfg[address]:
+            if target == 0:
+                candidate = (1, None)
+            elif target >= size:
+                continue
+            else:
+                rest = longest(target)
+                if rest is None:
+                    continue
+                candidate = (rest[0] + 1, target)
+            if result is None or candidate[0] > result[0]:
+                result = candidate
+        on_stack.discard(address)
+        best[address] = result
+        return result
+
+    result = longest(0)
+    if result is None:
+        return {"cycles": None, "path": [], "loops": sorted(set(loops))}
+    path, address = [0], result[1]
+    while address is not None:
+        path.append(address)
+        address = best[address][1]
+    return {"cycles": result[0], "path": path, "loops": sorted(set(loops))}
+
+def opcode_paths(store) -> dict:
+    """Caminho de cada instrução da ISA (rodando o microprograma) para AC = 0, 1 e -1"""
+    report = {}
+    for mnemonic in [*OPCODE_MAP, *FULL_OPCODE_MAP]:
+        word = opcode_word(mnemonic)
+        entry = {}
+        for ac in PATH_AC_VALUES:
+            path = trace_path(store, word, ac)
+            entry[f"ac={ac}"] = {"cycles": len(path[0]), "path": list(path[0])} if path else None
+        report[mnemonic] = entry
+    return report
+
+def lint_source(path: str | None = None) -> dict:
+    """Entradas de CONTROL_STORE atribuídas mais de uma vez no fonte (com as linhas)"""
+    if path is None:
+        from . import microcode
+        path = microcode.__file__
+    with open(path, encoding="utf-8") as source_file:
+        tree = ast.parse(source_file.read(), path)
+    lines = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if (isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name)
+                    and target.value.id == "CONTROL_STORE" and isinstance(target.slice, ast.Constant)):
+                lines.setdefault(target.slice.value, []).append(node.lineno)
+    return {str(address): found for address, found in sorted(lines.items()) if len(found) > 1}
+
+def lint_mnemonics(store, reached: set[int]) -> dict:
+    """MICRO_MNEMONICS (cpu.py) contra a memória de controle"""
+    from .cpu import MICRO_MNEMONICS
+    return {
+        "forEmptyEntries": sorted(mpc for mpc in MICRO_MNEMONICS if store[mpc] == 0),
+        "reachableWithout": sorted(mpc for mpc in reached if mpc not in MICRO_MNEMONICS and store[mpc] != 0),
+    }
+
+def analyze(store=CONTROL_STORE, source_lint: bool = True) -> dict:
+    cfg = build_cfg(store)
+    reached = reachable(store, cfg)
+    size = len(store)
+    report = {
+        "entries": size,
+        "defined": sum(1 for word in store if word),
+        "reachable": len(reached),
+        "unreachableDefined": sorted(address for address, word in enumerate(store) if word and address not in reached),
+        "emptyTargets": sorted({(source, target) for source in reached for target in cfg[source]
+                                if target < size and store[target] == 0 and store[source] != 0}),
+        "fallsOff": sorted(address for address in reached if any(target >= size for target in cfg[address])),
+        "worstCase": worst_case_path(store, cfg),
+        "opcodes": opcode_paths(store),
+    }
+    if source_lint and store is CONTROL_STORE:
+        report["duplicateAssignments"] = lint_source()
+        report["mnemonics"] = lint_mnemonics(store, reached)
+    return report
+
+# --- Otimização ---
+
+def _is_pure_goto(word: int) -> bool:
+    amux, cond, alu, sh, mbr, mar, rd, wr, enc, *_ = decode_inst(word)
+    return cond == COND_ALWAYS and not (mbr or mar or rd or wr or enc)
+
+def _wait_kind(word: int) -> str | None:
+    """'rd'/'wr' se a microinstrução só repete o acesso à memória (sem desvio condicional)"""
+    amux, cond, alu, sh, mbr, mar, rd, wr, enc, *_ = decode_inst(word)
+    if mbr or mar or enc or cond not in (COND_NO, COND_ALWAYS) or rd == wr:
+        return None
+    return "rd" if rd else "wr"
+
+def _retarget(word: int, address: int, old: int, new: int) -> int | None:
+    """Faz a microinstrução em address seguir para new em vez de old (None se não der)"""
+    amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, jump = decode_inst(word)
+    if new > 0xFF:
+        return None
+    if cond == COND_NO and old == address + 1:
+        cond = COND_ALWAYS
+    elif cond == COND_ALWAYS and jump == old:
+        pass
+    elif jump == old and old != address + 1:
+        pass                        # desvio condicional: troca só o alvo
+    else:
+        return None                 # queda condicional para old não tem como ser desviada
+    return make_inst(new, a, b, c, enc, wr, rd, mar, mbr, sh, alu, cond, amux)
+
+def thread_jumps(store) -> list[str]:
+    """Desvios para 'goto X' sem efeito passam a ir direto para X"""
+    changes = []
+    reached = reachable(store)
+    for address in sorted(reached):
+        for target in successors(address, store[address]):
+            if target == address or target >= len(store) or not _is_pure_goto(store[target]):
+                continue
+            final = store[target] & 0xFF
+            word = _retarget(store[address], address, target, final)
+            if word is not None and word != store[address]:
+                store[address] = word
+                changes.append(f"{address}: desvio para {target} encadeado direto para {final}")
+    return changes
+
+def remove_wait_states(store) -> list[str]:
+    """Retira RD/WR de espera cujos predecessores já fizeram o mesmo acesso"""
+    changes = []
+    reached = reachable(store)
+    preds = predecessors(store, within=reached)
+    for address in sorted(reached):
+        if address == 0:
+            continue
+        kind = _wait_kind(store[address])
+        sources = preds.get(address, [])
+        if kind is None or not sources:
+            continue
+        bit = 22 if kind == "rd" else 21
+        if not all((store[source] >> bit) & 1 and source != address for source in sources):
+            continue
+        following = successors(address, store[address])[0]
+        # Antes do MPC 0 o acesso tem que terminar dentro da instrução
+        # (halt, breakpoints e o modo ISA olham a memória na fronteira)
+        if following >= len(store) or following == 0:
+            continue
+        updated = {source: _retarget(store[source], source, address, following) for source in sources}
+        if any(word is None for word in updated.values()):
+            continue
+        for source, word in updated.items():
+            store[source] = word
+        changes.append(f"{address}: espera de {kind.upper()} retirada (predecessores {sources} seguem para {following})")
+        reached = reachable(store)
+        preds = predecessors(store, within=reached)
+    return changes
+
+def optimize(store=CONTROL_STORE) -> tuple[list[int], list[str]]:
+    """Novo layout otimizado (lista de palavras) e a descrição das mudanças"""
+    optimized = list(store)
+    changes = []
+    while True:
+        step = thread_jumps(optimized) + remove_wait_states(optimized)
+        if not step:
+            return optimized, changes
+        changes += step
+
+def save_layout(store, path: str):
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump({"controlStore": [f"0x{word:08X}" for word in store]}, output, indent=1)
+        output.write("\n")
+
+def load_layout(path: str) -> list[int]:
+    """Layout gerado por save_layout/--emit, pronto para MIC1.load_control_store"""
+    with open(path, encoding="utf-8") as layout_file:
+        words = json.load(layout_file)["controlStore"]
+    return [int(word, 16) if isinstance(word, str) else int(word) for word in words]
+
+def _emit(store, path: str):
+    if path.endswith(".mal"):
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(disassemble_store(store))
+    elif path.endswith(".mcs"):
+        write_control_store(path, store)
+    else:
+        save_layout(store, path)
+
+# --- Relatório em texto ---
+
+def _opcode_table(paths: dict, reference: dict | None = None) -> list[str]:
+    lines = []
+    for mnemonic, entry in paths.items():
+        cells = []
+        for key, result in entry.items():
+            text = str(result["cycles"]) if result else "-"
+            if reference is not None:
+                old = reference[mnemonic][key]
+                if old and result and old["cycles"] != result["cycles"]:
+                    text = f"{old['cycles']}->{result['cycles']}"
+            cells.append(f"{key}: {text:>6}")
+        lines.append(f"  {mnemonic:<5} " + "  ".join(cells))
+    return lines
+
+def format_report(report: dict, optimized: dict | None = None, changes: list[str] | None = None) -> str:
+    lines = [
+        f"Entradas: {report['entries']}  definidas: {report['defined']}  alcançáveis: {report['reachable']}",
+        f"Definidas inalcançáveis: {report['unreachableDefined'] or '-'}",
+        f"Desvios para entradas vazias: {report['emptyTargets'] or '-'}",
+        f"Saem da memória de controle: {report['fallsOff'] or '-'}",
+    ]
+    worst = report["worstCase"]
+    if worst["cycles"] is None:
+        lines.append("Pior caso: ilimitado")
+    else:
+        lines.append(f"Pior caso: {worst['cycles']} microciclos ({' -> '.join(map(str, worst['path']))})")
+    if worst["loops"]:
+        lines.append(f"Laços sem passar pelo MPC 0 em: {worst['loops']}")
+    if "duplicateAssignments" in report:
+        duplicates = ", ".join(f"{address} (linhas {lines_})" for address, lines_ in report["duplicateAssignments"].items())
+        lines.append(f"Atribuídas mais de uma vez em microcode.py: {duplicates or '-'}")
+        lines.append(f"MICRO_MNEMONICS para entradas vazias: {report['mnemonics']['forEmptyEntries'] or '-'}")
+        lines.append(f"Alcançáveis sem MICRO_MNEMONICS: {report['mnemonics']['reachableWithout'] or '-'}")
+    lines.append("Microciclos por instrução ('-' = não volta ao MPC 0):")
+    if optimized is None:
+        lines += _opcode_table(report["opcodes"])
+    else:
+        lines += _opcode_table(optimized["opcodes"], report["opcodes"])
+    if changes is not None:
+        lines.append(f"Otimizações ({len(changes)}):")
+        lines += [f"  {change}" for change in changes] or ["  -"]
+    return "\n".join(lines)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analisa (e otimiza) o microprograma do MIC-1.")
+    parser.add_argument("--store", help="memória de controle .json/.mal/.mcs a analisar (padrão: CONTROL_STORE de microcode.py)")
+    parser.add_argument("--optimize", action="store_true", help="gera o layout otimizado e compara os caminhos")
+    parser.add_argument("--emit", help="grava o layout otimizado neste arquivo (.json, .mal ou .mcs)")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    store = load_control_store_file(args.store)[0] if args.store else CONTROL_STORE
+    report = analyze(store)
+    optimized_report = changes = None
+    if args.optimize or args.emit:
+        optimized, changes = optimize(store)
+        optimized_report = analyze(optimized, source_lint=False)
+        if args.emit:
+            _emit(optimized, args.emit)
+
+    if args.format == "json":
+        result = {"analysis": report}
+        if optimized_report is not None:
+            result.update(optimized=optimized_report, changes=changes)
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(format_report(report, optimized_report, changes))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
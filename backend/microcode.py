@@ -42,6 +42,29 @@ def make_inst(addr_jump, bus_a, bus_b, bus_c, enc, wr, rd, mar, mbr, sh, alu, co
     word |= (amux & 0x1) << 31
     return word
 
+def decode_inst(word):
+    """Separa a palavra de 32 bits (MIR) em seus campos, na ordem do MIR:
+    (amux, cond, alu, sh, mbr, mar, rd, wr, enc, c, b, a, addr)"""
+    return (
+        (word >> 31) & 0x1,
+        (word >> 29) & 0x3,
+        (word >> 27) & 0x3,
+        (word >> 25) & 0x3,
+        (word >> 24) & 0x1,
+        (word >> 23) & 0x1,
+        (word >> 22) & 0x1,
+        (word >> 21) & 0x1,
+        (word >> 20) & 0x1,
+        (word >> 16) & 0xF,
+        (word >> 12) & 0xF,
+        (word >> 8) & 0xF,
+        word & 0xFF,
+    )
+
+def build_decode_table(control_store):
+    """Pré-decodifica toda a memória de controle (uma tupla de campos por endereço)"""
+    return tuple(decode_inst(word) for word in control_store)
+
 CONTROL_STORE = [0] * 512
 
 # MICROPROGRAMA (Baseado no MIC-1 Tanenbaum)
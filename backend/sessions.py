@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from .cpu import MIC1
+
+DEFAULT_SESSION = "default"
+
+class SimulatorPool:
+    """
+    Simuladores por sessão, criados sob demanda.
+    Ordem LRU: ao passar de max_size a sessão usada há mais tempo é
+    descartada; sessões sem uso por idle_timeout segundos também.
+    """
+    def __init__(self, max_size: int = 64, idle_timeout: float = 1800.0):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.sessions = OrderedDict()   # session_id -> [MIC1, último uso]
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> MIC1:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                entry = [MIC1(), now]
+                self.sessions[session_id] = entry
+                while len(self.sessions) > self.max_size:
+                    self._evict_oldest()
+            else:
+                entry[1] = now
+                self.sessions.move_to_end(session_id)
+            return entry[0]
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self.sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        entry[0].is_running = False
+        return True
+
+    def _evict_oldest(self):
+        _, (simulator, _) = self.sessions.popitem(last=False)
+        # Interrompe um /run que ainda esteja usando a instância
+        simulator.is_running = False
+        self.evictions += 1
+
+    def _evict_idle(self, now: float):
+        while self.sessions:
+            simulator, last_used = next(iter(self.sessions.values()))
+            if now - last_used < self.idle_timeout:
+                break
+            self._evict_oldest()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self.sessions),
+                "maxSize": self.max_size,
+                "idleTimeoutSeconds": self.idle_timeout,
+                "evictions": self.evictions,
+            }
+
+def pool_from_env() -> SimulatorPool:
+    """Pool configurado por MIC1_MAX_SESSIONS e MIC1_SESSION_TIMEOUT (segundos)"""
+    return SimulatorPool(
+        max_size=int(os.environ.get("MIC1_MAX_SESSIONS", 64)),
+        idle_timeout=float(os.environ.get("MIC1_SESSION_TIMEOUT", 1800)),
+    )
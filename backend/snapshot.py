@@ -0,0 +1,119 @@
+"""
+Snapshots do estado da máquina.
+
+O blob guarda o cabeçalho, os registradores e os breakpoints de
+MIC1.export_state() e, da memória, só os blocos de 32 palavras que diferem da imagem do
+programa carregado (MIC1.program_image). As imagens-base são
+compartilhadas entre snapshots do mesmo programa.
+"""
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from .cpu import STATE_HEADER, state_head_size
+
+SNAPSHOT_MAGIC = b"MIC1SNP"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<7sBIH")    # magic, versão, crc32 da base, nº de blocos
+BLOCK_WORDS = 32
+BLOCK_BYTES = 2 * BLOCK_WORDS
+BLOCK_INDEX = struct.Struct("<H")
+
+def encode_snapshot(cpu, base: bytes) -> bytes:
+    """Snapshot delta de cpu em relação à imagem base"""
+    state = cpu.export_state()
+    head_size = state_head_size(state, cpu.register_file.size)
+    memory = memoryview(state)[head_size:]
+    blocks = []
+    for offset in range(0, len(memory), BLOCK_BYTES):
+        block = memory[offset:offset + BLOCK_BYTES]
+        if block != base[offset:offset + BLOCK_BYTES]:
+            blocks.append(BLOCK_INDEX.pack(offset // BLOCK_BYTES))
+            blocks.append(block)
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(base), len(blocks) // 2)
+    return header + state[:head_size] + b"".join(blocks)
+
+def decode_snapshot(cpu, blob: bytes, base: bytes) -> bytes:
+    """Reconstrói o estado completo (formato de export_state) a partir do delta"""
+    magic, version, base_crc, block_count = SNAPSHOT_HEADER.unpack_from(blob)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Snapshot inválido.")
+    if zlib.crc32(base) != base_crc:
+        raise ValueError("Snapshot não corresponde à imagem base.")
+
+    position = SNAPSHOT_HEADER.size
+    head_size = state_head_size(blob[position:position + STATE_HEADER.size], cpu.register_file.size)
+    state = bytearray(blob[position:position + head_size])
+    position += head_size
+    memory = bytearray(base)
+    for _ in range(block_count):
+        index = BLOCK_INDEX.unpack_from(blob, position)[0] * BLOCK_BYTES
+        position += BLOCK_INDEX.size
+        memory[index:index + BLOCK_BYTES] = blob[position:position + BLOCK_BYTES]
+        position += BLOCK_BYTES
+    return bytes(state + memory)
+
+class SnapshotStore:
+    """Snapshots em memória (LRU limitado), compartilhados entre sessões"""
+    def __init__(self, max_snapshots: int = 256):
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()   # id -> {"blob", "base", metadados}
+        self._bases = {}                 # crc32 -> imagem base compartilhada
+        self._lock = threading.Lock()
+
+    def save(self, cpu, label: str | None = None) -> dict:
+        base = cpu.program_image
+        blob = encode_snapshot(cpu, base)
+        with self._lock:
+            base = self._bases.setdefault(zlib.crc32(base), base)
+            snapshot_id = uuid.uuid4().hex[:12]
+            info = {
+                "id": snapshot_id,
+                "label": label,
+                "created": time.time(),
+                "cycleCount": cpu.cycle_count,
+                "pc": cpu.pc.read(),
+                "mpc": cpu.mpc.read(),
+                "sizeBytes": len(blob),
+            }
+            self.snapshots[snapshot_id] = {"blob": blob, "base": base, "info": info}
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+            self._drop_unused_bases()
+            return info
+
+    def restore(self, snapshot_id: str, cpu) -> bool:
+        """Restaura o snapshot em cpu (pode ser outra sessão: fork do experimento)"""
+        with self._lock:
+            entry = self.snapshots.get(snapshot_id)
+            if entry is None:
+                return False
+            self.snapshots.move_to_end(snapshot_id)
+        cpu.import_state(decode_snapshot(cpu, entry["blob"], entry["base"]))
+        cpu.program_image = entry["base"]
+        return True
+
+    def full_state(self, snapshot_id: str, cpu) -> bytes | None:
+        """Estado completo e autocontido (formato de export_state) para download"""
+        entry = self.snapshots.get(snapshot_id)
+        if entry is None:
+            return None
+        return decode_snapshot(cpu, entry["blob"], entry["base"])
+
+    def delete(self, snapshot_id: str) -> bool:
+        with self._lock:
+            if self.snapshots.pop(snapshot_id, None) is None:
+                return False
+            self._drop_unused_bases()
+            return True
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [entry["info"] for entry in self.snapshots.values()]
+
+    def _drop_unused_bases(self):
+        used = {id(entry["base"]) for entry in self.snapshots.values()}
+        for crc in [crc for crc, base in self._bases.items() if id(base) not in used]:
+            del self._bases[crc]
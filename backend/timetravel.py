@@ -0,0 +1,125 @@
+"""
+Execução reversa (voltar N ciclos).
+
+Antes de cada microciclo guarda um registro de desfazer: o banco de
+registradores (38 bytes), MIR, flags, latches de memória e a palavra de
+memória que o WR pendente vai sobrescrever, que são os únicos efeitos
+colaterais de um ciclo. A janela de desfazer é limitada; para ir além
+dela há checkpoints periódicos (export_state), restaurados e
+reexecutados até o ciclo pedido.
+
+O histórico de microinstruções e os contadores de desempenho voltam
+junto: cada ciclo desfeito sai do histórico e dos contadores, e cada
+checkpoint guarda uma cópia dos contadores. Só o trace binário em
+arquivo e o tempo de host medido não voltam.
+"""
+from array import array
+from collections import deque
+from .breakpoints import Breakpoints
+from .components import RegisterFile
+from .trace import MicroTrace
+
+class TimeTravel:
+    def __init__(self, window: int = 10_000, checkpoint_interval: int = 10_000, max_checkpoints: int = 100):
+        self.window = window
+        self.checkpoint_interval = checkpoint_interval
+        self.undo = deque(maxlen=window)
+        # (cycle_count, estado, (contadores, cópia) ou None)
+        self.checkpoints = deque(maxlen=max_checkpoints)
+
+    def clear(self):
+        self.undo.clear()
+        self.checkpoints.clear()
+
+    def record(self, cpu):
+        """Chamado no início de cada microciclo, antes de qualquer efeito"""
+        if not self.checkpoints or cpu.cycle_count - self.checkpoints[-1][0] >= self.checkpoint_interval:
+            self.checkpoint(cpu)
+        mem = cpu.main_memory
+        old_word = (mem.address_latch, mem.data[mem.address_latch]) if mem.write_enable else None
+        counters = cpu.counters
+        if counters is not None:
+            counters = (counters, counters.current_key, counters.fetch_cycle)
+        self.undo.append((
+            cpu.register_file.data.tobytes(), cpu.mir, cpu.n_flag, cpu.z_flag,
+            cpu.latch_a, cpu.latch_b, mem.read_enable, mem.write_enable,
+            mem.address_latch, old_word, cpu.halted, cpu.trace.enabled, counters,
+        ))
+
+    def checkpoint(self, cpu):
+        """Checkpoint no ciclo atual (também chamado ao ligar os contadores)"""
+        counters = cpu.counters
+        if counters is not None:
+            counters = (counters, counters.snapshot())
+        self.checkpoints.append((cpu.cycle_count, cpu.export_state(), counters))
+
+    def _undo_one(self, cpu):
+        (regs, cpu.mir, cpu.n_flag, cpu.z_flag, cpu.latch_a, cpu.latch_b, read_enable,
+         write_enable, address_latch, old_word, cpu.halted, traced, counters) = self.undo.pop()
+        next_mpc = cpu.register_file.data[RegisterFile.MPC]
+        cpu.register_file.data[:] = array('h', regs)
+        mem = cpu.main_memory
+        mem.read_enable = read_enable
+        mem.write_enable = write_enable
+        mem.address_latch = address_latch
+        if old_word is not None:
+            address, value = old_word
+            mem.data[address] = value
+            mem.mark_dirty(address)
+        if traced:
+            cpu.trace.unrecord()
+        cpu.cycle_count -= 1
+        # Contadores ligados depois deste ciclo (ou religados, zerados) não o viram
+        if counters is not None and counters[0] is cpu.counters:
+            perf, current_key, fetch_cycle = counters
+            perf.unexecute(cpu.register_file.data[RegisterFile.MPC], next_mpc,
+                           current_key, fetch_cycle, cpu.cycle_count)
+
+    def step_back(self, cpu, count: int) -> int:
+        """Volta count microciclos (limitado ao que foi guardado). Retorna quantos voltou"""
+        count = min(count, cpu.cycle_count)
+        if count <= len(self.undo):
+            for _ in range(count):
+                self._undo_one(cpu)
+            return count
+
+        # Fora da janela: checkpoint mais recente antes do alvo + reexecução
+        target = cpu.cycle_count - count
+        while self.checkpoints and self.checkpoints[-1][0] > target:
+            self.checkpoints.pop()
+        if not self.checkpoints:
+            # Mais antigo do que o guardado: volta só o que a janela permite
+            return self.step_back(cpu, len(self.undo)) if self.undo else 0
+
+        start_cycles = cpu.cycle_count
+        checkpoint_cycle, state, saved_counters = self.checkpoints.pop()
+        recorder, cpu.recorder = cpu.recorder, None
+        counters, cpu.counters = cpu.counters, None
+        trace, cpu.trace = cpu.trace, MicroTrace(0)
+        running, stopped = cpu.is_running, cpu.stop_flag
+        cpu.time_travel = None          # import_state -> reset() não deve limpar o histórico,
+        breakpoints = cpu.breakpoints   # os contadores, o trace nem os breakpoints;
+        cpu.breakpoints = Breakpoints(cpu.main_memory, len(cpu.control_store))
+        cpu.import_state(state)
+        cpu.breakpoints.clear()         # a reexecução roda sem breakpoints
+        cpu.time_travel = self
+        self.undo.clear()
+
+        # Histórico e contadores voltam ao checkpoint e acompanham a reexecução
+        trace.unrecord(start_cycles - checkpoint_cycle)
+        cpu.trace = trace
+        if counters is not None:
+            if saved_counters is not None and saved_counters[0] is counters:
+                counters.restore(saved_counters[1])
+                cpu.counters = counters
+            else:
+                # Ligados depois do checkpoint (ligar cria um): no alvo ainda não existiam
+                counters.clear()
+        for _ in range(target - checkpoint_cycle):
+            cpu.step_micro()
+        cpu.breakpoints = breakpoints
+        breakpoints.attach()
+        cpu.is_running, cpu.stop_flag = running, stopped
+        cpu.recorder = recorder
+        cpu.counters = counters
+        return start_cycles - cpu.cycle_count
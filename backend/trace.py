@@ -0,0 +1,172 @@
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+class MicroTrace:
+    """
+    Histórico de microinstruções em buffer circular de capacidade fixa.
+    Guarda só os inteiros (MPC, MIR); a formatação em texto fica para
+    quem lê (get_state, exportação do trace).
+    """
+    def __init__(self, depth: int = 50):
+        self.set_depth(depth)
+
+    def set_depth(self, depth: int):
+        """Redimensiona o buffer (descarta o conteúdo). depth 0 desliga o trace"""
+        self.capacity = max(depth, 0)
+        self.enabled = self.capacity > 0
+        self.mpcs = array('H', bytes(2 * self.capacity))
+        self.mirs = array('L', [0] * self.capacity)
+        self.clear()
+
+    def clear(self):
+        self.position = 0
+        self.total = 0
+        self.size = 0
+
+    def record(self, mpc: int, mir: int):
+        i = self.position
+        self.mpcs[i] = mpc
+        self.mirs[i] = mir
+        i += 1
+        self.position = i if i < self.capacity else 0
+        self.total += 1
+        if self.size < self.capacity:
+            self.size += 1
+
+    def unrecord(self, count: int = 1):
+        """
+        Descarta os count registros mais recentes (execução reversa). Os
+        que o buffer já tinha sobrescrito só saem da contagem total
+        """
+        dropped = min(count, self.size)
+        if dropped:
+            self.position = (self.position - dropped) % self.capacity
+            self.size -= dropped
+        self.total = max(0, self.total - count)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def entries(self, limit: int | None = None) -> list[tuple[int, int]]:
+        """Registros (mpc, mir) do mais recente para o mais antigo"""
+        count = len(self) if limit is None else min(limit, len(self))
+        result = []
+        i = self.position
+        for _ in range(count):
+            i = (i - 1) % self.capacity
+            result.append((self.mpcs[i], self.mirs[i]))
+        return result
+
+# --- Trace completo em arquivo binário ---
+
+TRACE_MAGIC = b"MIC1TRC"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<7sBH")
+
+# ciclo, MPC, MIR, barramento C, registrador escrito, endereço e valor
+# do acesso à memória, flags (ver TRACE_*)
+TRACE_RECORD = struct.Struct("<QHIhBHhB")
+
+NO_REGISTER = 0xFF
+TRACE_MEM_READ = 0x01
+TRACE_MEM_WRITE = 0x02
+TRACE_MBR_LOAD = 0x04
+TRACE_N = 0x08
+TRACE_Z = 0x10
+
+TraceRecord = namedtuple("TraceRecord", "cycle mpc mir c_bus register mem_address mem_value flags")
+
+class TraceRecorder:
+    """Grava um registro de tamanho fixo por microciclo, com escrita bufferizada"""
+    def __init__(self, path: str, buffer_size: int = 1 << 20):
+        self.path = path
+        self.file = open(path, "wb", buffering=buffer_size)
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_RECORD.size))
+        self.count = 0
+        self._pack = TRACE_RECORD.pack
+
+    def record(self, cycle, mpc, mir, c_bus, register, mem_address, mem_value, flags):
+        self.file.write(self._pack(cycle, mpc, mir, c_bus, register, mem_address, mem_value, flags))
+        self.count += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+class TraceReader:
+    """Lê um trace via mmap: acesso por índice e busca binária por ciclo"""
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = TRACE_HEADER.unpack_from(self._map)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or record_size != TRACE_RECORD.size:
+            self.close()
+            raise ValueError(f"Arquivo de trace inválido: {path}")
+        self._count = (len(self._map) - TRACE_HEADER.size) // TRACE_RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> TraceRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("registro fora do trace")
+        return TraceRecord._make(TRACE_RECORD.unpack_from(self._map, TRACE_HEADER.size + index * TRACE_RECORD.size))
+
+    def _cycle_at(self, index: int) -> int:
+        return struct.unpack_from("<Q", self._map, TRACE_HEADER.size + index * TRACE_RECORD.size)[0]
+
+    def seek_cycle(self, cycle: int) -> int:
+        """Índice do primeiro registro com ciclo >= cycle"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._cycle_at(middle) < cycle:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, start_cycle: int = 0, count: int | None = None):
+        """Itera os registros a partir de start_cycle (replay)"""
+        index = self.seek_cycle(start_cycle)
+        end = self._count if count is None else min(self._count, index + count)
+        for i in range(index, end):
+            yield self[i]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Mostra registros de um trace binário do MIC-1.")
+    parser.add_argument("path")
+    parser.add_argument("--cycle", type=int, default=0, help="primeiro ciclo a mostrar")
+    parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with TraceReader(args.path) as reader:
+        print(f"{len(reader)} registros")
+        for rec in reader.records(args.cycle, args.count):
+            register = "-" if rec.register == NO_REGISTER else f"R{rec.register}"
+            access = ""
+            if rec.flags & TRACE_MEM_READ:
+                access = f" RD[{rec.mem_address}]={rec.mem_value}"
+            elif rec.flags & TRACE_MEM_WRITE:
+                access = f" WR[{rec.mem_address}]={rec.mem_value}"
+            print(f"{rec.cycle:>10} mpc={rec.mpc:<3} mir={rec.mir:08X} c={rec.c_bus:<6} {register}{access}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+/ Soma de vetor: 64 palavras a partir de 200, indexadas reescrevendo
+/ o operando das instruções STOD/ADDD (código automodificável)
+        LOCO 1
+        STOD ONE
+        LOCO 64
+        STOD LEN
+        LODD BASES
+        STOD STOI
+        LODD LEN
+        STOD I
+INIT:   LODD I
+STOI:   STOD 200
+        LODD STOI
+        ADDD ONE
+        STOD STOI
+        LODD I
+        SUBD ONE
+        STOD I
+        JNZE INIT
+OUTER:  LOCO 0
+        STOD SUM
+        LODD LEN
+        STOD I
+        LODD BASEA
+        STOD ADDI
+LOOP:   LODD SUM
+ADDI:   ADDD 200
+        STOD SUM
+        LODD ADDI
+        ADDD ONE
+        STOD ADDI
+        LODD I
+        SUBD ONE
+        STOD I
+        JNZE LOOP
+        JUMP OUTER
+BASES:  STOD 200
+BASEA:  ADDD 200
@@ -0,0 +1,15 @@
+/ Carga mista: passa por quase todos os ramos da árvore de decodificação
+        LOCO 7
+        STOD SEVEN
+LOOP:   LOCO 3
+        ADDD SEVEN
+        STOD X
+        SUBD SEVEN
+        PUSH
+        LODL 0
+        ADDL 0
+        POP
+        LODD X
+        JNZE SKIP
+        LOCO 0
+SKIP:   JUMP LOOP
@@ -0,0 +1,21 @@
+/ Pilha: empilha 16 valores e desempilha somando os dois do topo
+        LOCO 1
+        STOD ONE
+START:  LOCO 16
+        STOD N
+PUSHL:  LODD N
+        PUSH
+        SUBD ONE
+        STOD N
+        JNZE PUSHL
+        LOCO 16
+        STOD N
+POPL:   LODL 0
+        ADDL 1
+        STOD T
+        POP
+        LODD N
+        SUBD ONE
+        STOD N
+        JNZE POPL
+        JUMP START
@@ -0,0 +1,10 @@
+/ Laço apertado: contador decrescente com JNZE
+        LOCO 1
+        STOD ONE
+START:  LOCO 1000
+        STOD N
+LOOP:   LODD N
+        SUBD ONE
+        STOD N
+        JNZE LOOP
+        JUMP START
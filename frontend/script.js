@@ -2,6 +2,18 @@ document.addEventListener('DOMContentLoaded', () => {
     // URL base da nossa API Python
     const API_BASE_URL = 'http://127.0.0.1:8000';
 
+    // Cada aba usa seu próprio simulador no servidor
+    let sessionId = sessionStorage.getItem('mic1-session');
+    if (!sessionId) {
+        sessionId = crypto.randomUUID();
+        sessionStorage.setItem('mic1-session', sessionId);
+    }
+
+    function apiFetch(path, options = {}) {
+        const headers = { ...(options.headers || {}), 'X-Session-Id': sessionId };
+        return fetch(`${API_BASE_URL}${path}`, { ...options, headers });
+    }
+
     // --- Elementos da UI ---
     const assemblyInput = document.getElementById('assembly-input');
     const compiledOutput = document.getElementById('compiled-output');
@@ -12,6 +24,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const pauseBtn = document.getElementById('pause-btn');
     const resetBtn = document.getElementById('reset-btn');
     const nextStepBtn = document.getElementById('next-step-btn');
+    const prevStepBtn = document.getElementById('prev-step-btn');
     
     const speedInput = document.getElementById('speed-input');
     const breakpointInput = document.getElementById('breakpoint-input');
@@ -19,9 +32,14 @@ document.addEventListener('DOMContentLoaded', () => {
 
     let simInterval = null;
 
+    // Estado local e último seq recebido (respostas incrementais do /step)
+    let currentState = null;
+    let lastSeq = 0;
+
     // --- FUNÇÃO PRINCIPAL DE ATUALIZAÇÃO DA UI ---
     function updateUI(state) {
         if (!state) return;
+        currentState = state;
 
         // 1. Atualiza a tabela de registradores
         const registersBody = document.getElementById('registers-table-body');
@@ -58,13 +76,31 @@ document.addEventListener('DOMContentLoaded', () => {
         document.getElementById('micro-history-box').innerHTML = state.microHistory.join('<br>');
     }
 
+    // Aplica uma resposta incremental (/step?since=N) sobre o estado local
+    function applyDelta(delta) {
+        lastSeq = delta.seq;
+        if (delta.full || !currentState) {
+            updateUI(delta.state);
+            return;
+        }
+        Object.assign(currentState.registers, delta.registers);
+        currentState.flags = delta.flags;
+        currentState.simulation = delta.simulation;
+        currentState.microHistory = delta.microHistory.concat(currentState.microHistory).slice(0, 50);
+        delta.memoryView.forEach(cell => {
+            const index = currentState.memoryView.findIndex(mem => mem.address === cell.address);
+            if (index >= 0) currentState.memoryView[index] = cell;
+        });
+        updateUI(currentState);
+    }
+
     // --- FUNÇÕES DE CONTROLE DA API ---
 
     // 1. Montar o código
     montarBtn.addEventListener('click', async () => {
         const sourceCode = assemblyInput.value;
         try {
-            const response = await fetch(`${API_BASE_URL}/assemble`, {
+            const response = await apiFetch(`/assemble`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ source: sourceCode })
@@ -95,10 +131,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
         try {
             // ... (o resto da função continua igual) ...
-            const response = await fetch(`${API_BASE_URL}/load`, {
+            const response = await apiFetch(`/load`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ bytecode: bytecodeInts })
+                body: JSON.stringify({ bytecode: bytecodeInts, source: assemblyInput.value })
             });
             const data = await response.json();
             if (!response.ok) throw new Error(data.detail);
@@ -113,10 +149,10 @@ document.addEventListener('DOMContentLoaded', () => {
     // Função de passo a passo
     async function executeStep() {
         try {
-            const response = await fetch(`${API_BASE_URL}/step`, { method: 'POST' });
-            const state = await response.json();
-            updateUI(state);
-            if (!state.simulation.isRunning && simInterval) {
+            const response = await apiFetch(`/step?since=${lastSeq}`, { method: 'POST' });
+            const delta = await response.json();
+            applyDelta(delta);
+            if (!currentState.simulation.isRunning && simInterval) {
                 clearInterval(simInterval);
                 simInterval = null;
             }
@@ -127,22 +163,83 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     nextStepBtn.addEventListener('click', executeStep);
 
-    // Botões Play/Pause/Reset... (sem alterações)
+    // Volta um ciclo (execução reversa no servidor). A execução reversa só é
+    // ligada no primeiro uso: ligada, todo ciclo grava o registro de desfazer
+    // e os modos ISA/bloco voltam a andar microciclo a microciclo.
+    prevStepBtn.addEventListener('click', async () => {
+        try {
+            const response = await apiFetch('/step_back', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ value: 1 })
+            });
+            const data = await response.json();
+            // 409 também é 'simulação em andamento'; só liga se a reversa está desligada
+            if (response.status === 409 && data.detail.includes('/time_travel')) {
+                const enabled = await apiFetch('/time_travel', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ enabled: true })
+                });
+                if (!enabled.ok) throw new Error((await enabled.json()).detail);
+                alert('Execução reversa ligada: os ciclos executados a partir de agora podem ser desfeitos.');
+                return;
+            }
+            if (!response.ok) throw new Error(data.detail);
+            updateUI(data.state);
+        } catch (error) {
+            console.error('Erro ao voltar o ciclo:', error);
+        }
+    });
+
+    // Play/Pause: execução no servidor via WebSocket, com quadros limitados a 30 fps
+    let simSocket = null;
+
+    function stopSocket() {
+        if (simSocket) {
+            simSocket.close();
+            simSocket = null;
+        }
+    }
+
     playBtn.addEventListener('click', () => {
-        if (simInterval) return;
-        const speed = parseInt(speedInput.value) || 200;
-        simInterval = setInterval(executeStep, speed);
+        if (simSocket) return;
+        const speed = parseInt(speedInput.value);
+        // Velocidade em ms por ciclo; 0 ou vazio = velocidade máxima
+        const cyclesPerSecond = speed > 0 ? 1000 / speed : null;
+
+        simSocket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/run?session=${encodeURIComponent(sessionId)}`);
+        simSocket.onopen = () => {
+            simSocket.send(JSON.stringify({ action: 'run', fps: 30, cyclesPerSecond }));
+        };
+        simSocket.onmessage = (event) => {
+            const frame = JSON.parse(event.data);
+            if (frame.error) {
+                alert('Erro na simulação: ' + frame.error);
+                return;
+            }
+            applyDelta(frame);
+            if (!currentState.simulation.isRunning) stopSocket();
+        };
+        simSocket.onerror = (error) => {
+            console.error('Erro no WebSocket da simulação:', error);
+            stopSocket();
+        };
     });
     pauseBtn.addEventListener('click', () => {
+        if (simSocket && simSocket.readyState === WebSocket.OPEN) {
+            simSocket.send(JSON.stringify({ action: 'pause' }));
+        }
         if (simInterval) {
             clearInterval(simInterval);
             simInterval = null;
         }
     });
     resetBtn.addEventListener('click', async () => {
+        stopSocket();
         if (simInterval) clearInterval(simInterval);
         simInterval = null;
-        const response = await fetch(`${API_BASE_URL}/reset`, { method: 'POST' });
+        const response = await apiFetch(`/reset`, { method: 'POST' });
         const data = await response.json();
         updateUI(data.state);
         compiledOutput.value = ''; // Limpa a caixa de compilado
@@ -162,7 +259,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         }
 
-        await fetch(`${API_BASE_URL}/set_breakpoint`, {
+        await apiFetch(`/set_breakpoint`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ value: pcValue })
@@ -178,7 +275,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Carregar estado inicial
     async function getInitialState() {
         try {
-            const response = await fetch(`${API_BASE_URL}/status`);
+            const response = await apiFetch(`/status`);
             const state = await response.json();
             updateUI(state);
         } catch (error) {
@@ -0,0 +1,219 @@
+"""
+Programas e utilitários compartilhados pelos testes de equivalência.
+
+Cada motor ou otimização é comparado com o motor interpretado ('interp'),
+a referência de semântica, nas fronteiras de instrução (MPC == 0): PC,
+AC, SP, IR, MAR, MBR, latches da memória, memória inteira e contagem
+de ciclos.
+"""
+import functools
+import os
+import random
+from backend.assembler import assemble
+from backend.components import RegisterFile
+from backend.cpu import MIC1
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+PROGRAMS = {
+    "loop": """
+LOCO 10
+STOD N
+LOOP: LODD N
+SUBD ONE
+STOD N
+JNZE LOOP
+LOCO 0
+JUMP END
+END: JUMP END
+ONE: LOCO 1
+""",
+    "stack": """
+LOCO 5
+PUSH
+LOCO 7
+PUSH
+POP
+ADDL 0
+LODL 1
+STOL 0
+SUBL 0
+POP
+SWAP
+JUMP 0
+""",
+    "mixed": """
+LOCO 100
+STOD X
+LODD X
+ADDD X
+SUBD X
+JPOS 0
+JZER 0
+JNEG 0
+CALL 0
+INSP 3
+DESP 2
+RETN
+PSHI
+POPI
+""",
+    # Código automodificável: STOD numa instrução adiante
+    "patch_ahead": """
+LOCO 5
+STOD N
+LODD INC
+STOD NEXT
+NEXT: LOCO 1
+LODD N
+FIM: JUMP FIM
+INC: LOCO 77
+""",
+    # Laço que reescreve o próprio operando a cada volta
+    "patch_loop": """
+LOCO 100
+STOD N
+L: LODD N
+SUBD ONE
+STOD N
+LODD OP
+ADDD ONE
+STOD OP
+OP: LOCO 0
+LODD N
+JNZE L
+FIM: JUMP FIM
+ONE: LOCO 1
+""",
+    # PUSH sobre o próprio código (SP dá a volta para o fim da memória)
+    "push_over_code": """
+LOCO 7
+STOD X
+LOCO 10
+PUSH
+PUSH
+PUSH
+LODD X
+FIM: JUMP FIM
+""",
+}
+
+# Opcodes do gerador aleatório: os com atalho no modo ISA e alguns sem
+_RANDOM_OPCODES = (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0x8, 0x9, 0xA, 0xD)
+_RANDOM_STACK_WORDS = (0xF400, 0xF600, 0xF500, 0xF700, 0xFA00)
+
+def random_program(seed: int, length: int = 64) -> list[int]:
+    """Palavras aleatórias, na maioria instruções com operandos dentro do programa"""
+    rng = random.Random(seed)
+    words = []
+    for _ in range(length):
+        if rng.random() < 0.8:
+            opcode = rng.choice(_RANDOM_OPCODES + (0xF,))
+            if opcode == 0xF:
+                word = rng.choice(_RANDOM_STACK_WORDS) | rng.randrange(256)
+            elif opcode in (0x4, 0x5, 0x6, 0xD):
+                word = (opcode << 12) | rng.randrange(length)
+            elif opcode in (0x0, 0x1, 0x2, 0x3):
+                word = (opcode << 12) | rng.randrange(length + 16)
+            else:
+                word = (opcode << 12) | rng.randrange(4096)
+        else:
+            word = rng.randrange(0x10000)
+        words.append(word)
+    return words
+
+def benchmark_programs() -> dict[str, list[int]]:
+    programs = {}
+    for name in sorted(os.listdir(BENCH_DIR)):
+        if name.endswith(".asm"):
+            with open(os.path.join(BENCH_DIR, name), encoding="utf-8") as source_file:
+                bytecode, error = assemble(source_file.read())
+            assert error is None, f"{name}: {error}"
+            programs[os.path.splitext(name)[0]] = bytecode
+    return programs
+
+# Ciclos por programa: benchmarks e escritos à mão vão até o halt (ou perto)
+MAX_CYCLES = 20_000
+RANDOM_MAX_CYCLES = 2_000
+
+def corpus(random_count: int = 300) -> list[tuple[str, list[int], int]]:
+    """(nome, bytecode, limite de ciclos): escritos à mão, benchmarks e aleatórios"""
+    programs = []
+    for name, source in PROGRAMS.items():
+        bytecode, error = assemble(source)
+        assert error is None, f"{name}: {error}"
+        programs.append((name, bytecode, MAX_CYCLES))
+    programs += [(f"bench_{name}", bytecode, MAX_CYCLES) for name, bytecode in benchmark_programs().items()]
+    programs += [(f"random{seed}", random_program(seed), RANDOM_MAX_CYCLES) for seed in range(random_count)]
+    return programs
+
+CORPUS = corpus()
+
+_MACHINES = {}
+
+def machine(engine: str, words: list[int], control_store=None) -> MIC1:
+    """Máquina com o programa carregado; reaproveitada por motor (o JIT compila na criação)"""
+    key = (engine, None if control_store is None else tuple(control_store))
+    cpu = _MACHINES.get(key)
+    if cpu is None:
+        cpu = _MACHINES[key] = MIC1(engine=engine, trace_depth=0)
+        if control_store is not None:
+            cpu.load_control_store(control_store)
+    # load_program reseta a máquina inteira (registradores, memória, caches)
+    cpu.load_program(words)
+    cpu.is_running = True
+    return cpu
+
+def architectural_state(cpu: MIC1) -> tuple:
+    """
+    O que tem de bater entre motores: PC, AC, SP, IR, MAR, MBR, latches
+    da memória (endereço, RD/WR pendentes), memória inteira e ciclos
+    """
+    regs = cpu.register_file.data
+    mem = cpu.main_memory
+    return (regs[0], regs[1], regs[2], regs[3], regs[RegisterFile.MAR], regs[RegisterFile.MBR],
+            mem.address_latch, mem.read_enable, mem.write_enable, bytes(mem.data), cpu.cycle_count)
+
+def boundary_states(engine: str, words: list[int], max_cycles: int = MAX_CYCLES, control_store=None) -> tuple:
+    """
+    Executa step a step (um ciclo, instrução ou bloco, conforme o motor)
+    até o halt, um erro (MPC fora da memória de controle) ou max_cycles.
+    Devolve ({ciclo: estado} em cada fronteira de instrução, houve erro,
+    ciclo final).
+    """
+    cpu = machine(engine, words, control_store)
+    regs = cpu.register_file.data
+    states = {}
+    error = False
+    while cpu.cycle_count < max_cycles:
+        try:
+            cpu.step()
+        except IndexError:
+            error = True
+            break
+        if regs[RegisterFile.MPC] == 0:
+            states[cpu.cycle_count] = architectural_state(cpu)
+            if cpu.is_halted():
+                break
+    return states, error, cpu.cycle_count
+
+@functools.lru_cache(maxsize=None)
+def reference_boundaries(name: str) -> tuple:
+    """Fronteiras do motor interpretado para um programa do corpus (calculadas uma vez)"""
+    for program, words, max_cycles in CORPUS:
+        if program == name:
+            return boundary_states("interp", words, max_cycles)
+    raise KeyError(name)
+
+def assert_same_boundaries(reference: tuple, candidate: tuple, name: str, max_cycles: int = MAX_CYCLES):
+    """Toda fronteira do candidato existe na referência, com o mesmo estado, e os dois param juntos"""
+    expected, expected_error, expected_end = reference
+    got, got_error, got_end = candidate
+    for cycle, state in got.items():
+        if cycle > expected_end:
+            # O último passo do candidato passou do limite da referência
+            break
+        assert cycle in expected, f"{name}: ciclo {cycle} não é fronteira de instrução no interp"
+        assert state == expected[cycle], f"{name}: estado diferente no ciclo {cycle}"
+    if expected_end < max_cycles and got_end < max_cycles:
+        assert (got_error, got_end) == (expected_error, expected_end), f"{name}: paradas diferentes"
@@ -0,0 +1,163 @@
+"""Montador (backend.assembler): diretivas, erros e cache de montagens"""
+import pytest
+from backend.assembler import assemble, assemble_program, AssemblyCache, MEMORY_SIZE, MAX_ERRORS
+
+OVERFLOW = f"o programa passa de {MEMORY_SIZE} palavras (tamanho da memória)."
+
+def test_word_values_and_symbols():
+    image, error = assemble_program("INICIO: .word 1, -1, 0x7FFF, FIM\nFIM: JUMP FIM\n")
+    assert error is None
+    assert image.bytecode == (1, 0xFFFF, 0x7FFF, 4, 0x6004)
+    assert image.labels == {"INICIO": 0, "FIM": 4}
+    assert image.source_lines == (1, 1, 1, 1, 2)
+
+@pytest.mark.parametrize("args", ["", "1,,2", "1, "])
+def test_word_needs_values(args):
+    assert assemble(f".word {args}\n") == (None, "Erro na linha 1: .word precisa de valores separados por vírgula.")
+
+def test_word_undefined_symbol():
+    assert assemble(".word NADA\n") == (None, "Erro na linha 1: 'NADA' não encontrado.")
+
+def test_space_reserves_zeros():
+    image, error = assemble_program("LOCO 5\nBUF: .space 3\nDEPOIS: .word 9\n")
+    assert error is None
+    assert image.bytecode == (0x7005, 0, 0, 0, 9)
+    assert image.labels == {"BUF": 1, "DEPOIS": 4}
+    assert image.source_lines == (1, 2, 2, 2, 3)
+    assert assemble(".space 0\n") == ([], None)
+    assert assemble(".space 0x2\n") == ([0, 0], None)
+
+@pytest.mark.parametrize("args", ["", "-1", "dez", "1 2"])
+def test_space_needs_count(args):
+    expected = f"Erro na linha 1: .space precisa de um número de palavras ('{args}')."
+    assert assemble(f".space {args}\n") == (None, expected)
+
+def test_variables_follow_code_and_data():
+    image, error = assemble_program("LODD X\nSTOD Y\nADDD X\nDADOS: .space 2\n")
+    assert error is None
+    assert image.variables == {"X": 5, "Y": 6}
+    assert (image.variables_start, image.variables_end) == (5, 7)
+    assert image.bytecode[:3] == (0x0005, 0x1006, 0x2005)
+
+def test_duplicate_and_numeric_labels():
+    _, error = assemble_program("A: LOCO 1\na: LOCO 2\n12: LOCO 3\n")
+    assert error == ("Erro na linha 2: Label 'A' duplicado ou numérico.\n"
+                     "Erro na linha 3: Label '12' duplicado ou numérico.")
+
+def test_undefined_label():
+    assert assemble("JUMP LONGE\n") == (None, "Erro na linha 1: 'LONGE' não encontrado.")
+
+def test_unknown_mnemonic_and_immediate():
+    _, error = assemble_program("PULA 1\nINSP X\n")
+    assert error == ("Erro na linha 1: Mnemônico 'PULA' desconhecido.\n"
+                     "Erro na linha 2: INSP precisa de um número ('X').")
+
+def test_errors_are_capped():
+    _, error = assemble_program("XYZ\n" * (MAX_ERRORS + 3))
+    lines = error.split("\n")
+    assert len(lines) == MAX_ERRORS + 1
+    assert lines[-1] == "... e mais 3 erros."
+
+# --- Tamanho da memória ---
+
+def test_program_filling_memory():
+    image, error = assemble_program(f".space {MEMORY_SIZE - 1}\nFIM: JUMP FIM\n")
+    assert error is None
+    assert len(image.bytecode) == MEMORY_SIZE
+
+@pytest.mark.parametrize("source, line", [
+    (f".space {MEMORY_SIZE + 1}\n", 1),
+    (f".space {MEMORY_SIZE}\nLOCO 1\n", 2),
+    (f".space {MEMORY_SIZE - 1}\n.word 1, 2\n", 2),
+    ("LOCO 1\n" * MEMORY_SIZE + "LOCO 2\nLOCO 3\n", MEMORY_SIZE + 1),
+    (".space 20000000\n", 1),
+])
+def test_memory_overflow(source, line):
+    assert assemble(source) == (None, f"Erro na linha {line}: {OVERFLOW}")
+
+def test_overflow_stops_at_first_error():
+    """Erros anteriores ficam; nada depois do estouro é montado"""
+    _, error = assemble_program(f"XYZ\n.space {MEMORY_SIZE + 1}\nABC\n")
+    assert error == f"Erro na linha 1: Mnemônico 'XYZ' desconhecido.\nErro na linha 2: {OVERFLOW}"
+
+def test_variables_past_memory():
+    _, error = assemble_program(f"LODD X\n.space {MEMORY_SIZE - 1}\n")
+    assert error == f"Erro: o programa ocupa {MEMORY_SIZE + 1} palavras (a memória tem {MEMORY_SIZE})."
+
+# --- .include ---
+
+def test_include(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "dados.asm").write_text("UM: .word 1\n.include \"mais.asm\"\n")
+    (tmp_path / "lib" / "mais.asm").write_text("DOIS: .word 2\n")
+    source = "LODD UM\n.include \"lib/dados.asm\"\nADDD DOIS\n"
+    image, error = assemble_program(source, str(tmp_path))
+    assert error is None
+    assert image.bytecode == (0x0001, 1, 2, 0x2002)
+    # Palavras incluídas apontam para a linha do .include no fonte principal
+    assert image.source_lines == (1, 2, 2, 3)
+
+def test_include_not_allowed_without_dir():
+    assert assemble(".include \"x.asm\"\n") == (None, "Erro na linha 1: .include não é permitido aqui.")
+
+def test_include_missing_file(tmp_path):
+    _, error = assemble_program(".include \"nada.asm\"\n", str(tmp_path))
+    assert error.startswith("Erro na linha 1: não foi possível incluir 'nada.asm' (")
+
+def test_include_recursive(tmp_path):
+    (tmp_path / "a.asm").write_text("LOCO 1\n.include \"a.asm\"\n")
+    _, error = assemble_program(".include \"a.asm\"\n", str(tmp_path))
+    assert error == "Erro na linha 2 de a.asm: .include recursivo de 'a.asm'."
+
+def test_include_errors_name_the_file(tmp_path):
+    (tmp_path / "ruim.asm").write_text("LOCO 1\nXYZ\n")
+    _, error = assemble_program(".include \"ruim.asm\"\n", str(tmp_path))
+    assert error == "Erro na linha 2 de ruim.asm: Mnemônico 'XYZ' desconhecido."
+
+def test_include_overflow(tmp_path):
+    (tmp_path / "grande.asm").write_text(f".space {MEMORY_SIZE}\n")
+    _, error = assemble_program("LOCO 1\n.include \"grande.asm\"\n", str(tmp_path))
+    assert error == f"Erro na linha 1 de grande.asm: {OVERFLOW}"
+
+# --- AssemblyCache ---
+
+def test_cache_hits_and_misses():
+    cache = AssemblyCache()
+    first = cache.lookup("LOCO 1\n")
+    assert cache.lookup("LOCO 1\n") is first
+    cache.lookup("LOCO 2\n")
+    assert cache.stats() == {"entries": 2, "maxEntries": 512, "hits": 1, "misses": 2, "hitRate": 1 / 3}
+
+def test_cache_keeps_errors():
+    cache = AssemblyCache()
+    assert cache.lookup("XYZ\n") == (None, "Erro na linha 1: Mnemônico 'XYZ' desconhecido.")
+    cache.lookup("XYZ\n")
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+def test_cache_evicts_least_recently_used():
+    cache = AssemblyCache(max_entries=2)
+    cache.lookup("LOCO 1\n")
+    cache.lookup("LOCO 2\n")
+    cache.lookup("LOCO 1\n")          # LOCO 2 passa a ser o mais antigo
+    cache.lookup("LOCO 3\n")
+    assert cache.stats()["entries"] == 2
+    cache.lookup("LOCO 1\n")
+    assert cache.stats()["hits"] == 2
+    cache.lookup("LOCO 2\n")
+    assert cache.stats()["misses"] == 4
+
+def test_cache_skips_large_sources():
+    cache = AssemblyCache(max_source_bytes=16)
+    source = "LOCO 1\n" * 3
+    image, error = cache.lookup(source)
+    assert error is None and len(image.bytecode) == 3
+    cache.lookup(source)
+    assert cache.stats()["entries"] == 0
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 2)
+
+def test_cache_clear():
+    cache = AssemblyCache()
+    cache.lookup("LOCO 1\n")
+    cache.lookup("LOCO 1\n")
+    cache.clear()
+    assert cache.stats() == {"entries": 0, "maxEntries": 512, "hits": 0, "misses": 0, "hitRate": 0.0}
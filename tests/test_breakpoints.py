@@ -0,0 +1,146 @@
+"""Paradas por breakpoint, watchpoint e condição, em todos os motores"""
+import pytest
+from backend.assembler import assemble_program
+from backend.cpu import MIC1
+
+ENGINES = ["interp", "jit", "isa", "block"]
+
+# X conta de 1 a 10; AGAIN só é alcançado enquanto X < 10
+SOURCE = """
+LOCO 0
+LOOP: ADDD ONE
+STOD X
+LODD X
+SUBD TEN
+JNEG AGAIN
+FIM: JUMP FIM
+AGAIN: LODD X
+JUMP LOOP
+ONE: .word 1
+TEN: .word 10
+"""
+IMAGE, _ = assemble_program(SOURCE)
+AGAIN = IMAGE.labels["AGAIN"]
+X = IMAGE.variables["X"]
+
+def machine(engine: str) -> MIC1:
+    cpu = MIC1(engine=engine, trace_depth=0)
+    cpu.load_program(IMAGE)
+    cpu.is_running = True
+    return cpu
+
+def resume(cpu: MIC1) -> int:
+    cpu.is_running = True
+    cpu.stop_flag = False
+    return cpu.run(100_000)
+
+def assert_stopped(cpu: MIC1, reason: dict):
+    assert cpu.break_reason == reason
+    assert (cpu.is_running, cpu.stop_flag, cpu.halted) == (False, True, False)
+    assert cpu.get_state()["simulation"]["breakReason"] == reason
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_pc_breakpoint_stops_before_instruction(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_pc(AGAIN)
+    cpu.run(100_000)
+    assert_stopped(cpu, {"type": "pc", "address": AGAIN})
+    # Na fronteira, com a instrução em AGAIN ainda por executar
+    assert (cpu.mpc.read(), cpu.pc.read(), cpu.main_memory.data[X]) == (0, AGAIN, 1)
+    for count in range(2, 10):
+        resume(cpu)
+        assert_stopped(cpu, {"type": "pc", "address": AGAIN})
+        assert cpu.main_memory.data[X] == count
+    resume(cpu)
+    assert cpu.halted and cpu.main_memory.data[X] == 10
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_pc_breakpoint_at_zero_is_ignored(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_pc(0)
+    cpu.run(100_000)
+    assert cpu.halted and cpu.break_reason is None
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_mpc_breakpoint(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_mpc(9)
+    cpu.run(100_000)
+    assert_stopped(cpu, {"type": "mpc", "address": 9})
+    assert cpu.mpc.read() == 9
+    with pytest.raises(ValueError):
+        cpu.breakpoints.add_mpc(len(cpu.control_store))
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_write_watchpoint(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_watch(X, read=False)
+    cpu.run(100_000)
+    assert_stopped(cpu, {"type": "write", "address": X})
+    # Para logo depois da escrita, que já está na memória
+    assert cpu.main_memory.data[X] == 1
+    assert cpu.pc.read() == IMAGE.labels["LOOP"] + 2
+    # STOD termina com 'wr; wr': o segundo ciclo de escrita também é um acesso
+    stopped_at = cpu.cycle_count
+    resume(cpu)
+    assert_stopped(cpu, {"type": "write", "address": X})
+    assert (cpu.cycle_count, cpu.main_memory.data[X]) == (stopped_at + 1, 1)
+    resume(cpu)
+    assert_stopped(cpu, {"type": "write", "address": X})
+    assert cpu.main_memory.data[X] == 2
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_read_watchpoint(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_watch(X, write=False)
+    cpu.run(100_000)
+    assert_stopped(cpu, {"type": "read", "address": X})
+    # No meio de LODD X: o microciclo da leitura acabou de rodar
+    assert cpu.mpc.read() != 0
+    assert cpu.mbr.read() == 1
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_condition(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_condition("ac", ">=", 3)
+    cpu.run(100_000)
+    assert_stopped(cpu, {"type": "condition", "register": "AC", "value": 3})
+    assert cpu.mpc.read() == 0
+
+def test_engines_stop_on_same_cycle():
+    def stops(engine: str) -> list:
+        cpu = machine(engine)
+        cpu.breakpoints.add_watch(X)
+        cpu.breakpoints.add_condition("AC", "<", -5)
+        result = []
+        while not cpu.halted:
+            resume(cpu)
+            result.append((cpu.cycle_count, cpu.mpc.read(), cpu.break_reason if cpu.stop_flag else None))
+        return result
+    expected = stops("interp")
+    assert len(expected) > 20
+    for engine in ENGINES[1:]:
+        assert stops(engine) == expected, engine
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_removed_breakpoints_do_not_stop(engine):
+    cpu = machine(engine)
+    cpu.breakpoints.add_pc(AGAIN)
+    cpu.breakpoints.add_mpc(9)
+    cpu.breakpoints.add_watch(X)
+    condition = cpu.breakpoints.add_condition("AC", "==", 3)
+    cpu.breakpoints.remove_pc(AGAIN)
+    cpu.breakpoints.remove_mpc(9)
+    cpu.breakpoints.remove_watch(X)
+    assert cpu.breakpoints.remove_condition(condition)
+    assert not cpu.breakpoints.active
+    cpu.run(100_000)
+    assert cpu.halted and cpu.break_reason is None and not cpu.stop_flag
+
+def test_bad_condition():
+    cpu = machine("interp")
+    with pytest.raises(ValueError):
+        cpu.breakpoints.add_condition("XX", "==", 1)
+    with pytest.raises(ValueError):
+        cpu.breakpoints.add_condition("AC", "=", 1)
+    assert cpu.breakpoints.conditions == {}
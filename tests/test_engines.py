@@ -0,0 +1,36 @@
+"""Motores de execução contra o interpretado, nas fronteiras de instrução"""
+import pytest
+from .support import (CORPUS, boundary_states, reference_boundaries, assert_same_boundaries,
+                      machine, architectural_state)
+
+@pytest.mark.parametrize("name, words, max_cycles", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_jit_matches_interp(name, words, max_cycles):
+    candidate = boundary_states("jit", words, max_cycles)
+    assert_same_boundaries(reference_boundaries(name), candidate, name, max_cycles)
+
+@pytest.mark.parametrize("name, words, max_cycles", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_isa_matches_interp(name, words, max_cycles):
+    candidate = boundary_states("isa", words, max_cycles)
+    assert_same_boundaries(reference_boundaries(name), candidate, name, max_cycles)
+
+@pytest.mark.parametrize("name, words, max_cycles", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_block_matches_interp(name, words, max_cycles):
+    candidate = boundary_states("block", words, max_cycles)
+    assert_same_boundaries(reference_boundaries(name), candidate, name, max_cycles)
+
+# Programas fixos: escritos à mão e benchmarks
+FIXED = [entry for entry in CORPUS if not entry[0].startswith("random")]
+
+@pytest.mark.parametrize("budget", [1, 997, 4321])
+@pytest.mark.parametrize("name, words, max_cycles", FIXED, ids=[name for name, _, _ in FIXED])
+def test_block_run_stops_like_isa(name, words, max_cycles, budget):
+    """run(budget) não passa do limite por um bloco inteiro: para na mesma instrução que o modo ISA"""
+    states = []
+    for engine in ("isa", "block"):
+        cpu = machine(engine, words)
+        try:
+            cpu.run(budget)
+        except IndexError:
+            pass
+        states.append(architectural_state(cpu))
+    assert states[0] == states[1]
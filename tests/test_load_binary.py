@@ -0,0 +1,89 @@
+"""/load/binary e /assemble?format=binary|packed (imagem de palavras de 16 bits)"""
+import base64
+import struct
+import uuid
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+from backend.main import app, pool
+
+client = TestClient(app)
+PROGRAM = [0x7005, 0x1010, 0xF400, 0x6003]     # LOCO 5; STOD 16; PUSH; JUMP 3
+
+@pytest.fixture
+def session() -> str:
+    return uuid.uuid4().hex
+
+def load(session: str, body: bytes, byteorder: str | None = None, content_type: str = "application/octet-stream"):
+    params = {"byteorder": byteorder} if byteorder else {}
+    return client.post("/load/binary", content=body, params=params,
+                       headers={"X-Session-Id": session, "Content-Type": content_type})
+
+def memory(session: str, count: int) -> list[int]:
+    return [word & 0xFFFF for word in pool.get(session).main_memory.data[:count]]
+
+@pytest.mark.parametrize("byteorder, fmt", [(None, "<"), ("little", "<"), ("big", ">")])
+def test_byte_orders(session, byteorder, fmt):
+    response = load(session, struct.pack(f"{fmt}{len(PROGRAM)}H", *PROGRAM), byteorder)
+    assert response.status_code == 200
+    assert response.json()["message"] == "4 palavras carregadas na memória."
+    assert memory(session, len(PROGRAM) + 1) == PROGRAM + [0]
+
+def test_same_bytes_differ_by_order(session):
+    load(session, b"\x12\x34", "big")
+    assert memory(session, 1) == [0x1234]
+    load(session, b"\x12\x34", "little")
+    assert memory(session, 1) == [0x3412]
+
+def test_loaded_program_runs(session):
+    load(session, struct.pack(">4H", *PROGRAM), "big")
+    cpu = pool.get(session)
+    cpu.is_running = True
+    cpu.run(10_000)
+    assert cpu.halted
+    assert cpu.main_memory.data[16] == 5 and cpu.sp.read() == 4095
+
+def test_full_memory_and_empty_image(session):
+    words = [(address * 7) & 0xFFFF for address in range(4096)]
+    assert load(session, struct.pack("<4096H", *words)).status_code == 200
+    assert memory(session, 4096) == words
+    response = load(session, b"")
+    assert response.status_code == 200
+    assert memory(session, 4096) == [0] * 4096
+
+@pytest.mark.parametrize("body", [b"\x01", b"\x01\x02\x03", bytes(2 * 4096 + 2), bytes(2 * 4096 + 1)])
+def test_bad_sizes(session, body):
+    load(session, struct.pack("<4H", *PROGRAM))
+    response = load(session, body)
+    assert response.status_code == 400
+    assert "número par de bytes" in response.json()["detail"]
+    # A máquina fica com o programa anterior
+    assert memory(session, len(PROGRAM)) == PROGRAM
+
+def test_bad_byteorder(session):
+    response = load(session, b"\x00\x00", "middle")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Ordem de bytes desconhecida: middle"
+
+def test_bad_content_type(session):
+    response = load(session, b"\x00\x00", content_type="application/json")
+    assert response.status_code == 415
+
+@pytest.mark.parametrize("byteorder", ["little", "big"])
+def test_assemble_binary_round_trip(session, byteorder):
+    source = "LOCO 5\nSTOD X\nFIM: JUMP FIM\n"
+    response = client.post("/assemble", params={"format": "binary", "byteorder": byteorder},
+                           json={"source": source})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert load(session, response.content, byteorder).status_code == 200
+    assert memory(session, 3) == [0x7005, 0x1003, 0x6002]
+
+def test_assemble_packed(session):
+    response = client.post("/assemble", params={"format": "packed", "byteorder": "big"},
+                           json={"source": "LOCO 5\nFIM: JUMP FIM\n"})
+    packed = response.json()
+    assert (packed["byteorder"], packed["words"]) == ("big", 2)
+    assert base64.b64decode(packed["image"]) == b"\x70\x05\x60\x01"
+    assert packed["program"]["labels"] == {"FIM": 1}
@@ -0,0 +1,80 @@
+"""BatchMachine (NumPy) contra o interpretado, pista a pista"""
+import random
+import pytest
+from .support import CORPUS, boundary_states, assert_same_boundaries
+
+np = pytest.importorskip("numpy")
+from backend.lockstep import BatchMachine, ERROR
+from backend.microcode import CONTROL_STORE
+
+LANES = 4
+DATA_WORDS = 8
+
+# Aleatórios só em parte: cada programa roda LANES vezes no interpretado
+PROGRAMS = [entry for entry in CORPUS if not entry[0].startswith("random")]
+PROGRAMS += [entry for entry in CORPUS if entry[0].startswith("random")][:40]
+
+def lane_data(name: str) -> list[list[int]]:
+    """Dados diferentes por pista, gravados logo depois do programa"""
+    rng = random.Random(name)
+    return [[rng.randrange(-32768, 32768) for _ in range(DATA_WORDS)] for _ in range(LANES)]
+
+def lane_state(machine: BatchMachine, lane: int) -> tuple:
+    """Mesmos campos de support.architectural_state"""
+    regs = machine.regs[lane]
+    return (int(regs[0]), int(regs[1]), int(regs[2]), int(regs[3]),
+            int(machine.mar[lane]), int(machine.mbr[lane]), int(machine.address_latch[lane]),
+            bool(machine.read_enable[lane]), bool(machine.write_enable[lane]),
+            machine.memory[lane].tobytes(), int(machine.cycles[lane]))
+
+def batch_boundaries(words: list[int], data: list[list[int]], max_cycles: int) -> list[tuple]:
+    """Como support.boundary_states, para cada pista de uma BatchMachine"""
+    machine = BatchMachine(words, LANES)
+    for lane, values in enumerate(data):
+        machine.set_memory(len(words) + 2, values, lane)
+    states = [{} for _ in range(LANES)]
+    while machine.cycle_count < max_cycles and machine.step():
+        for lane in np.flatnonzero((machine.mpc == 0) & (machine.status != ERROR)).tolist():
+            states[lane][int(machine.cycles[lane])] = lane_state(machine, lane)
+    return [(states[lane], bool(machine.status[lane] == ERROR), int(machine.cycles[lane]))
+            for lane in range(LANES)]
+
+@pytest.mark.parametrize("name, words, max_cycles", PROGRAMS, ids=[name for name, _, _ in PROGRAMS])
+def test_lockstep_matches_interp(name, words, max_cycles):
+    data = lane_data(name)
+    lanes = batch_boundaries(words, data, max_cycles)
+    for lane, values in enumerate(data):
+        reference = boundary_states("interp", words + [0, 0] + values, max_cycles)
+        assert_same_boundaries(reference, lanes[lane], f"{name}[{lane}]", max_cycles)
+
+def test_default_control_store_follows_env(tmp_path, monkeypatch):
+    """Sem control_store explícito, mesmo microprograma que MIC1 usaria"""
+    from backend.mal import write_control_store
+    from backend.microanalysis import optimize
+    store, _ = optimize(CONTROL_STORE)
+    path = str(tmp_path / "otimizado.mcs")
+    write_control_store(path, store)
+    assert BatchMachine([0], 1).control_store == CONTROL_STORE
+    monkeypatch.setenv("MIC1_CONTROL_STORE", path)
+    assert BatchMachine([0], 1).control_store == store
+
+def test_set_memory_rejects_values_past_end():
+    machine = BatchMachine([0], 2)
+    machine.set_memory(4094, [1, 2])
+    assert machine.memory[:, 4094:].tolist() == [[1, 2], [1, 2]]
+    with pytest.raises(ValueError):
+        machine.set_memory(4095, [1, 2])
+    with pytest.raises(ValueError):
+        machine.set_memory(4090, [[0] * 7, [0] * 7])
+    assert machine.memory[:, 4094:].tolist() == [[1, 2], [1, 2]]
+
+def test_cli_reports_overflow(tmp_path, capsys):
+    from backend.lockstep import main
+    program = tmp_path / "prog.asm"
+    program.write_text("FIM: JUMP FIM\n")
+    inputs = tmp_path / "entradas.json"
+    inputs.write_text('[{"4095": [1, 2]}]')
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(program), str(inputs)])
+    assert exit_info.value.code == 2
+    assert "passam do fim da memória" in capsys.readouterr().err
@@ -0,0 +1,119 @@
+"""Microassembler MAL, disassembler e arquivo .mcs (backend.mal)"""
+import os
+import random
+import struct
+import pytest
+from backend.mal import (assemble, assemble_line, canonical, disassemble, disassemble_store,
+                         write_control_store, read_control_store, load_control_store_file,
+                         CS_HEADER, CONTROL_STORE_SIZE)
+from backend.microcode import CONTROL_STORE, build_decode_table
+
+MIC1_MAL = os.path.join(os.path.dirname(__file__), "..", "microprograms", "mic1.mal")
+
+def test_mic1_mal_assembles_to_control_store():
+    with open(MIC1_MAL, encoding="utf-8") as source_file:
+        store, error = assemble(source_file.read())
+    assert error is None
+    assert store == [canonical(word) for word in CONTROL_STORE]
+
+def test_disassemble_store_round_trip():
+    store, error = assemble(disassemble_store(CONTROL_STORE))
+    assert error is None
+    assert store == [canonical(word) for word in CONTROL_STORE]
+
+def test_disassemble_round_trip_random_words():
+    """assemble(disassemble(w)) == canonical(w) para qualquer palavra de 32 bits"""
+    rng = random.Random(23)
+    for _ in range(20000):
+        word = rng.getrandbits(32)
+        assert assemble_line(disassemble(word)) == canonical(word), hex(word)
+
+def test_canonical_is_idempotent():
+    for word in CONTROL_STORE:
+        assert canonical(canonical(word)) == canonical(word)
+
+def test_labels_and_addresses():
+    source = """
+    # comentário
+    0: mar:=pc; rd;
+    laco: pc:=pc + 1; if z then goto laco;
+    10: fim: goto fim;
+    """
+    store, error = assemble(source, size=16)
+    assert error is None
+    assert len(store) == 16
+    assert store[1] == assemble_line("pc:=pc + 1; if z then goto 1;")
+    assert store[10] == assemble_line("goto 10;")
+    assert store[2:10] == [0] * 8
+
+@pytest.mark.parametrize("source, message", [
+    ("x: rd;\nx: wr;", "Erro na linha 2: label 'x' duplicado."),
+    ("goto nada;", "Erro na linha 1: label 'nada' não encontrado."),
+    ("goto 256;", "Erro na linha 1: destino 256 fora do campo ADDR (0-255)."),
+    ("0: rd;\n0: wr;", "Erro na linha 2: microendereço 0 já definido na linha 1."),
+    ("512: rd;", "Erro na linha 1: microendereço 512 fora da memória de controle."),
+    ("ac:=xx + 1;", "Erro na linha 1: registrador 'xx' desconhecido."),
+    ("ac:=ac - 1;", "Erro na linha 1: expressão 'ac-1' inválida."),
+    ("rd; pular;", "Erro na linha 1: enunciado 'pular' inválido."),
+    ("goto 1; if n then goto 2;", "Erro na linha 1: mais de um desvio na mesma microinstrução."),
+    ("ac:=ac + 1; pc:=pc + 1;", "Erro na linha 1: expressões diferentes na mesma microinstrução."),
+    ("ac:=ac + 1; pc:=ac + 1;", "Erro na linha 1: dois destinos no barramento C."),
+    ("ac:=mbr + mbr;", "Erro na linha 1: mbr só pode ser um dos operandos."),
+    ("mar:=mbr;", "Erro na linha 1: mar só recebe um registrador (barramento B)."),
+    ("mar:=pc; ac:=sp + ac;", "Erro na linha 1: mar precisa do mesmo registrador do barramento B da ALU."),
+])
+def test_malformed_source(source, message):
+    assert assemble(source) == (None, message)
+
+def test_mcs_round_trip(tmp_path):
+    path = str(tmp_path / "mic1.mcs")
+    write_control_store(path, CONTROL_STORE)
+    store, decoded = read_control_store(path)
+    assert store == list(CONTROL_STORE)
+    assert decoded == tuple(build_decode_table(CONTROL_STORE))
+    assert load_control_store_file(path) == (store, decoded)
+
+def test_load_mal_file(tmp_path):
+    store, decoded = load_control_store_file(MIC1_MAL)
+    assert decoded is None
+    assert len(store) == CONTROL_STORE_SIZE
+    bad = tmp_path / "ruim.mal"
+    bad.write_text("0: rd;\n1: goto nada;\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="ruim.mal: Erro na linha 2: label 'nada' não encontrado."):
+        load_control_store_file(str(bad))
+
+@pytest.fixture
+def mcs_bytes(tmp_path) -> bytes:
+    path = tmp_path / "mic1.mcs"
+    write_control_store(str(path), CONTROL_STORE)
+    return path.read_bytes()
+
+def _read(tmp_path, data: bytes):
+    path = tmp_path / "teste.mcs"
+    path.write_bytes(data)
+    return read_control_store(str(path))
+
+def test_mcs_truncated_header(tmp_path, mcs_bytes):
+    with pytest.raises(ValueError, match="truncado"):
+        _read(tmp_path, mcs_bytes[:CS_HEADER.size - 1])
+
+def test_mcs_bad_magic_and_version(tmp_path, mcs_bytes):
+    with pytest.raises(ValueError, match="não é uma memória de controle"):
+        _read(tmp_path, b"XXXXXX" + mcs_bytes[6:])
+    magic, version, entries, checksum = CS_HEADER.unpack_from(mcs_bytes)
+    header = CS_HEADER.pack(magic, version + 1, entries, checksum)
+    with pytest.raises(ValueError, match="não é uma memória de controle"):
+        _read(tmp_path, header + mcs_bytes[CS_HEADER.size:])
+
+@pytest.mark.parametrize("damage", ["truncado", "crc", "entradas"])
+def test_mcs_corrupted(tmp_path, mcs_bytes, damage):
+    data = bytearray(mcs_bytes)
+    if damage == "truncado":
+        data = data[:-1]
+    elif damage == "crc":
+        data[CS_HEADER.size + 5] ^= 1
+    else:
+        magic, version, entries, checksum = CS_HEADER.unpack_from(data)
+        struct.pack_into(CS_HEADER.format, data, 0, magic, version, entries - 1, checksum)
+    with pytest.raises(ValueError, match="corrompida"):
+        _read(tmp_path, bytes(data))
@@ -0,0 +1,41 @@
+"""Microprograma otimizado (microanalysis.optimize) contra o original"""
+import functools
+import pytest
+from backend.microanalysis import optimize
+from backend.microcode import CONTROL_STORE
+from .support import CORPUS, boundary_states, reference_boundaries, assert_same_boundaries
+
+OPTIMIZED, CHANGES = optimize(CONTROL_STORE)
+
+def test_optimizer_changes_default_store():
+    assert CHANGES
+    assert len(OPTIMIZED) == len(CONTROL_STORE)
+
+@pytest.mark.parametrize("name, words, max_cycles", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_optimized_store_matches_original(name, words, max_cycles):
+    """
+    Mesmo estado na n-ésima fronteira de instrução, com no máximo os
+    mesmos ciclos (o otimizado chega lá antes, então a contagem não entra)
+    """
+    expected, expected_error, expected_end = reference_boundaries(name)
+    got, got_error, got_end = boundary_states("interp", words, max_cycles, OPTIMIZED)
+    expected_cycles, got_cycles = sorted(expected), sorted(got)
+    for index in range(min(len(expected_cycles), len(got_cycles))):
+        expected_cycle, got_cycle = expected_cycles[index], got_cycles[index]
+        assert got[got_cycle][:-1] == expected[expected_cycle][:-1], f"{name}: instrução {index}"
+        assert got_cycle <= expected_cycle, f"{name}: instrução {index} mais lenta"
+    if expected_end < max_cycles and got_end < max_cycles:
+        assert (got_error, len(got)) == (expected_error, len(expected)), f"{name}: paradas diferentes"
+
+@functools.lru_cache(maxsize=None)
+def optimized_reference(name: str) -> tuple:
+    for program, words, max_cycles in CORPUS:
+        if program == name:
+            return boundary_states("interp", words, max_cycles, OPTIMIZED)
+    raise KeyError(name)
+
+@pytest.mark.parametrize("engine", ["jit", "isa", "block"])
+@pytest.mark.parametrize("name, words, max_cycles", CORPUS, ids=[name for name, _, _ in CORPUS])
+def test_engines_match_interp_on_optimized_store(name, words, max_cycles, engine):
+    candidate = boundary_states(engine, words, max_cycles, OPTIMIZED)
+    assert_same_boundaries(optimized_reference(name), candidate, name, max_cycles)
@@ -0,0 +1,196 @@
+"""export_state/import_state e snapshots delta (backend.snapshot)"""
+import json
+import pytest
+from backend.assembler import assemble
+from backend.cpu import MIC1, STATE_HEADER, STATE_VERSION, state_head_size
+from backend.snapshot import (encode_snapshot, decode_snapshot, SnapshotStore,
+                              SNAPSHOT_HEADER, BLOCK_INDEX, BLOCK_BYTES)
+
+SOURCE = """
+LOCO 40
+STOD N
+LOOP: LODD N
+SUBD ONE
+STOD N
+PUSH
+JNZE LOOP
+FIM: JUMP FIM
+ONE: .word 1
+"""
+PROGRAM, _ = assemble(SOURCE)
+REGISTERS = MIC1(trace_depth=0).register_file.size
+
+def running_machine(cycles: int = 300) -> MIC1:
+    """Programa no meio da execução, com breakpoints de todos os tipos"""
+    cpu = MIC1(trace_depth=0)
+    cpu.load_program(PROGRAM)
+    cpu.is_running = True
+    cpu.run(cycles)
+    cpu.breakpoints.add_pc(7)
+    cpu.breakpoints.add_mpc(9)
+    cpu.breakpoints.add_watch(0x0F00, read=False)
+    cpu.breakpoints.add_watch(0x0F01, write=False)
+    cpu.breakpoints.add_condition("AC", "<", 5)
+    return cpu
+
+def rebuild(blob: bytes, header: dict | None = None, breakpoints: bytes | None = None) -> bytes:
+    """blob com campos do cabeçalho e/ou o JSON dos breakpoints trocados"""
+    fields = dict(zip(("magic", "version", "mir", "flags", "latch", "cycles", "bp_len"),
+                      STATE_HEADER.unpack_from(blob)))
+    memory_start = state_head_size(blob, REGISTERS)
+    regs_end = memory_start - fields["bp_len"]
+    if breakpoints is None:
+        breakpoints = blob[regs_end:memory_start]
+    fields.update(header or {}, bp_len=len(breakpoints))
+    return STATE_HEADER.pack(*fields.values()) + blob[STATE_HEADER.size:regs_end] + breakpoints + blob[memory_start:]
+
+def test_round_trip_is_byte_exact():
+    cpu = running_machine()
+    blob = cpu.export_state()
+    other = MIC1(trace_depth=0)
+    other.import_state(blob)
+    assert other.export_state() == blob
+    assert other.breakpoints.to_dict() == cpu.breakpoints.to_dict()
+    assert other.breakpoints.to_dict()["conditions"] == [{"id": 1, "register": "AC", "op": "<", "value": 5}]
+    # Novas condições continuam a numeração restaurada
+    assert other.breakpoints.add_condition("PC", "==", 3) == 2
+
+def test_import_resumes_same_execution():
+    cpu = running_machine()
+    cpu.breakpoints.clear()
+    other = MIC1(trace_depth=0)
+    other.import_state(cpu.export_state())
+    for machine in (cpu, other):
+        machine.is_running = True
+        machine.run(5000)
+    assert other.halted and cpu.halted
+    assert other.export_state() == cpu.export_state()
+
+@pytest.fixture
+def target() -> MIC1:
+    """Máquina que não deve mudar quando o blob é rejeitado"""
+    cpu = MIC1(trace_depth=0)
+    cpu.load_program([0x7007, 0x6000])    # LOCO 7; JUMP 0: nunca para
+    cpu.is_running = True
+    cpu.run(20)
+    cpu.breakpoints.add_pc(1)
+    return cpu
+
+def assert_rejected(cpu: MIC1, blob: bytes, message: str):
+    before = cpu.export_state()
+    with pytest.raises(ValueError, match=message):
+        cpu.import_state(blob)
+    assert cpu.export_state() == before
+    assert cpu.is_running
+
+def test_bad_magic(target):
+    blob = running_machine().export_state()
+    assert_rejected(target, b"XXXX" + blob[4:], r"^Estado serializado inválido\.$")
+
+def test_bad_version(target):
+    blob = rebuild(running_machine().export_state(), {"version": STATE_VERSION + 1})
+    assert_rejected(target, blob, f"não suportada: {STATE_VERSION + 1}")
+
+@pytest.mark.parametrize("cut", [0, 1, 4, STATE_HEADER.size - 1])
+def test_truncated_header(target, cut):
+    assert_rejected(target, running_machine().export_state()[:cut], "truncado")
+
+@pytest.mark.parametrize("cut", [STATE_HEADER.size, STATE_HEADER.size + 10, -1, -8192])
+def test_truncated_body(target, cut):
+    assert_rejected(target, running_machine().export_state()[:cut], "tamanho errado")
+
+def test_trailing_bytes(target):
+    assert_rejected(target, running_machine().export_state() + b"\0\0", "tamanho errado")
+
+def test_bad_address_latch(target):
+    blob = rebuild(running_machine().export_state(), {"latch": 4096})
+    assert_rejected(target, blob, "latch de endereço")
+
+@pytest.mark.parametrize("breakpoints", [
+    b"{",
+    b"\xff\xfe",
+    b"[]",
+    b'{"pc": [], "mpc": [], "watchRead": [], "watchWrite": []}',
+    b'{"pc": [4096], "mpc": [], "watchRead": [], "watchWrite": [], "conditions": []}',
+    b'{"pc": [], "mpc": [512], "watchRead": [], "watchWrite": [], "conditions": []}',
+    b'{"pc": [], "mpc": [], "watchRead": ["1"], "watchWrite": [], "conditions": []}',
+    b'{"pc": [], "mpc": [], "watchRead": [], "watchWrite": [], "conditions": [{"id": 1, "register": "XX", "op": "<", "value": 1}]}',
+    b'{"pc": [], "mpc": [], "watchRead": [], "watchWrite": [], "conditions": [{"id": 1, "register": "AC", "op": "=", "value": 1}]}',
+])
+def test_bad_breakpoints(target, breakpoints):
+    blob = rebuild(running_machine().export_state(), breakpoints=breakpoints)
+    assert_rejected(target, blob, "breakpoints")
+
+def test_rebuild_helper_keeps_valid_blob():
+    blob = running_machine().export_state()
+    assert rebuild(blob) == blob
+    spec = json.dumps({"pc": [3], "mpc": [], "watchRead": [], "watchWrite": [], "conditions": []}).encode()
+    cpu = MIC1(trace_depth=0)
+    cpu.import_state(rebuild(blob, breakpoints=spec))
+    assert cpu.breakpoints.to_dict()["pc"] == [3]
+
+# --- Snapshots delta ---
+
+def test_snapshot_round_trip():
+    cpu = running_machine()
+    base = cpu.program_image
+    blob = encode_snapshot(cpu, base)
+    assert decode_snapshot(cpu, blob, base) == cpu.export_state()
+
+def test_snapshot_stores_only_changed_blocks():
+    cpu = running_machine()
+    state = cpu.export_state()
+    head_size = state_head_size(state, cpu.register_file.size)
+    memory, base = state[head_size:], cpu.program_image
+    changed = sum(memory[offset:offset + BLOCK_BYTES] != base[offset:offset + BLOCK_BYTES]
+                  for offset in range(0, len(memory), BLOCK_BYTES))
+    # Variável N logo após o código e a pilha no fim da memória
+    assert changed == 2
+    blob = encode_snapshot(cpu, base)
+    assert SNAPSHOT_HEADER.unpack_from(blob)[-1] == changed
+    assert len(blob) == SNAPSHOT_HEADER.size + head_size + changed * (BLOCK_INDEX.size + BLOCK_BYTES)
+
+def test_snapshot_of_unchanged_memory_has_no_blocks():
+    cpu = MIC1(trace_depth=0)
+    cpu.load_program(PROGRAM)
+    blob = encode_snapshot(cpu, cpu.program_image)
+    assert SNAPSHOT_HEADER.unpack_from(blob)[-1] == 0
+    assert decode_snapshot(cpu, blob, cpu.program_image) == cpu.export_state()
+
+def test_snapshot_rejects_bad_header_and_base():
+    cpu = running_machine()
+    base = cpu.program_image
+    blob = encode_snapshot(cpu, base)
+    with pytest.raises(ValueError, match="Snapshot inválido"):
+        decode_snapshot(cpu, b"X" + blob[1:], base)
+    with pytest.raises(ValueError, match="imagem base"):
+        decode_snapshot(cpu, blob, bytes(len(base)))
+
+def test_snapshot_store_restores_into_other_machine():
+    store = SnapshotStore()
+    cpu = running_machine()
+    expected = cpu.export_state()
+    info = store.save(cpu, "meio")
+    assert (info["label"], info["cycleCount"]) == ("meio", 300)
+    cpu.is_running = True
+    cpu.run(1000)
+    other = MIC1(trace_depth=0)
+    assert store.restore(info["id"], other)
+    assert other.export_state() == expected
+    assert other.program_image == cpu.program_image
+    assert store.full_state(info["id"], other) == expected
+    assert not store.restore("nada", other)
+
+def test_snapshot_store_evicts_and_shares_bases():
+    store = SnapshotStore(max_snapshots=2)
+    cpu = running_machine()
+    first = store.save(cpu)
+    second = store.save(cpu)
+    assert store.snapshots[first["id"]]["base"] is store.snapshots[second["id"]]["base"]
+    store.save(cpu)
+    assert first["id"] not in {info["id"] for info in store.list()}
+    assert len(store.list()) == 2
+    for info in store.list():
+        assert store.delete(info["id"])
+    assert store._bases == {}
+    assert not store.delete(first["id"])
@@ -0,0 +1,146 @@
+"""Trace binário (TraceRecorder/TraceReader) e histórico circular (MicroTrace)"""
+import pytest
+from backend.assembler import assemble_program
+from backend.cpu import MIC1
+from backend.trace import (MicroTrace, TraceReader, TraceRecorder, main, NO_REGISTER,
+                           TRACE_HEADER, TRACE_MEM_READ, TRACE_MEM_WRITE, TRACE_MBR_LOAD, TRACE_Z)
+
+SOURCE = """
+LOCO 3
+LOOP: STOD X
+LODD X
+SUBD ONE
+JNZE LOOP
+FIM: JUMP FIM
+ONE: .word 1
+"""
+IMAGE, _ = assemble_program(SOURCE)
+X = IMAGE.variables["X"]
+
+def record(engine: str, path, max_cycles: int = 100_000) -> tuple[MIC1, int]:
+    cpu = MIC1(engine=engine, trace_depth=0)
+    cpu.load_program(IMAGE)
+    cpu.start_recording(str(path))
+    cpu.is_running = True
+    cpu.run(max_cycles)
+    return cpu, cpu.stop_recording()
+
+def test_one_record_per_cycle(tmp_path):
+    cpu, count = record("interp", tmp_path / "t.trc")
+    assert cpu.halted and count == cpu.cycle_count
+    with TraceReader(str(tmp_path / "t.trc")) as reader:
+        assert len(reader) == count
+        assert [rec.cycle for rec in reader.records()] == list(range(count))
+        assert reader[-1] == reader[count - 1]
+        with pytest.raises(IndexError):
+            reader[count]
+
+def test_records_match_micro_history(tmp_path):
+    cpu = MIC1(trace_depth=1000)
+    cpu.load_program(IMAGE)
+    cpu.start_recording(str(tmp_path / "t.trc"))
+    cpu.is_running = True
+    cpu.run(100_000)
+    count = cpu.stop_recording()
+    assert count < 1000
+    with TraceReader(str(tmp_path / "t.trc")) as reader:
+        assert [(rec.mpc, rec.mir) for rec in reader.records()] == cpu.trace.entries()[::-1]
+
+def test_memory_accesses_and_registers(tmp_path):
+    record("interp", tmp_path / "t.trc")
+    with TraceReader(str(tmp_path / "t.trc")) as reader:
+        records = list(reader.records())
+    # STOD X grava 3, 2 e 1 (dois ciclos de escrita cada); LODD X os lê de volta
+    writes = [(rec.mem_address, rec.mem_value) for rec in records if rec.flags & TRACE_MEM_WRITE]
+    assert writes == [(X, 3), (X, 3), (X, 2), (X, 2), (X, 1), (X, 1)]
+    reads = [rec.mem_value for rec in records if rec.flags & TRACE_MEM_READ and rec.mem_address == X]
+    assert reads == [3, 3, 2, 2, 1, 1]
+    assert all(rec.mem_address == 0 and rec.mem_value == 0
+               for rec in records if not rec.flags & (TRACE_MEM_READ | TRACE_MEM_WRITE))
+    # Microinstrução 0 (mar:=pc; rd) não escreve registrador; 1 (pc:=pc + 1) escreve o PC
+    assert {rec.register for rec in records if rec.mpc == 0} == {NO_REGISTER}
+    fetch = [rec for rec in records if rec.mpc == 1]
+    assert {rec.register for rec in fetch} == {0}
+    assert [rec.c_bus for rec in fetch[:3]] == [1, 2, 3]
+    # MBR carregado pela ALU só em STOD (9: mbr:=ac) e SUBD (17: mbr:=inv(mbr))
+    assert {rec.mpc for rec in records if rec.flags & TRACE_MBR_LOAD} == {9, 17}
+    # O último SUBD zera o AC
+    assert any(rec.flags & TRACE_Z for rec in records)
+
+@pytest.mark.parametrize("engine", ["jit", "isa", "block"])
+def test_other_engines_record_same_trace(tmp_path, engine):
+    record("interp", tmp_path / "interp.trc")
+    record(engine, tmp_path / "outro.trc")
+    assert (tmp_path / "outro.trc").read_bytes() == (tmp_path / "interp.trc").read_bytes()
+
+def test_seek_cycle_and_replay(tmp_path):
+    _, count = record("interp", tmp_path / "t.trc")
+    with TraceReader(str(tmp_path / "t.trc")) as reader:
+        assert reader.seek_cycle(0) == 0
+        assert reader.seek_cycle(17) == 17
+        assert reader.seek_cycle(count + 5) == count
+        assert [rec.cycle for rec in reader.records(10, 3)] == [10, 11, 12]
+        assert list(reader.records(count - 1, 10)) == [reader[count - 1]]
+
+def test_recording_resumes_at_current_cycle(tmp_path):
+    cpu = MIC1(trace_depth=0)
+    cpu.load_program(IMAGE)
+    cpu.is_running = True
+    cpu.run(40)
+    cpu.start_recording(str(tmp_path / "t.trc"))
+    cpu.run(10)
+    assert cpu.stop_recording() == 10
+    assert cpu.stop_recording() == 0
+    with TraceReader(str(tmp_path / "t.trc")) as reader:
+        assert [rec.cycle for rec in reader.records()] == list(range(40, 50))
+        assert reader.seek_cycle(0) == 0 and reader.seek_cycle(45) == 5
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "ruim.trc"
+    path.write_bytes(TRACE_HEADER.pack(b"XXXXXXX", 1, 0) + bytes(64))
+    with pytest.raises(ValueError, match="Arquivo de trace inválido"):
+        TraceReader(str(path))
+    recorder = TraceRecorder(str(tmp_path / "vazio.trc"))
+    recorder.close()
+    recorder.close()
+    with TraceReader(str(tmp_path / "vazio.trc")) as reader:
+        assert len(reader) == 0 and list(reader.records()) == []
+
+def test_cli(tmp_path, capsys):
+    _, count = record("interp", tmp_path / "t.trc")
+    assert main([str(tmp_path / "t.trc"), "--cycle", "2", "--count", "2"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"{count} registros"
+    assert len(lines) == 3
+    assert lines[1].split()[0] == "2" and lines[2].split()[0] == "3"
+    # Ciclo 2: chega ao MBR a primeira instrução (LOCO 3 = 0x7003)
+    assert lines[1].endswith("R3 RD[0]=28675")
+
+# --- MicroTrace ---
+
+def test_micro_trace_ring_buffer():
+    trace = MicroTrace(3)
+    for mpc in range(5):
+        trace.record(mpc, mpc * 10)
+    assert len(trace) == 3 and trace.total == 5
+    assert trace.entries() == [(4, 40), (3, 30), (2, 20)]
+    assert trace.entries(limit=1) == [(4, 40)]
+
+def test_micro_trace_unrecord():
+    trace = MicroTrace(3)
+    for mpc in range(5):
+        trace.record(mpc, 0)
+    trace.unrecord(2)
+    assert [mpc for mpc, _ in trace.entries()] == [2]
+    assert trace.total == 3
+    # Além do que o buffer ainda tem, só a contagem total diminui
+    trace.unrecord(2)
+    assert (len(trace), trace.total) == (0, 1)
+    trace.record(7, 0)
+    assert trace.entries() == [(7, 0)]
+
+def test_micro_trace_disabled():
+    trace = MicroTrace(0)
+    assert not trace.enabled and trace.entries() == []
+    trace.set_depth(2)
+    assert trace.enabled and len(trace) == 0